@@ -1,15 +1,49 @@
-from typing import Dict, Any, List, Callable
+from typing import Dict, Any, List, Callable, Optional, Set, Tuple
 import logging
 import json
 import os
 import importlib.util
 import sys
 
+from http_client import HttpClient
+from state_store import StateStore
+
+# Actions that persist their value when the path starts with the state prefix
+STATEFUL_ACTIONS = (
+    "set_value", "delete_value", "append_value", "increment_value",
+    "decrement_value", "multiply_value", "divide_value"
+)
+FILE_WRITE_ACTIONS = ("create_file", "append_to_file")
+# Actions whose only effect is on the file named by their "path" parameter
+FILE_PATH_ACTIONS = FILE_WRITE_ACTIONS + ("delete_file",)
+# Actions with no effect anything else can observe
+OUTPUT_ACTIONS = ("log",)
+LOG_LEVELS = {
+    "debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING, "warn": logging.WARNING,
+    "error": logging.ERROR, "exception": logging.ERROR, "critical": logging.CRITICAL, "fatal": logging.CRITICAL
+}
+
+# (action, context, namespace) as passed to ActionExecutor.execute_many
+ActionCall = Tuple[Dict[str, Any], Dict[str, Any], Optional[str]]
+
 class ActionExecutor:
-    def __init__(self, custom_actions_dir: str = ".cursor/CORE/RULE-ENGINE/custom_actions"):
+    def __init__(self, custom_actions_dir: str = ".cursor/CORE/RULE-ENGINE/custom_actions",
+                 state_store: Optional[StateStore] = None, state_prefix: str = "state.",
+                 http_client: Optional[HttpClient] = None):
         self.logger = logging.getLogger("ActionExecutor")
         self.custom_actions_dir = custom_actions_dir
+        # With a state store, value actions on paths under state_prefix persist across
+        # events in the calling rule's namespace (see _execute_stateful)
+        self.state_store = state_store
+        self.state_prefix = state_prefix
+        # Shared by every http_request action so connections are pooled and kept alive
+        self.http_client = http_client or HttpClient()
+        # Called with (event_type, payload) by publish_event; the rule engine uses it
+        # to feed derived events back into evaluation
+        self.event_sink: Optional[Callable[[str, Dict[str, Any]], None]] = None
         self.actions: Dict[str, Callable] = self._load_built_in_actions()
+        # Actions that take a whole list of (context, params) calls; see execute_many
+        self.batch_actions: Dict[str, Callable] = {"log": self._batch_log}
         self._load_custom_actions()
 
     def _load_built_in_actions(self) -> Dict[str, Callable]:
@@ -55,13 +89,18 @@ class ActionExecutor:
                         for attr_name in dir(module):
                             attr = getattr(module, attr_name)
                             if hasattr(attr, '_is_action'):
-                                self.actions[attr._action_name] = attr
+                                if getattr(attr, '_action_batch', False):
+                                    self.batch_actions[attr._action_name] = attr
+                                    self.actions[attr._action_name] = self._single_call(attr)
+                                else:
+                                    self.actions[attr._action_name] = attr
                                 self.logger.info(f"Loaded custom action: {attr._action_name}")
                 except Exception as e:
                     self.logger.error(f"Error loading custom action file {filename}: {str(e)}")
 
-    def execute(self, action: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
-        """Execute an action with the given context"""
+    def execute(self, action: Dict[str, Any], context: Dict[str, Any], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Execute an action with the given context; namespace (normally the rule id)
+        scopes persistent state"""
         action_type = action.get("type")
         if not action_type:
             raise ValueError("Action type not specified")
@@ -72,7 +111,10 @@ class ActionExecutor:
 
         try:
             params = action.get("params", {})
-            result = action_func(context, **params)
+            if self._is_stateful(action_type, params):
+                result = self._execute_stateful(action_type, namespace or "global", context, **params)
+            else:
+                result = action_func(context, **params)
             return {
                 "success": True,
                 "action_type": action_type,
@@ -86,6 +128,341 @@ class ActionExecutor:
                 "error": str(e)
             }
 
+    @staticmethod
+    def _single_call(batch_func: Callable) -> Callable:
+        """Adapt a batch action to the one-call signature used by execute(); an
+        Exception in the result slot is raised, as execute_many reports it as failed"""
+        def call(context: Dict[str, Any], **params) -> Any:
+            value = batch_func([(context, params)])[0]
+            if isinstance(value, Exception):
+                raise value
+            return value
+        return call
+
+    def execute_many(self, calls: List[ActionCall]) -> List[Dict[str, Any]]:
+        """
+        Execute many actions at once and return their results in the same order
+
+        Calls are grouped and each group runs through a batch implementation: value
+        actions are applied per context in one ordered pass, create_file and
+        append_to_file become one write per file, log messages are emitted after a
+        single level check, and custom actions declared with @action(name, batch=True)
+        get a single call with the whole list. Other types run one by one.
+
+        Groups run one after another, so calls of different groups are only batched
+        together while that cannot change the outcome of running them in order. A
+        call starts a new round of groups when an earlier call of another group in
+        the round names the same file ("path" or "*_path" parameters), or shares
+        its context and either of them is an action whose effects are unknown
+        (anything but value, file and log actions). Sequences such as create_file then delete_file of one path, or
+        a custom backup then append_to_file, therefore run in their given order.
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        groups: Dict[str, List[int]] = {}
+        path_groups: Dict[str, Set[str]] = {}
+        context_groups: Dict[int, Set[str]] = {}
+        opaque_groups: Dict[int, Set[str]] = {}
+        for index, (action, context, namespace) in enumerate(calls):
+            action_type = action.get("type")
+            if action_type not in self.actions:
+                error = "Action type not specified" if not action_type else f"Unknown action type: {action_type}"
+                results[index] = {"success": False, "action_type": action_type, "error": error}
+                continue
+            if action_type in STATEFUL_ACTIONS:
+                group = "value"
+            elif action_type in FILE_WRITE_ACTIONS:
+                group = "file"
+            else:
+                group = action_type
+            paths = self._file_paths(action)
+            opaque = group != "value" and action_type not in FILE_PATH_ACTIONS and action_type not in OUTPUT_ACTIONS
+            key = id(context)
+            own = {group}
+            if (
+                any(path_groups.get(path, own) - own for path in paths)
+                or (opaque and context_groups.get(key, own) - own)
+                or opaque_groups.get(key, own) - own
+            ):
+                self._run_groups(calls, groups, results)
+                groups, path_groups, context_groups, opaque_groups = {}, {}, {}, {}
+            groups.setdefault(group, []).append(index)
+            for path in paths:
+                path_groups.setdefault(path, set()).add(group)
+            if action_type not in OUTPUT_ACTIONS:
+                context_groups.setdefault(key, set()).add(group)
+            if opaque:
+                opaque_groups.setdefault(key, set()).add(group)
+        self._run_groups(calls, groups, results)
+        return results
+
+    @staticmethod
+    def _file_paths(action: Dict[str, Any]) -> List[str]:
+        """Normalized file paths an action names in "path" or "*_path" parameters
+        (value actions use "path" for a context path, not a file)"""
+        if action["type"] in STATEFUL_ACTIONS:
+            return []
+        return [
+            os.path.abspath(value) for name, value in action.get("params", {}).items()
+            if (name == "path" or name.endswith("_path")) and isinstance(value, str)
+        ]
+
+    def _run_groups(self, calls: List[ActionCall], groups: Dict[str, List[int]],
+                    results: List[Optional[Dict[str, Any]]]) -> None:
+        for group, indices in groups.items():
+            if group == "value":
+                self._batch_values(calls, indices, results)
+            elif group == "file":
+                self._batch_file_writes(calls, indices, results)
+            elif group in self.batch_actions:
+                self._batch_call(group, calls, indices, results)
+            else:
+                for index in indices:
+                    action, context, namespace = calls[index]
+                    results[index] = self.execute(action, context, namespace=namespace)
+
+    def _record_failure(self, results: List[Optional[Dict[str, Any]]], index: int, action_type: str,
+                        error: Exception) -> None:
+        self.logger.error(f"Error executing action {action_type}: {str(error)}")
+        results[index] = {"success": False, "action_type": action_type, "error": str(error)}
+
+    def _batch_call(self, action_type: str, calls: List[ActionCall], indices: List[int],
+                    results: List[Optional[Dict[str, Any]]]) -> None:
+        """One call of a batch action with every pending (context, params) of its type"""
+        try:
+            values = self.batch_actions[action_type]([
+                (calls[index][1], calls[index][0].get("params", {})) for index in indices
+            ])
+            if len(values) != len(indices):
+                raise ValueError(f"Batch action returned {len(values)} results for {len(indices)} calls")
+        except Exception as e:
+            for index in indices:
+                self._record_failure(results, index, action_type, e)
+            return
+        for index, value in zip(indices, values):
+            if isinstance(value, Exception):
+                self._record_failure(results, index, action_type, value)
+            else:
+                results[index] = {"success": True, "action_type": action_type, "result": value}
+
+    def _batch_values(self, calls: List[ActionCall], indices: List[int],
+                      results: List[Optional[Dict[str, Any]]]) -> None:
+        """Apply value actions in order, walking each context path once: parent
+        containers found along the way are remembered per context and reused until
+        an action replaces or deletes something above them"""
+        parents: Dict[int, Dict[str, Any]] = {}
+        for index in indices:
+            action, context, namespace = calls[index]
+            action_type = action["type"]
+            params = action.get("params", {})
+            try:
+                if self._is_stateful(action_type, params):
+                    value = self._execute_stateful(action_type, namespace or "global", context, **params)
+                    self._forget_parents(parents.get(id(context)), params["path"])
+                else:
+                    value = self._apply_value(action_type, context, parents.setdefault(id(context), {}), **params)
+            except Exception as e:
+                self._record_failure(results, index, action_type, e)
+                continue
+            results[index] = {"success": True, "action_type": action_type, "result": value}
+
+    def _apply_value(self, action_type: str, context: Dict[str, Any], parents: Dict[str, Any], path: str,
+                     **params) -> None:
+        """One value action against a context, using and updating its parent cache"""
+        # Parameters are checked before the walk, which may create parent containers
+        if action_type in ("set_value", "append_value"):
+            (value,) = self._value_params(params, "value")
+        elif action_type == "delete_value":
+            self._value_params(params)
+        elif action_type in ("increment_value", "decrement_value"):
+            (amount,) = self._value_params(params, "amount", default=1)
+            if action_type == "decrement_value":
+                amount = -amount
+        elif action_type == "multiply_value":
+            (factor,) = self._value_params(params, "factor")
+        else:
+            (divisor,) = self._value_params(params, "divisor")
+            if divisor == 0:
+                raise ValueError("Cannot divide by zero")
+            factor = 1/divisor
+
+        parts = path.split('.')
+        prefix = '.'.join(parts[:-1])
+        leaf = parts[-1]
+        current = parents.get(prefix)
+        if current is None:
+            current = context
+            for part in parts[:-1]:
+                if part not in current:
+                    if action_type == "delete_value":
+                        return None
+                    current[part] = {}
+                current = current[part]
+            parents[prefix] = current
+
+        if action_type == "set_value":
+            current[leaf] = value
+            self._forget_parents(parents, path)
+        elif action_type == "delete_value":
+            if leaf in current:
+                del current[leaf]
+            self._forget_parents(parents, path)
+        elif action_type == "append_value":
+            if leaf not in current:
+                current[leaf] = []
+            elif not isinstance(current[leaf], list):
+                raise ValueError(f"Value at {path} is not a list")
+            current[leaf].append(value)
+        else:
+            if leaf not in current:
+                current[leaf] = 0
+            elif not isinstance(current[leaf], (int, float)):
+                raise ValueError(f"Value at {path} is not numeric")
+            if action_type in ("increment_value", "decrement_value"):
+                current[leaf] += amount
+            else:
+                current[leaf] *= factor
+        return None
+
+    @staticmethod
+    def _value_params(params: Dict[str, Any], *names: str, default: Any = None) -> List[Any]:
+        """Values of the expected params, rejecting missing and unexpected ones like a call would"""
+        unexpected = set(params) - set(names)
+        if unexpected:
+            raise TypeError(f"Unexpected parameters: {', '.join(sorted(unexpected))}")
+        values = []
+        for name in names:
+            if name not in params and default is None:
+                raise TypeError(f"Missing required parameter: {name}")
+            values.append(params.get(name, default))
+        return values
+
+    @staticmethod
+    def _forget_parents(parents: Optional[Dict[str, Any]], path: str) -> None:
+        """Drop cached containers at or below a path whose value was replaced"""
+        if not parents:
+            return
+        for prefix in [prefix for prefix in parents if prefix == path or prefix.startswith(path + '.')]:
+            del parents[prefix]
+
+    def _batch_file_writes(self, calls: List[ActionCall], indices: List[int],
+                           results: List[Optional[Dict[str, Any]]]) -> None:
+        """create_file and append_to_file as one open and one write per path; a
+        create_file in the sequence discards what came before it, as it would in order"""
+        by_path: Dict[str, List[Tuple[int, str]]] = {}
+        for index in indices:
+            action = calls[index][0]
+            params = dict(action.get("params", {}))
+            try:
+                path = params.pop("path")
+                if action["type"] == "create_file":
+                    content = params.pop("content", "")
+                else:
+                    content = params.pop("content")
+                if params:
+                    raise TypeError(f"Unexpected parameters: {', '.join(sorted(params))}")
+                if not isinstance(content, str):
+                    raise TypeError(f"content must be str, not {type(content).__name__}")
+            except (KeyError, TypeError) as e:
+                self._record_failure(results, index, action["type"], e)
+                continue
+            # Key on the absolute path, as _file_paths does, so "a.txt" and "./a.txt" share one ordered write
+            by_path.setdefault(os.path.abspath(path), []).append((index, content))
+
+        for path, writes in by_path.items():
+            mode = 'a'
+            chunks: List[str] = []
+            for index, content in writes:
+                if calls[index][0]["type"] == "create_file":
+                    mode = 'w'
+                    chunks = []
+                chunks.append(content)
+            try:
+                with open(path, mode) as f:
+                    f.write("".join(chunks))
+            except Exception as e:
+                for index, _ in writes:
+                    self._record_failure(results, index, calls[index][0]["type"], e)
+                continue
+            for index, _ in writes:
+                results[index] = {"success": True, "action_type": calls[index][0]["type"], "result": None}
+
+    def _batch_log(self, calls: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Optional[Exception]]:
+        """One record per message, as the log action emits them, but with one level
+        check per level and one caller lookup for the whole batch; the records are
+        then handed to the logger's handlers in order"""
+        results: List[Optional[Exception]] = []
+        records: List[logging.LogRecord] = []
+        enabled: Dict[int, bool] = {}
+        caller = None
+        for context, params in calls:
+            try:
+                self._value_params(params, "level", "message", default="")
+            except TypeError as e:
+                results.append(e)
+                continue
+            level = LOG_LEVELS.get(str(params.get("level", "info")).lower(), logging.INFO)
+            if level not in enabled:
+                enabled[level] = self.logger.isEnabledFor(level)
+            if enabled[level]:
+                if caller is None:
+                    caller = self.logger.findCaller()
+                filename, lineno, function, _ = caller
+                records.append(self.logger.makeRecord(self.logger.name, level, filename, lineno,
+                                                      str(params.get("message", "")), None, None, func=function))
+            results.append(None)
+        for record in records:
+            self.logger.handle(record)
+        return results
+
+    def _is_stateful(self, action_type: str, params: Dict[str, Any]) -> bool:
+        return (
+            self.state_store is not None
+            and action_type in STATEFUL_ACTIONS
+            and str(params.get("path", "")).startswith(self.state_prefix)
+        )
+
+    def _execute_stateful(self, action_type: str, namespace: str, context: Dict[str, Any], path: str,
+                          **params) -> Any:
+        """Apply a value action to the state store, then mirror the new value into the
+        context at the same path so later actions and variables see it"""
+        key = path[len(self.state_prefix):]
+        store = self.state_store
+
+        if action_type == "set_value":
+            value = store.set(namespace, key, params["value"])
+        elif action_type == "delete_value":
+            store.delete(namespace, key)
+            self._action_delete_value(context, path)
+            return None
+        elif action_type == "append_value":
+            def append(current: Any) -> Any:
+                if current is None:
+                    current = []
+                elif not isinstance(current, list):
+                    raise ValueError(f"Value at {path} is not a list")
+                return current + [params["value"]]
+            value = store.update(namespace, key, append)
+        else:
+            if action_type == "divide_value" and params.get("divisor") == 0:
+                raise ValueError("Cannot divide by zero")
+            apply = {
+                "increment_value": lambda x: x + params.get("amount", 1),
+                "decrement_value": lambda x: x - params.get("amount", 1),
+                "multiply_value": lambda x: x * params["factor"],
+                "divide_value": lambda x: x / params["divisor"]
+            }[action_type]
+
+            def numeric(current: Any) -> Any:
+                if current is None:
+                    current = 0
+                elif not isinstance(current, (int, float)):
+                    raise ValueError(f"Value at {path} is not numeric")
+                return apply(current)
+            value = store.update(namespace, key, numeric)
+
+        self._action_set_value(context, path, value)
+        return value
+
     # Built-in actions
     def _action_log(self, context: Dict[str, Any], level: str = "info", message: str = "") -> None:
         """Log a message at the specified level"""
@@ -186,25 +563,30 @@ class ActionExecutor:
         if os.path.exists(path):
             os.remove(path)
 
-    def _action_http_request(self, context: Dict[str, Any], **kwargs) -> Dict[str, Any]:
-        """Make an HTTP request (placeholder - implement with proper HTTP client)"""
-        # TODO: Implement with requests library
-        return {"status": "not_implemented"}
+    def _action_http_request(self, context: Dict[str, Any], url: str, method: str = "GET", **options) -> Dict[str, Any]:
+        """Make an HTTP request through the shared pooled client; options are headers,
+        params, json, body, timeout, retries and raise_for_status (see HttpClient.request)"""
+        return self.http_client.request(url, method=method, **options)
 
     def _action_publish_event(self, context: Dict[str, Any], event_type: str, payload: Dict[str, Any]) -> None:
-        """Publish an event (placeholder - implement with proper event system)"""
-        # TODO: Implement with proper event system
-        self.logger.info(f"Event published - Type: {event_type}, Payload: {json.dumps(payload)}")
+        """Publish an event to the event sink (if any)"""
+        self.logger.info(f"Event published - Type: {event_type}, Payload: {json.dumps(payload, default=str)}")
+        if self.event_sink is not None:
+            self.event_sink(event_type, payload)
 
     def _action_send_notification(self, context: Dict[str, Any], message: str, channel: str = "default") -> None:
         """Send a notification (placeholder - implement with proper notification system)"""
         # TODO: Implement with proper notification system
         self.logger.info(f"Notification sent - Channel: {channel}, Message: {message}")
 
-def action(name: str):
-    """Decorator to mark custom action functions"""
+def action(name: str, batch: bool = False):
+    """Decorator to mark custom action functions. With batch=True the function takes
+    a list of (context, params) pairs and returns a list of results in the same
+    order (an Exception in a slot fails just that call); execute_many then calls it
+    once per batch, execute() with a single pair."""
     def decorator(func):
         func._is_action = True
         func._action_name = name
+        func._action_batch = batch
         return func
     return decorator 
\ No newline at end of file
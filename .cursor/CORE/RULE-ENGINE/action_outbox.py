@@ -0,0 +1,380 @@
+from collections import OrderedDict, deque
+from typing import Dict, Any, Deque, List, Optional
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+from action_executor import ActionExecutor, STATEFUL_ACTIONS
+from content_inspection import ARTIFACTS_KEY
+from lazy_fields import LazyField
+
+# Actions that must run inline: they mutate the live context, or (publish_event)
+# feed the cascade scheduler of the evaluation in progress
+INLINE_ACTIONS = frozenset(STATEFUL_ACTIONS) | {"publish_event"}
+
+_UNRESOLVED = object()
+
+def _settled(value: Any, resolve: bool = False) -> Any:
+    """value with lazy fields replaced by their values; unresolved ones (nothing has
+    read them yet) are left out unless resolve"""
+    if isinstance(value, LazyField):
+        return _settled(value.get(), resolve) if resolve or value.resolved else _UNRESOLVED
+    if isinstance(value, dict):
+        settled = ((key, _settled(item, resolve)) for key, item in value.items())
+        return {key: item for key, item in settled if item is not _UNRESOLVED}
+    if isinstance(value, (list, tuple)):
+        return [item for item in (_settled(item, resolve) for item in value) if item is not _UNRESOLVED]
+    return value
+
+def snapshot_context(context: Dict[str, Any], resolve: bool = False) -> Dict[str, Any]:
+    """JSON-safe copy of a context, without per-event artifacts. For the journal,
+    lazy fields nothing has computed are dropped rather than computed just to be
+    journaled (fields the action references were resolved with its variables);
+    with resolve they are computed, for consumers that may read any field."""
+    data = {key: value for key, value in context.items() if key != ARTIFACTS_KEY}
+    return json.loads(json.dumps(_settled(data, resolve), default=str))
+
+class _Group:
+    """Records waiting for the same fsync, the entries to queue once it succeeds,
+    and the error if it failed"""
+    __slots__ = ("lines", "entries", "done", "error")
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.entries: List[Dict[str, Any]] = []
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+class ActionOutbox:
+    """
+    Durable outbox between rule matching and action side effects
+
+    submit() appends the action to a journal and returns once the record is on
+    disk; worker threads execute it later through the ActionExecutor and append a
+    "done" record. Entries are only queued for execution after their record is
+    durable; if the journal write fails, the entry is discarded and submit raises
+    the OSError. Records from concurrent submitters are group committed: the
+    committer thread writes everything queued since the previous fsync with one
+    write and one fsync, so durability costs one disk flush per batch rather than
+    per action.
+
+    On start() the journal is replayed: entries without a "done" record are queued
+    again (execution is at-least-once for actions interrupted by a crash).
+    Idempotency keys of pending and recently completed entries are remembered, also
+    across restarts, and a submit() with a known key is skipped. The journal is
+    compacted to pending entries plus retained keys once compact_after entries have
+    completed.
+
+    Journal lines are JSON:
+      {"op": "enqueue", "id": ..., "key": ..., "action": {...}, "context": {...}, "namespace": ..., "ts": ...}
+      {"op": "done", "id": ..., "ok": true, "ts": ...}
+      {"op": "key", "key": ..., "ts": ...}            # retained key written by compaction
+    """
+
+    def __init__(self, executor: ActionExecutor, journal_path: str = ".cursor/CORE/RULE-ENGINE/outbox/journal.log",
+                 workers: int = 4, commit_interval: float = 0.002, compact_after: int = 10000,
+                 retain_keys: int = 100000):
+        self.executor = executor
+        self.journal_path = journal_path
+        self.workers = workers
+        self.commit_interval = commit_interval
+        self.compact_after = compact_after
+        self.retain_keys = retain_keys
+        self.logger = logging.getLogger("ActionOutbox")
+
+        self._file = None
+        self._group = _Group()
+        self._commit_cond = threading.Condition()
+        self._queue: Deque[Dict[str, Any]] = deque()
+        self._queue_cond = threading.Condition()
+        self._state_lock = threading.Lock()
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_keys: Dict[str, str] = {}
+        self._done_keys: "OrderedDict[str, float]" = OrderedDict()
+        self._ids = itertools.count()
+        self._run = f"{int(time.time() * 1000):x}"
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._completed_since_compaction = 0
+
+        self.submitted = 0
+        self.duplicates = 0
+        self.executed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.replayed = 0
+        self.commits = 0
+        self.records_committed = 0
+
+    def start(self) -> "ActionOutbox":
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self._file = open(self.journal_path, 'a')
+        self._stopping = False
+        committer = threading.Thread(target=self._commit_loop, name="ActionOutbox-commit", daemon=True)
+        committer.start()
+        self._threads = [committer]
+        for i in range(self.workers):
+            worker = threading.Thread(target=self._work_loop, name=f"ActionOutbox-worker-{i}", daemon=True)
+            worker.start()
+            self._threads.append(worker)
+        return self
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.journal_path):
+            return
+        entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        with open(self.journal_path, 'r') as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-write; it was never acknowledged
+                    self.logger.warning(f"Ignoring unreadable journal line {number}")
+                    continue
+                op = record.get("op")
+                if op == "enqueue":
+                    entries[record["id"]] = record
+                elif op == "done":
+                    entry = entries.pop(record["id"], None)
+                    if entry is not None and entry.get("key"):
+                        self._remember_done(entry["key"], record.get("ts", 0.0))
+                elif op == "key":
+                    self._remember_done(record["key"], record.get("ts", 0.0))
+
+        for entry_id, entry in entries.items():
+            self._pending[entry_id] = entry
+            if entry.get("key"):
+                self._pending_keys[entry["key"]] = entry_id
+            self._queue.append(entry)
+        self.replayed = len(entries)
+        # Rewrite the journal so it starts from exactly the replayed state
+        self._compact()
+        if entries:
+            self.logger.info(f"Replaying {len(entries)} unfinished actions from {self.journal_path}")
+
+    def _remember_done(self, key: str, ts: float) -> None:
+        self._done_keys[key] = ts
+        self._done_keys.move_to_end(key)
+        while len(self._done_keys) > self.retain_keys:
+            self._done_keys.popitem(last=False)
+
+    def submit(self, action: Dict[str, Any], context: Dict[str, Any], namespace: Optional[str] = None,
+               key: Optional[str] = None, wait: bool = True) -> Optional[str]:
+        """
+        Journal an action for asynchronous execution and return its entry id, or None
+        if key was already submitted. With wait=True (the default) this returns only
+        after the entry is durable, and raises OSError if the journal write failed.
+        With wait=False a failed entry is discarded and only logged.
+        """
+        with self._state_lock:
+            if key is not None and (key in self._pending_keys or key in self._done_keys):
+                self.duplicates += 1
+                return None
+            entry_id = f"{self._run}-{next(self._ids)}"
+            entry = {
+                "op": "enqueue",
+                "id": entry_id,
+                "key": key,
+                "action": action,
+                "context": snapshot_context(context),
+                "namespace": namespace,
+                "ts": time.time()
+            }
+            self._pending[entry_id] = entry
+            if key is not None:
+                self._pending_keys[key] = entry_id
+            self.submitted += 1
+        group = self._append(entry, queue=True)
+        if wait:
+            group.done.wait()
+            if group.error is not None:
+                raise OSError(f"Outbox journal write failed: {str(group.error)}") from group.error
+        return entry_id
+
+    def _append(self, record: Dict[str, Any], queue: bool = False) -> _Group:
+        """Add a record to the next group commit; with queue, the record is an entry
+        that workers execute once the commit succeeds"""
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        with self._commit_cond:
+            group = self._group
+            group.lines.append(line)
+            if queue:
+                group.entries.append(record)
+            self._commit_cond.notify()
+        return group
+
+    def _commit_loop(self) -> None:
+        while True:
+            with self._commit_cond:
+                while not self._group.lines and not self._stopping:
+                    self._commit_cond.wait()
+                if not self._group.lines and self._stopping:
+                    return
+            # Let concurrent submitters join this group
+            if self.commit_interval > 0:
+                time.sleep(self.commit_interval)
+            with self._commit_cond:
+                group, self._group = self._group, _Group()
+            offset = None
+            try:
+                offset = self._file.tell()
+                self._file.write("\n".join(group.lines) + "\n")
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self.commits += 1
+                self.records_committed += len(group.lines)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Error committing outbox journal: {str(e)}")
+                group.error = e
+                self._rollback(offset)
+                self._discard(group.entries)
+            else:
+                if group.entries:
+                    with self._queue_cond:
+                        self._queue.extend(group.entries)
+                        self._queue_cond.notify_all()
+            finally:
+                group.done.set()
+            if self._completed_since_compaction >= self.compact_after:
+                with self._commit_cond:
+                    # Only compact when nothing is waiting to be written
+                    if not self._group.lines:
+                        self._compact()
+
+    def _rollback(self, offset: Optional[int]) -> None:
+        """Cut a failed group's partial write off the journal, so a replay cannot run
+        entries whose submit failed, and reopen it to drop any buffered data"""
+        try:
+            self._file.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            if offset is not None:
+                with open(self.journal_path, 'r+') as f:
+                    f.truncate(offset)
+            self._file = open(self.journal_path, 'a')
+        except OSError as e:
+            self.logger.error(f"Error reopening outbox journal: {str(e)}")
+
+    def _discard(self, entries: List[Dict[str, Any]]) -> None:
+        """Forget entries whose journal write failed; they are never executed and
+        their idempotency keys may be submitted again"""
+        with self._state_lock:
+            for entry in entries:
+                self._pending.pop(entry["id"], None)
+                if entry.get("key") is not None:
+                    self._pending_keys.pop(entry["key"], None)
+                self.rejected += 1
+        if entries:
+            self.logger.error(f"Discarded {len(entries)} outbox entries that could not be journaled")
+            with self._queue_cond:
+                self._queue_cond.notify_all()
+
+    def _compact(self) -> None:
+        """Rewrite the journal as pending entries plus retained keys"""
+        with self._state_lock:
+            lines = [json.dumps({"op": "key", "key": key, "ts": ts}, separators=(",", ":"))
+                     for key, ts in self._done_keys.items()]
+            lines += [json.dumps(entry, separators=(",", ":"), default=str) for entry in self._pending.values()]
+            self._completed_since_compaction = 0
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            if lines:
+                f.write("\n".join(lines) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.journal_path)
+        if self._file is not None:
+            self._file.close()
+            self._file = open(self.journal_path, 'a')
+
+    def _work_loop(self) -> None:
+        while True:
+            with self._queue_cond:
+                while not self._queue and not self._stopping:
+                    self._queue_cond.wait()
+                if not self._queue:
+                    return
+                entry = self._queue.popleft()
+            try:
+                result = self.executor.execute(entry["action"], entry["context"], namespace=entry.get("namespace"))
+                ok = bool(result.get("success"))
+            except Exception as e:
+                self.logger.error(f"Error executing outbox entry {entry['id']}: {str(e)}")
+                ok = False
+            self._complete(entry, ok)
+
+    def _complete(self, entry: Dict[str, Any], ok: bool) -> None:
+        now = time.time()
+        with self._state_lock:
+            self._pending.pop(entry["id"], None)
+            key = entry.get("key")
+            if key is not None:
+                self._pending_keys.pop(key, None)
+                self._remember_done(key, now)
+            if ok:
+                self.executed += 1
+            else:
+                self.failed += 1
+            self._completed_since_compaction += 1
+        # A lost done record only means the entry runs again after a crash
+        self._append({"op": "done", "id": entry["id"], "ok": ok, "ts": now})
+        with self._queue_cond:
+            self._queue_cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        with self._state_lock:
+            return len(self._pending)
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted entry has been executed"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue_cond:
+            while self.pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue_cond.wait(0.05 if remaining is None else min(remaining, 0.05))
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._state_lock:
+            return {
+                "pending": len(self._pending),
+                "queued": len(self._queue),
+                "submitted": self.submitted,
+                "duplicates": self.duplicates,
+                "executed": self.executed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "replayed": self.replayed,
+                "commits": self.commits,
+                "records_per_commit": self.records_committed / self.commits if self.commits else 0.0
+            }
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0) -> None:
+        """Stop workers (after executing queued entries if drain) and close the journal.
+        Entries not executed stay in the journal and are replayed on the next start."""
+        if drain:
+            self.drain(timeout)
+        with self._queue_cond:
+            if not drain:
+                self._queue.clear()
+            self._stopping = True
+            self._queue_cond.notify_all()
+        for thread in self._threads[1:]:
+            thread.join(timeout)
+        with self._commit_cond:
+            self._commit_cond.notify_all()
+        self._threads[0].join(timeout)
+        self._threads = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
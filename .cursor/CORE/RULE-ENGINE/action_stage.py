@@ -0,0 +1,355 @@
+from collections import deque
+from concurrent.futures import Future
+from typing import Dict, Any, Deque, List, Optional
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from action_executor import ActionExecutor
+
+class _Call:
+    """One queued action and the future its result is delivered to"""
+    __slots__ = ("action", "context", "namespace", "future", "timeout", "settled", "abandoned", "enqueued", "thread")
+
+    def __init__(self, action: Dict[str, Any], context: Dict[str, Any], namespace: Optional[str],
+                 timeout: Optional[float]):
+        self.action = action
+        self.context = context
+        self.namespace = namespace
+        self.future: Future = Future()
+        self.timeout = timeout
+        self.settled = False
+        self.abandoned = False
+        self.enqueued = time.monotonic()
+        self.thread: Optional[threading.Thread] = None
+
+class _TypeState:
+    """Queue, concurrency slot count, circuit breaker and counters of one action type"""
+
+    def __init__(self, limit: int, timeout: Optional[float]):
+        self.limit = limit
+        self.timeout = timeout
+        self.queue: Deque[_Call] = deque()
+        self.running = 0
+        # Running calls that overran their timeout; they hold a slot until they return
+        self.abandoned = 0
+        self.max_queued = 0
+        # Circuit breaker: "closed" runs calls, "open" rejects them until opened_at +
+        # reset_timeout, then "half_open" lets a single trial call through
+        self.circuit = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.wait_s = 0.0
+
+class ActionStage:
+    """
+    Worker-pool stage that executes actions off the evaluation thread
+
+    submit() only queues the action and returns a Future, so rule matching never
+    waits for action I/O. Each action type has its own FIFO queue and a concurrency
+    limit (limits, default_limit); a pool of worker threads takes calls from types
+    that are below their limit, round robin across types, so a slow type can only
+    ever occupy its own slots.
+
+    A call running longer than its timeout (action "timeout" key, then timeouts[type],
+    then default_timeout) resolves its future as failed. Python threads cannot be
+    interrupted, so the call keeps its concurrency slot until it really returns and
+    its worker thread is replaced, keeping the pool at full size for other types.
+
+    After failure_threshold consecutive failures (errors or timeouts) the type's
+    circuit opens: calls are rejected immediately for reset_timeout seconds, then one
+    trial call decides whether it closes again. Calls are also rejected while a type
+    already has max_queue calls waiting. stats() reports queue depths, running calls
+    and circuit states per type.
+
+    execute() has the ActionExecutor signature (submit and wait), so the stage can
+    also sit behind an ActionOutbox.
+    """
+
+    def __init__(self, executor: ActionExecutor, workers: int = 8, limits: Optional[Dict[str, int]] = None,
+                 default_limit: int = 4, timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: Optional[float] = 30.0, failure_threshold: int = 5,
+                 reset_timeout: float = 30.0, max_queue: int = 10000):
+        self.executor = executor
+        self.workers = workers
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_queue = max_queue
+        self.logger = logging.getLogger("ActionStage")
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Separate conditions on the same lock, so a submit() never wakes the watchdog
+        # or a drain() instead of a worker
+        self._watch_cond = threading.Condition(self._lock)
+        self._idle_cond = threading.Condition(self._lock)
+        self._types: Dict[str, _TypeState] = {}
+        self._order: List[str] = []
+        self._next_type = 0
+        self._deadlines: List[Any] = []
+        self._deadline_ids = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._worker_ids = itertools.count()
+        self._watchdog: Optional[threading.Thread] = None
+        self._running = False
+        self.replaced_workers = 0
+
+    def start(self) -> "ActionStage":
+        with self._cond:
+            if self._running:
+                return self
+            self._running = True
+        for _ in range(self.workers):
+            self._spawn_worker()
+        self._watchdog = threading.Thread(target=self._watch, name="ActionStage-watchdog", daemon=True)
+        self._watchdog.start()
+        return self
+
+    def _spawn_worker(self) -> None:
+        thread = threading.Thread(target=self._work_loop, name=f"ActionStage-worker-{next(self._worker_ids)}",
+                                  daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _state(self, action_type: str) -> _TypeState:
+        state = self._types.get(action_type)
+        if state is None:
+            state = _TypeState(self.limits.get(action_type, self.default_limit),
+                               self.timeouts.get(action_type, self.default_timeout))
+            self._types[action_type] = state
+            self._order.append(action_type)
+        return state
+
+    def submit(self, action: Dict[str, Any], context: Dict[str, Any], namespace: Optional[str] = None) -> Future:
+        """Queue an action; the future resolves to the ActionExecutor result dict"""
+        action_type = action.get("type")
+        if action_type not in self.executor.actions:
+            future: Future = Future()
+            future.set_result({"success": False, "action_type": action_type,
+                               "error": f"Unknown action type: {action_type}"})
+            return future
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("Action stage is not running")
+            state = self._state(action_type)
+            timeout = action.get("timeout", state.timeout)
+            # Actions run later, so they get their own top-level view of the context
+            call = _Call(action, dict(context), namespace, timeout)
+            reason = self._admit(state)
+            if reason is None:
+                state.queue.append(call)
+                state.max_queued = max(state.max_queued, len(state.queue))
+                self._cond.notify()
+                return call.future
+            state.rejected += 1
+        call.future.set_result({"success": False, "action_type": action_type, "rejected": True, "error": reason})
+        return call.future
+
+    def _admit(self, state: _TypeState) -> Optional[str]:
+        """None if a call may be queued, otherwise why it is rejected"""
+        if state.circuit == "open":
+            if time.monotonic() - state.opened_at < self.reset_timeout:
+                return "Circuit open"
+            state.circuit = "half_open"
+        if state.circuit == "half_open" and (state.trial_running or state.queue):
+            return "Circuit half open, trial call in progress"
+        if len(state.queue) >= self.max_queue:
+            return f"Queue full ({self.max_queue} calls waiting)"
+        return None
+
+    def execute(self, action: Dict[str, Any], context: Dict[str, Any], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Submit and wait for the result (ActionExecutor-compatible)"""
+        return self.submit(action, context, namespace).result()
+
+    def _take(self) -> Optional[Any]:
+        """Next runnable (type, call), round robin over types; called with _cond held"""
+        count = len(self._order)
+        for offset in range(count):
+            action_type = self._order[(self._next_type + offset) % count]
+            state = self._types[action_type]
+            if state.queue and state.running < state.limit:
+                self._next_type = (self._next_type + offset + 1) % count
+                call = state.queue.popleft()
+                state.running += 1
+                state.wait_s += time.monotonic() - call.enqueued
+                if state.circuit == "half_open":
+                    state.trial_running = True
+                return state, call
+        return None
+
+    def _work_loop(self) -> None:
+        while True:
+            with self._cond:
+                taken = self._take()
+                while taken is None:
+                    if not self._running:
+                        return
+                    self._cond.wait()
+                    taken = self._take()
+                state, call = taken
+                call.thread = threading.current_thread()
+                if call.timeout is not None:
+                    heapq.heappush(self._deadlines,
+                                   (time.monotonic() + call.timeout, next(self._deadline_ids), state, call))
+                    self._watch_cond.notify()
+            try:
+                result = self.executor.execute(call.action, call.context, namespace=call.namespace)
+            except Exception as e:
+                result = {"success": False, "action_type": call.action.get("type"), "error": str(e)}
+            rejected: List[_Call] = []
+            with self._cond:
+                state.running -= 1
+                owner = not call.settled
+                if owner:
+                    call.settled = True
+                    rejected = self._record(state, bool(result.get("success")))
+                else:
+                    state.abandoned -= 1
+                self._cond.notify_all()
+                self._idle_cond.notify_all()
+            if owner:
+                call.future.set_result(result)
+            self._reject(rejected, "Circuit open")
+            if call.abandoned:
+                # A replacement worker took over while this call overran its timeout
+                return
+
+    def _record(self, state: _TypeState, ok: bool, timed_out: bool = False) -> List[_Call]:
+        """Update counters and the circuit breaker; called with _cond held. Returns the
+        queued calls to reject when this outcome opens the circuit."""
+        state.completed += 1
+        if state.circuit == "half_open":
+            state.trial_running = False
+        if ok:
+            state.consecutive_failures = 0
+            state.circuit = "closed"
+            return []
+        state.failed += 1
+        if timed_out:
+            state.timed_out += 1
+        state.consecutive_failures += 1
+        if state.circuit == "half_open" or state.consecutive_failures >= self.failure_threshold:
+            state.circuit = "open"
+            state.opened_at = time.monotonic()
+            # Fail fast instead of feeding the waiting calls to a failing type
+            rejected = list(state.queue)
+            state.queue.clear()
+            state.rejected += len(rejected)
+            return rejected
+        return []
+
+    @staticmethod
+    def _reject(calls: List[_Call], reason: str) -> None:
+        for call in calls:
+            call.future.set_result({"success": False, "action_type": call.action.get("type"), "rejected": True,
+                                    "error": reason})
+
+    def _watch(self) -> None:
+        """Fail calls that overrun their deadline and replace their workers"""
+        while True:
+            expired: List[_Call] = []
+            rejected: List[_Call] = []
+            with self._cond:
+                if not self._running:
+                    return
+                now = time.monotonic()
+                while self._deadlines and (self._deadlines[0][3].settled or self._deadlines[0][0] <= now):
+                    _, _, state, call = heapq.heappop(self._deadlines)
+                    if call.settled:
+                        continue
+                    call.settled = True
+                    call.abandoned = True
+                    state.abandoned += 1
+                    rejected += self._record(state, False, timed_out=True)
+                    expired.append(call)
+                    if call.thread in self._threads:
+                        self._threads.remove(call.thread)
+                    self.replaced_workers += 1
+                    self._spawn_worker()
+                if not expired:
+                    self._watch_cond.wait(self._deadlines[0][0] - now if self._deadlines else None)
+                    continue
+            for call in expired:
+                action_type = call.action.get("type")
+                self.logger.error(f"Action {action_type} timed out after {call.timeout}s")
+                call.future.set_result({"success": False, "action_type": action_type, "timed_out": True,
+                                        "error": f"Timed out after {call.timeout}s"})
+            self._reject(rejected, "Circuit open")
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return sum(len(state.queue) for state in self._types.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            types = {
+                action_type: {
+                    "queued": len(state.queue),
+                    "max_queued": state.max_queued,
+                    "running": state.running,
+                    "abandoned": state.abandoned,
+                    "limit": state.limit,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "timed_out": state.timed_out,
+                    "rejected": state.rejected,
+                    "circuit": state.circuit,
+                    "avg_wait_ms": (state.wait_s / (state.completed + state.running) * 1000.0
+                                    if state.completed + state.running else 0.0)
+                }
+                for action_type, state in self._types.items()
+            }
+            return {
+                "queued": sum(entry["queued"] for entry in types.values()),
+                "running": sum(entry["running"] for entry in types.values()),
+                "workers": self.workers,
+                "replaced_workers": self.replaced_workers,
+                "types": types
+            }
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is queued or running (abandoned calls excepted)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while any(state.queue or state.running > state.abandoned for state in self._types.values()):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle_cond.wait(remaining)
+        return True
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0) -> None:
+        """Stop accepting calls; with drain, finish queued calls first, otherwise fail them"""
+        if drain:
+            self.drain(timeout)
+        cancelled: List[_Call] = []
+        with self._cond:
+            self._running = False
+            for state in self._types.values():
+                cancelled.extend(state.queue)
+                state.queue.clear()
+            self._cond.notify_all()
+            self._watch_cond.notify_all()
+        self._reject(cancelled, "Action stage stopped")
+        for thread in list(self._threads):
+            thread.join(timeout)
+        if self._watchdog is not None:
+            self._watchdog.join(timeout)
+        self._threads = []
+
+    def __enter__(self) -> "ActionStage":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,155 @@
+from typing import Dict, Any, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+
+from http_client import (
+    NOT_PROCESSED_STATUSES, RETRY_STATUSES, HttpRequestError, backoff_delay, decode_body, host_key,
+    is_retry_safe, retry_after
+)
+
+class AsyncHttpClient:
+    """
+    asyncio counterpart of HttpClient, for webhook fan-out from event-loop code
+
+    One aiohttp session per client keeps connections alive; its connector caps
+    open connections at pool_size overall and per_host_limit per host, queueing
+    requests beyond that. request() takes the same arguments as the http_request
+    action params and applies the same retry rules (full-jitter backoff, only
+    idempotent or Idempotency-Key requests are retried after they may have been
+    processed). The session is created on first use inside the running loop.
+
+        async with AsyncHttpClient() as client:
+            results = await client.fan_out([{"url": url, "method": "POST", "json": payload} for url in hooks])
+    """
+
+    def __init__(self, pool_size: int = 100, per_host_limit: int = 8, timeout: float = 10.0,
+                 connect_timeout: float = 3.0, retries: int = 3, backoff_base: float = 0.1,
+                 backoff_max: float = 5.0, keepalive_timeout: float = 30.0, max_body: int = 65536,
+                 seed: Optional[int] = None):
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body = max_body
+        self.logger = logging.getLogger("AsyncHttpClient")
+        self._rng = random.Random(seed)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.requests = 0
+        self.attempts = 0
+        self.retried = 0
+        self.failures = 0
+
+    def _ensure_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host_limit,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def request(self, url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None,
+                      params: Optional[Dict[str, Any]] = None, json: Any = None, body: Optional[str] = None,
+                      timeout: Optional[float] = None, retries: Optional[int] = None,
+                      raise_for_status: bool = True) -> Dict[str, Any]:
+        """Same contract as HttpClient.request"""
+        session = self._ensure_session()
+        method = method.upper()
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        retry_safe = is_retry_safe(method, headers)
+        host_key(url)
+        client_timeout = aiohttp.ClientTimeout(total=timeout, connect=min(self.connect_timeout, timeout))
+        started = time.monotonic()
+        self.requests += 1
+
+        attempt = 0
+        while True:
+            status = None
+            error: Optional[Exception] = None
+            self.attempts += 1
+            try:
+                async with session.request(method, url, headers=headers, params=params, json=json, data=body,
+                                           timeout=client_timeout) as response:
+                    status = response.status
+                    response_headers = dict(response.headers)
+                    text = await response.text(errors="replace")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = None
+                error = e
+
+            if status is not None and status not in RETRY_STATUSES:
+                break
+            retryable = (
+                retry_safe
+                or isinstance(error, aiohttp.ClientConnectorError)
+                or status in NOT_PROCESSED_STATUSES
+            )
+            if attempt >= retries or not retryable:
+                break
+            delay = None
+            if status is not None:
+                delay = retry_after(response_headers.get("Retry-After"), self.backoff_max)
+            if delay is None:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, self._rng)
+            attempt += 1
+            self.retried += 1
+            self.logger.warning(
+                f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt + 1}/{retries + 1}): "
+                f"{str(error) or type(error).__name__ if error is not None else status}"
+            )
+            await asyncio.sleep(delay)
+
+        attempts = attempt + 1
+        if status is None:
+            self.failures += 1
+            raise HttpRequestError(f"{method} {url} failed after {attempts} attempts: "
+                                   f"{str(error) or type(error).__name__}", attempts=attempts)
+        result = {
+            "status": status,
+            "ok": status < 400,
+            "headers": response_headers,
+            "body": decode_body(response_headers.get("Content-Type", ""), text, self.max_body),
+            "attempts": attempts,
+            "elapsed_ms": (time.monotonic() - started) * 1000.0
+        }
+        if raise_for_status and not result["ok"]:
+            self.failures += 1
+            raise HttpRequestError(f"{method} {url} returned {status} after {attempts} attempts",
+                                   status=status, attempts=attempts, response=result)
+        return result
+
+    async def fan_out(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send many requests concurrently (each a dict of request() arguments); failures
+        come back as {"ok": False, "error": ...} in the same position"""
+        async def one(params: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                return await self.request(**params)
+            except (HttpRequestError, ValueError) as e:
+                return {"ok": False, "status": getattr(e, "status", None), "error": str(e)}
+        return await asyncio.gather(*(one(params) for params in requests))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "attempts": self.attempts,
+            "retried": self.retried,
+            "failures": self.failures
+        }
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self) -> "AsyncHttpClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
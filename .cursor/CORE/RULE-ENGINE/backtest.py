@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Rule backtesting
+
+Replays an archived event log (JSONL, optionally gzipped, one context per line)
+against the staged rules in .cursor/CORE/RULE-ENGINE/staging and the current rule
+set, in parallel worker processes, and reports how often each rule would fire,
+which rules it overlaps with and what it costs per event.
+
+Usage:
+  python backtest.py events.jsonl.gz
+  python backtest.py events.jsonl --workers 8 --format json --output report.json
+"""
+
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Set, Tuple
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from condition_evaluator import ConditionEvaluator
+
+STAGING_DIR = ".cursor/CORE/RULE-ENGINE/staging"
+RULES_DIR = ".cursor/CORE/RULE-ENGINE/rules"
+
+def _read_frontmatter(path: str) -> Dict[str, Any]:
+    """Parse the key: value header of a generated .mdc rule"""
+    with open(path, 'r') as f:
+        lines = f.read().split("\n")
+    meta: Dict[str, Any] = {}
+    if not lines or lines[0].strip() != "---":
+        return meta
+    for line in lines[1:]:
+        if line.strip() == "---":
+            break
+        key, _, value = line.partition(":")
+        value = value.strip()
+        try:
+            meta[key.strip()] = json.loads(value)
+        except ValueError:
+            meta[key.strip()] = {"true": True, "false": False}.get(value.lower(), value)
+    return meta
+
+def mdc_rule(path: str) -> Dict[str, Any]:
+    """
+    Express a generated .mdc rule as an engine rule: it applies to events on files
+    matching its globs (or to every event when alwaysApply is set without globs)
+    """
+    meta = _read_frontmatter(path)
+    globs = meta.get("globs") or []
+    if isinstance(globs, str):
+        globs = [globs]
+    conditions: Dict[str, Any] = {}
+    if globs:
+        conditions = {
+            "operator": "or",
+            "conditions": [{"field": "file.path", "operator": "path_glob", "value": glob} for glob in globs]
+        }
+    elif not meta.get("alwaysApply"):
+        conditions = {"operator": "or", "conditions": []}
+    name = os.path.splitext(os.path.basename(path))[0]
+    return {"id": name, "name": name, "is_active": True, "conditions": conditions}
+
+def load_rule_dir(directory: str) -> Dict[str, Dict[str, Any]]:
+    """Rule id -> rule data for every JSON rule and .mdc rule below directory"""
+    rules: Dict[str, Dict[str, Any]] = {}
+    if not os.path.isdir(directory):
+        return rules
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            path = os.path.join(root, filename)
+            try:
+                if filename.endswith(".json") and filename != "manifest.json":
+                    with open(path, 'r') as f:
+                        data = json.load(f)
+                    if isinstance(data, dict) and "conditions" in data:
+                        rules[data.get("id", filename)] = data
+                elif filename.endswith(".mdc"):
+                    data = mdc_rule(path)
+                    rules[data["id"]] = data
+            except (OSError, ValueError) as e:
+                print(f"Skipping {path}: {e}", file=sys.stderr)
+    return {rule_id: data for rule_id, data in rules.items() if data.get("is_active", True)}
+
+@dataclass
+class BacktestStats:
+    """Counts merged across workers; rule ids are prefixed staged:/current:"""
+    events: int = 0
+    parse_errors: int = 0
+    hits: Dict[str, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    cost_ns: Dict[str, int] = field(default_factory=dict)
+    overlap: Dict[str, Dict[str, int]] = field(default_factory=dict)  # staged id -> other id -> both fired
+    samples: Dict[str, List[int]] = field(default_factory=dict)  # staged id -> first matching line numbers
+
+    def merge(self, other: "BacktestStats", max_samples: int) -> None:
+        self.events += other.events
+        self.parse_errors += other.parse_errors
+        for target, source in ((self.hits, other.hits), (self.errors, other.errors), (self.cost_ns, other.cost_ns)):
+            for key, value in source.items():
+                target[key] = target.get(key, 0) + value
+        for staged, counts in other.overlap.items():
+            merged = self.overlap.setdefault(staged, {})
+            for key, value in counts.items():
+                merged[key] = merged.get(key, 0) + value
+        for staged, lines in other.samples.items():
+            merged_lines = self.samples.setdefault(staged, [])
+            merged_lines.extend(lines)
+            merged_lines.sort()
+            del merged_lines[max_samples:]
+
+# Per-process state set by _init_worker
+_worker: Dict[str, Any] = {}
+
+def _init_worker(staged: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]], max_samples: int) -> None:
+    _worker["evaluator"] = ConditionEvaluator()
+    _worker["rules"] = (
+        [(f"staged:{rule_id}", data.get("conditions", {})) for rule_id, data in staged.items()]
+        + [(f"current:{rule_id}", data.get("conditions", {})) for rule_id, data in current.items()]
+    )
+    _worker["max_samples"] = max_samples
+
+def _run_chunk(chunk: Tuple[int, List[str]]) -> BacktestStats:
+    first_line, lines = chunk
+    evaluator: ConditionEvaluator = _worker["evaluator"]
+    rules: List[Tuple[str, Dict[str, Any]]] = _worker["rules"]
+    max_samples: int = _worker["max_samples"]
+    stats = BacktestStats()
+    clock = time.perf_counter_ns
+
+    for offset, line in enumerate(lines):
+        try:
+            context = json.loads(line)
+        except ValueError:
+            stats.parse_errors += 1
+            continue
+        stats.events += 1
+        fired = []
+        for rule_id, conditions in rules:
+            started = clock()
+            try:
+                matched = evaluator.evaluate(conditions, context)
+            except Exception:
+                matched = False
+                stats.errors[rule_id] = stats.errors.get(rule_id, 0) + 1
+            stats.cost_ns[rule_id] = stats.cost_ns.get(rule_id, 0) + clock() - started
+            if matched:
+                fired.append(rule_id)
+                stats.hits[rule_id] = stats.hits.get(rule_id, 0) + 1
+
+        for rule_id in fired:
+            if not rule_id.startswith("staged:"):
+                continue
+            counts = stats.overlap.setdefault(rule_id, {})
+            for other in fired:
+                if other != rule_id:
+                    counts[other] = counts.get(other, 0) + 1
+            samples = stats.samples.setdefault(rule_id, [])
+            if len(samples) < max_samples:
+                samples.append(first_line + offset)
+    return stats
+
+def _chunks(path: str, chunk_size: int) -> Iterator[Tuple[int, List[str]]]:
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, 'rt') as f:
+        chunk: List[str] = []
+        first = 1
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            if not chunk:
+                first = number
+            chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield first, chunk
+                chunk = []
+        if chunk:
+            yield first, chunk
+
+def run_backtest(archive: str, staged: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]],
+                 workers: Optional[int] = None, chunk_size: int = 5000, max_samples: int = 5) -> Dict[str, Any]:
+    """Evaluate staged and current rules over the archive and build the report
+
+    At most 2 * workers chunks are read and in flight at a time: the next chunk is
+    submitted as each one completes, so memory stays bounded however large the
+    archive is. Chunk results merge in completion order, which does not change
+    the totals.
+    """
+    started = time.monotonic()
+    total = BacktestStats()
+    workers = workers or os.cpu_count() or 1
+    chunks = _chunks(archive, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(staged, current, max_samples)) as pool:
+        in_flight: Set[Future] = set()
+        exhausted = False
+        while True:
+            while not exhausted and len(in_flight) < 2 * workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    in_flight.add(pool.submit(_run_chunk, chunk))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                total.merge(future.result(), max_samples)
+    return build_report(total, staged, current, workers, time.monotonic() - started)
+
+def _rule_entry(key: str, stats: BacktestStats) -> Dict[str, Any]:
+    hits = stats.hits.get(key, 0)
+    events = max(stats.events, 1)
+    return {
+        "hits": hits,
+        "hit_rate": hits / events,
+        "errors": stats.errors.get(key, 0),
+        "cost_us_per_event": stats.cost_ns.get(key, 0) / events / 1000.0,
+        "total_cost_ms": stats.cost_ns.get(key, 0) / 1e6
+    }
+
+def build_report(stats: BacktestStats, staged: Dict[str, Any], current: Dict[str, Any], workers: int,
+                 elapsed: float) -> Dict[str, Any]:
+    current_cost = sum(stats.cost_ns.get(f"current:{rule_id}", 0) for rule_id in current) / max(stats.events, 1) / 1000.0
+    staged_report = {}
+    for rule_id in staged:
+        key = f"staged:{rule_id}"
+        entry = _rule_entry(key, stats)
+        entry["cost_vs_current_set"] = entry["cost_us_per_event"] / current_cost if current_cost else None
+        hits = entry["hits"]
+        overlaps = []
+        for other, both in sorted(stats.overlap.get(key, {}).items(), key=lambda item: -item[1]):
+            other_hits = stats.hits.get(other, 0)
+            overlaps.append({
+                "rule": other,
+                "both": both,
+                "share_of_hits": both / hits if hits else 0.0,
+                "jaccard": both / (hits + other_hits - both) if hits + other_hits - both else 0.0
+            })
+        entry["overlaps"] = overlaps
+        entry["sample_lines"] = stats.samples.get(key, [])
+        staged_report[rule_id] = entry
+
+    return {
+        "events": stats.events,
+        "parse_errors": stats.parse_errors,
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "current_cost_us_per_event": current_cost,
+        "staged": staged_report,
+        "current": {rule_id: _rule_entry(f"current:{rule_id}", stats) for rule_id in current}
+    }
+
+def format_report(report: Dict[str, Any], top: int = 5) -> str:
+    lines = [
+        f"Backtest over {report['events']:,} events ({report['parse_errors']} unparseable) "
+        f"with {report['workers']} workers in {report['elapsed_s']:.1f}s",
+        f"Current rule set: {len(report['current'])} rules, "
+        f"{report['current_cost_us_per_event']:.1f}us per event",
+        ""
+    ]
+    for rule_id, entry in sorted(report["staged"].items(), key=lambda item: -item[1]["cost_us_per_event"]):
+        relative = entry["cost_vs_current_set"]
+        lines.append(
+            f"{rule_id}: {entry['hits']:,} hits ({entry['hit_rate']:.2%}), "
+            f"{entry['cost_us_per_event']:.1f}us per event"
+            + (f" ({relative:.0%} of the current set)" if relative is not None else "")
+            + (f", {entry['errors']:,} evaluation errors" if entry["errors"] else "")
+        )
+        for overlap in entry["overlaps"][:top]:
+            lines.append(
+                f"    overlaps {overlap['rule']}: {overlap['both']:,} events "
+                f"({overlap['share_of_hits']:.0%} of its hits, jaccard {overlap['jaccard']:.2f})"
+            )
+        if entry["sample_lines"]:
+            lines.append(f"    sample lines: {', '.join(map(str, entry['sample_lines']))}")
+    if not report["staged"]:
+        lines.append("No staged rules found")
+    return "\n".join(lines)
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Backtest staged rules against an archived event log")
+    parser.add_argument("archive", help="Event log, one JSON context per line (.jsonl or .jsonl.gz)")
+    parser.add_argument("--staging-dir", default=STAGING_DIR, help="Directory of staged rules")
+    parser.add_argument("--rules-dir", default=RULES_DIR, help="Directory of current rules")
+    parser.add_argument("--workers", "-w", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Events per work unit")
+    parser.add_argument("--top", type=int, default=5, help="Overlaps shown per staged rule")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    parser.add_argument("--output", "-o", help="Write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    staged = load_rule_dir(args.staging_dir)
+    current = load_rule_dir(args.rules_dir)
+    try:
+        report = run_backtest(args.archive, staged, current, workers=args.workers, chunk_size=args.chunk_size)
+    except OSError as e:
+        print(f"Error reading {args.archive}: {e}", file=sys.stderr)
+        return 1
+
+    output = json.dumps(report, indent=2) if args.format == "json" else format_report(report, args.top)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Any, Iterable, Iterator, List, Optional, Set, Tuple
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import time
+
+from condition_evaluator import ConditionEvaluator
+
+if TYPE_CHECKING:
+    from engine import Rule, RuleEngine
+
+NUMERIC_TYPES = "('integer', 'real', 'true', 'false')"
+# Keys usable in a quoted JSON path; digit-only keys may be list indexes in Python
+SAFE_KEY = re.compile(r"^(?!\d+$)[A-Za-z0-9_\- ]+$")
+COMPARISONS = {"gt": ">", "lt": "<", "ge": ">=", "le": "<="}
+
+class EventStore:
+    """
+    Local SQLite table of stored event contexts
+
+    events(id INTEGER PRIMARY KEY, event_id TEXT, context TEXT) with the context as
+    JSON. Field indexes are expression indexes on json_extract(context, path), created
+    on demand for the fields that compiled rules reference.
+    """
+
+    def __init__(self, path: str = ":memory:"):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY, event_id TEXT, context TEXT NOT NULL)"
+        )
+        self.conn.commit()
+        self.indexed: Set[str] = {
+            row[0] for row in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+
+    def add_events(self, contexts: Iterable[Dict[str, Any]], id_field: Optional[str] = "event.id",
+                   batch_size: int = 10000) -> int:
+        """Insert contexts in batched transactions; returns how many were stored"""
+        evaluator = ConditionEvaluator()
+        total = 0
+        batch: List[Tuple[Optional[str], str]] = []
+        for context in contexts:
+            event_id = evaluator._get_field_value(context, id_field) if id_field else None
+            batch.append((None if event_id is None else str(event_id), json.dumps(context, default=str)))
+            if len(batch) >= batch_size:
+                total += self._insert(batch)
+                batch = []
+        if batch:
+            total += self._insert(batch)
+        return total
+
+    def _insert(self, batch: List[Tuple[Optional[str], str]]) -> int:
+        with self.conn:
+            self.conn.executemany("INSERT INTO events (event_id, context) VALUES (?, ?)", batch)
+        return len(batch)
+
+    def load_jsonl(self, path: str, id_field: Optional[str] = "event.id", batch_size: int = 10000) -> int:
+        with open(path, 'r') as f:
+            return self.add_events((json.loads(line) for line in f if line.strip()), id_field, batch_size)
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def ensure_index(self, json_path: str) -> str:
+        name = "ix_events_" + hashlib.blake2b(json_path.encode("utf-8"), digest_size=8).hexdigest()
+        if name not in self.indexed:
+            with self.conn:
+                self.conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {name} ON events(json_extract(context, '{json_path}'))"
+                )
+            self.indexed.add(name)
+        return name
+
+    def close(self) -> None:
+        self.conn.close()
+
+@dataclass
+class CompiledConditions:
+    """SQL form of a condition tree; exact=False means sql is only a prefilter"""
+    sql: str
+    params: List[Any]
+    json_paths: Set[str]
+    exact: bool
+
+@dataclass
+class BulkReport:
+    """(event_id, rule_id) matches plus how each rule was evaluated"""
+    matches: List[Tuple[str, str]] = field(default_factory=list)
+    modes: Dict[str, str] = field(default_factory=dict)  # rule id -> sql | sql+python | python
+    rule_ms: Dict[str, float] = field(default_factory=dict)
+    python_ms: float = 0.0
+    events: int = 0
+    elapsed_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "matches": len(self.matches),
+            "modes": self.modes,
+            "rule_ms": self.rule_ms,
+            "python_ms": self.python_ms,
+            "events": self.events,
+            "elapsed_ms": self.elapsed_ms
+        }
+
+class SqlConditionCompiler:
+    """
+    Translates condition trees into SQLite WHERE clauses over events.context
+
+    Compiled operators: eq, ne, gt, lt, ge, le, in, contains, empty, not_empty, with
+    scalar values; anything else returns None and is evaluated in Python.
+
+    Every node compiles twice. The plain form treats a comparison that would raise
+    in Python (None > 5, 1 in "abc") as false; it is a necessary condition and keeps
+    top-level terms indexable. The exact form is three-valued (1, 0, NULL = raised)
+    and chains CASE expressions left to right, reproducing Python's short-circuit
+    "and"/"or" and the engine's rule-fails-on-error behaviour. json_type guards keep
+    SQL's loose typing from matching where Python would not (1 never equals "1").
+    """
+
+    def compile(self, conditions: Dict[str, Any]) -> Optional[CompiledConditions]:
+        """Compile a whole tree; at the top level, an "and" whose children only partly
+        compile yields an inexact prefilter from the compilable children"""
+        if not conditions:
+            return CompiledConditions("1", [], set(), True)
+        node = self._node(conditions)
+        if node is not None:
+            plain, plain_params, exact, exact_params, paths = node
+            return CompiledConditions(f"({plain}) AND ({exact}) = 1", plain_params + exact_params, paths, True)
+        if conditions.get("operator", "and").lower() != "and":
+            return None
+
+        parts = [self._node(child) for child in conditions.get("conditions", [])]
+        parts = [part for part in parts if part is not None]
+        if not parts:
+            return None
+        return CompiledConditions(
+            " AND ".join(f"({part[0]})" for part in parts),
+            [param for part in parts for param in part[1]],
+            set().union(*(part[4] for part in parts)),
+            False
+        )
+
+    def _node(self, node: Dict[str, Any]) -> Optional[Tuple[str, List[Any], str, List[Any], Set[str]]]:
+        """(plain sql, params, exact sql, params, json paths) or None"""
+        if "conditions" in node:
+            operator_type = node.get("operator", "and").lower()
+            if operator_type not in ("and", "or"):
+                return None
+            children = [self._node(child) for child in node.get("conditions", [])]
+            if any(child is None for child in children):
+                return None
+            if not children:
+                constant = "1" if operator_type == "and" else "0"
+                return constant, [], constant, [], set()
+
+            joiner = " AND " if operator_type == "and" else " OR "
+            plain = joiner.join(f"({child[0]})" for child in children)
+            # and: CASE c1 WHEN 1 THEN <rest> WHEN 0 THEN 0 END; or mirrors it.
+            # A NULL child matches no WHEN and propagates as NULL.
+            exact, exact_params = ("1", []) if operator_type == "and" else ("0", [])
+            for child in reversed(children):
+                if operator_type == "and":
+                    exact = f"CASE {child[2]} WHEN 1 THEN {exact} WHEN 0 THEN 0 END"
+                else:
+                    exact = f"CASE {child[2]} WHEN 1 THEN 1 WHEN 0 THEN {exact} END"
+                exact_params = child[3] + exact_params
+            return (
+                plain,
+                [param for child in children for param in child[1]],
+                exact,
+                exact_params,
+                set().union(*(child[4] for child in children))
+            )
+        if not node:
+            return "1", [], "1", [], set()
+        return self._leaf(node)
+
+    @staticmethod
+    def json_path(field_path: str) -> Optional[str]:
+        keys = field_path.split('.')
+        if not all(SAFE_KEY.match(key) for key in keys):
+            return None
+        return "$." + ".".join(f'"{key}"' for key in keys)
+
+    def _leaf(self, condition: Dict[str, Any]) -> Optional[Tuple[str, List[Any], str, List[Any], Set[str]]]:
+        field_path = condition.get("field")
+        operator_name = condition.get("operator")
+        if not field_path or not operator_name or "value_file" in condition:
+            return None
+        path = self.json_path(field_path)
+        if path is None:
+            return None
+        x = f"json_extract(context, '{path}')"
+        t = f"json_type(context, '{path}')"
+
+        compiled = self._operator(operator_name, condition.get("value"), x, t, path)
+        if compiled is None:
+            return None
+        sql, params, guard = compiled
+        if guard is None:
+            exact = f"IFNULL(({sql}), 0)"
+        else:
+            # guard false or NULL: Python would raise TypeError
+            exact = f"CASE WHEN {guard} THEN IFNULL(({sql}), 0) END"
+        return sql, params, exact, list(params), {path}
+
+    def _operator(self, name: str, value: Any, x: str, t: str,
+                  path: str) -> Optional[Tuple[str, List[Any], Optional[str]]]:
+        """(sql, params, guard under which Python does not raise, None if it never does)"""
+        if name == "eq":
+            return self._eq(value, x, t)
+        if name == "ne":
+            eq = self._eq(value, x, t)
+            return None if eq is None else (f"NOT IFNULL(({eq[0]}), 0)", eq[1], None)
+        if name in COMPARISONS:
+            op = COMPARISONS[name]
+            if _is_number(value):
+                guard = f"{t} IN {NUMERIC_TYPES}"
+            elif isinstance(value, str):
+                guard = f"{t} = 'text'"
+            else:
+                return None
+            return f"{x} {op} ? AND {guard}", [value], guard
+        if name == "in":
+            return self._in(value, x, t)
+        if name == "contains":
+            return self._contains(value, x, t, path)
+        if name in ("empty", "not_empty"):
+            empty = (
+                f"{x} IS NULL OR ({t} = 'text' AND {x} = '') "
+                f"OR ({t} IN ('integer', 'real', 'false') AND {x} = 0) "
+                f"OR ({t} = 'array' AND json_array_length(context, '{path}') = 0) "
+                f"OR ({t} = 'object' AND {x} = '{{}}')"
+            )
+            return (empty, [], None) if name == "empty" else (f"NOT IFNULL(({empty}), 0)", [], None)
+        return None
+
+    @staticmethod
+    def _eq(value: Any, x: str, t: str) -> Optional[Tuple[str, List[Any], Optional[str]]]:
+        if value is None:
+            return f"{x} IS NULL", [], None
+        if isinstance(value, str):
+            return f"{x} = ? AND {t} = 'text'", [value], None
+        if _is_number(value):
+            return f"{x} = ? AND {t} IN {NUMERIC_TYPES}", [value], None
+        return None
+
+    @staticmethod
+    def _in(value: Any, x: str, t: str) -> Optional[Tuple[str, List[Any], Optional[str]]]:
+        if isinstance(value, str):
+            return f"{t} = 'text' AND instr(?, {x}) > 0", [value], f"{t} = 'text'"
+        if not isinstance(value, (list, tuple, set, frozenset)):
+            return None
+        strings = [item for item in value if isinstance(item, str)]
+        numbers = [item for item in value if _is_number(item)]
+        has_none = any(item is None for item in value)
+        if len(strings) + len(numbers) + has_none != len(value):
+            return None
+        clauses, params = [], []
+        if strings:
+            clauses.append(f"({x} IN ({', '.join('?' * len(strings))}) AND {t} = 'text')")
+            params.extend(strings)
+        if numbers:
+            clauses.append(f"({x} IN ({', '.join('?' * len(numbers))}) AND {t} IN {NUMERIC_TYPES})")
+            params.extend(numbers)
+        if has_none:
+            clauses.append(f"{x} IS NULL")
+        return (" OR ".join(clauses) or "0"), params, None
+
+    @staticmethod
+    def _contains(value: Any, x: str, t: str, path: str) -> Optional[Tuple[str, List[Any], Optional[str]]]:
+        each = f"SELECT 1 FROM json_each(context, '{path}')"
+        if isinstance(value, str):
+            return (
+                f"CASE {t} WHEN 'text' THEN instr({x}, ?) > 0 "
+                f"WHEN 'array' THEN EXISTS({each} WHERE type = 'text' AND value = ?) "
+                f"WHEN 'object' THEN EXISTS({each} WHERE key = ?) ELSE 0 END",
+                [value, value, value],
+                f"{t} IN ('text', 'array', 'object')"
+            )
+        if _is_number(value):
+            return (
+                f"CASE {t} WHEN 'array' THEN EXISTS({each} WHERE type IN {NUMERIC_TYPES} AND value = ?) ELSE 0 END",
+                [value],
+                f"{t} IN ('array', 'object')"
+            )
+        return None
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+class BulkEvaluator:
+    """
+    Set-oriented rule evaluation over an EventStore, for backfills
+
+    Each rule whose conditions compile runs as one indexed query over the whole table.
+    Rules with a compilable top-level "and" prefix use it as an SQL prefilter and are
+    confirmed in Python on the surviving rows. All remaining rules share a single
+    Python pass over the table. Rule table rows are evaluated as rules whose
+    conditions also require their key_fields values.
+
+    Only conditions are evaluated: no actions run and windowed aggregates are not
+    updated, since both depend on live event order.
+    """
+
+    def __init__(self, store: EventStore, evaluator: Optional[ConditionEvaluator] = None,
+                 fetch_size: int = 10000):
+        self.store = store
+        self.evaluator = evaluator or ConditionEvaluator()
+        self.compiler = SqlConditionCompiler()
+        self.fetch_size = fetch_size
+        self.logger = logging.getLogger("BulkEvaluator")
+
+    def plan(self, rules: Iterable["Rule"]) -> Dict[str, str]:
+        """How each rule would be evaluated: sql, sql+python or python"""
+        modes = {}
+        for rule in rules:
+            compiled = self.compiler.compile(rule.conditions)
+            modes[rule.id] = "python" if compiled is None else ("sql" if compiled.exact else "sql+python")
+        return modes
+
+    def evaluate(self, rules: Iterable["Rule"]) -> BulkReport:
+        report = BulkReport()
+        started = time.monotonic()
+        report.events = self.store.count()
+        python_rules: List["Rule"] = []
+
+        for rule in rules:
+            compiled = self.compiler.compile(rule.conditions)
+            if compiled is None:
+                python_rules.append(rule)
+                report.modes[rule.id] = "python"
+                continue
+            rule_started = time.monotonic()
+            for json_path in compiled.json_paths:
+                self.store.ensure_index(json_path)
+            report.modes[rule.id] = "sql" if compiled.exact else "sql+python"
+            self._run_compiled(rule, compiled, report.matches)
+            report.rule_ms[rule.id] = (time.monotonic() - rule_started) * 1000.0
+
+        if python_rules:
+            python_started = time.monotonic()
+            self._run_python(python_rules, report.matches)
+            report.python_ms = (time.monotonic() - python_started) * 1000.0
+
+        report.elapsed_ms = (time.monotonic() - started) * 1000.0
+        self.logger.info(
+            f"Bulk evaluation: {len(report.modes)} rules over {report.events} events, "
+            f"{len(report.matches)} matches in {report.elapsed_ms:.1f}ms "
+            f"({len(python_rules)} rules in Python)"
+        )
+        return report
+
+    def evaluate_engine(self, engine: "RuleEngine") -> BulkReport:
+        """Evaluate the engine's active rules and active rule table rows"""
+        snapshot = engine.snapshot()
+        return self.evaluate(list(snapshot.active_rules) + list(self._table_rules(snapshot.active_tables)))
+
+    @staticmethod
+    def _table_rules(tables) -> Iterator["Rule"]:
+        from engine import Rule
+
+        for table in tables:
+            for row_id in table.row_ids:
+                rule = table.row_rule(row_id)
+                row = table.rows[table.rows_by_id[row_id]]
+                keys = [
+                    {"field": table.key_fields[param], "operator": "eq", "value": row.get(param)}
+                    for param in table.params
+                ]
+                conditions = {"operator": "and", "conditions": keys + ([rule.conditions] if rule.conditions else [])}
+                yield Rule(**dict(rule.__dict__, conditions=conditions))
+
+    def _run_compiled(self, rule: "Rule", compiled: CompiledConditions, matches: List[Tuple[str, str]]) -> None:
+        columns = "id, event_id" if compiled.exact else "id, event_id, context"
+        cursor = self.store.conn.execute(
+            f"SELECT {columns} FROM events WHERE {compiled.sql} ORDER BY id", compiled.params
+        )
+        while True:
+            rows = cursor.fetchmany(self.fetch_size)
+            if not rows:
+                break
+            if compiled.exact:
+                matches.extend((event_id or str(row_id), rule.id) for row_id, event_id in rows)
+                continue
+            for row_id, event_id, context in rows:
+                if self._matches(rule, json.loads(context)):
+                    matches.append((event_id or str(row_id), rule.id))
+
+    def _run_python(self, rules: List["Rule"], matches: List[Tuple[str, str]]) -> None:
+        cursor = self.store.conn.execute("SELECT id, event_id, context FROM events ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(self.fetch_size)
+            if not rows:
+                break
+            for row_id, event_id, context in rows:
+                context = json.loads(context)
+                for rule in rules:
+                    if self._matches(rule, context):
+                        matches.append((event_id or str(row_id), rule.id))
+
+    def _matches(self, rule: "Rule", context: Dict[str, Any]) -> bool:
+        try:
+            return self.evaluator.evaluate(rule.conditions, context)
+        except Exception:
+            # Same outcome as RuleEngine.evaluate_rules: a failing rule does not match
+            return False
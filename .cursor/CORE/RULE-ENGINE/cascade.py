@@ -0,0 +1,156 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Any, Deque, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import logging
+import threading
+import time
+
+if TYPE_CHECKING:
+    from engine import RuleEngine
+
+@dataclass
+class CascadeReport:
+    """Outcome and timing of one forward-chaining cascade"""
+    results: List[Dict[str, Any]] = field(default_factory=list)  # per-event rule results, in processing order
+    events_processed: int = 0
+    max_depth_reached: int = 0
+    cycles: List[Dict[str, Any]] = field(default_factory=list)
+    duplicates: int = 0
+    depth_limited: List[Dict[str, Any]] = field(default_factory=list)
+    truncated: bool = False
+    elapsed_ms: float = 0.0
+    per_depth_ms: Dict[int, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "results": self.results,
+            "events_processed": self.events_processed,
+            "max_depth_reached": self.max_depth_reached,
+            "cycles": self.cycles,
+            "duplicates": self.duplicates,
+            "depth_limited": self.depth_limited,
+            "truncated": self.truncated,
+            "elapsed_ms": self.elapsed_ms,
+            "per_depth_ms": self.per_depth_ms
+        }
+
+class CascadeScheduler:
+    """
+    Runs rule cascades to a fixpoint with an explicit worklist
+
+    Events published by actions (publish_event) during evaluation are collected on the
+    current thread and queued as derived events, breadth first. Each derived event is
+    identified by a signature (type + canonical payload) and by its origin (type +
+    id of the rule that published it):
+      - an origin or signature already present in its own ancestry is a cycle and is
+        dropped; origins catch self-triggering rules whose payloads differ on every
+        hop (timestamps, counters), which signatures alone would miss
+      - a signature already processed in this cascade is a duplicate and is dropped
+      - events deeper than max_depth are dropped
+    max_events bounds the total work of one cascade. Nothing recurses, so long chains
+    cannot exhaust the stack.
+    """
+
+    def __init__(self, engine: "RuleEngine", max_depth: int = 8, max_events: int = 10000):
+        self.engine = engine
+        self.max_depth = max_depth
+        self.max_events = max_events
+        self.logger = logging.getLogger("RuleEngine")
+        self._local = threading.local()
+
+    def collect(self, event_type: str, payload: Dict[str, Any]) -> None:
+        """Event sink for ActionExecutor.publish_event; a no-op outside a cascade"""
+        pending = getattr(self._local, "pending", None)
+        if pending is not None:
+            pending.append((event_type, payload, getattr(self._local, "rule", None)))
+
+    @contextmanager
+    def publishing(self, rule_id: str) -> Iterator[None]:
+        """Attribute events collected in this block to rule_id"""
+        outer = getattr(self._local, "rule", None)
+        self._local.rule = rule_id
+        try:
+            yield
+        finally:
+            self._local.rule = outer
+
+    @staticmethod
+    def signature(event_type: str, payload: Any) -> str:
+        encoded = json.dumps([event_type, payload], sort_keys=True, default=str)
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+    def derived_context(self, event_type: str, payload: Dict[str, Any], depth: int, parent: str) -> Dict[str, Any]:
+        return {
+            "event": {
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "source": "cascade",
+                "depth": depth,
+                "parent": parent
+            },
+            "payload": payload
+        }
+
+    def run(self, context: Dict[str, Any]) -> CascadeReport:
+        """Evaluate context and every event derived from it until nothing new is published"""
+        report = CascadeReport()
+        started = time.monotonic()
+        root_type = context.get("event", {}).get("type")
+        # (context, depth, ancestry signatures and origins)
+        worklist: Deque[Tuple[Dict[str, Any], int, Tuple[str, ...]]] = deque([(context, 0, ())])
+        seen = set()
+
+        outer = getattr(self._local, "pending", None)
+        try:
+            while worklist:
+                if report.events_processed >= self.max_events:
+                    report.truncated = True
+                    self.logger.warning(
+                        f"Cascade from {root_type} stopped after {self.max_events} events, "
+                        f"{len(worklist)} left unprocessed"
+                    )
+                    break
+
+                current, depth, ancestry = worklist.popleft()
+                self._local.pending = []
+                event_started = time.monotonic()
+                results = self.engine.evaluate_rules(current)
+                report.per_depth_ms[depth] = report.per_depth_ms.get(depth, 0.0) + (time.monotonic() - event_started) * 1000.0
+                report.events_processed += 1
+                report.max_depth_reached = max(report.max_depth_reached, depth)
+                report.results.append({
+                    "event_type": current.get("event", {}).get("type"),
+                    "depth": depth,
+                    "rules": results
+                })
+
+                parent_type = current.get("event", {}).get("type")
+                for event_type, payload, rule_id in self._local.pending:
+                    sig = self.signature(event_type, payload)
+                    origin = f"{event_type}\x00{rule_id}" if rule_id is not None else None
+                    if sig in ancestry or (origin is not None and origin in ancestry):
+                        report.cycles.append({"event_type": event_type, "rule_id": rule_id, "depth": depth + 1})
+                        continue
+                    if sig in seen:
+                        report.duplicates += 1
+                        continue
+                    if depth + 1 > self.max_depth:
+                        report.depth_limited.append({"event_type": event_type, "depth": depth + 1})
+                        continue
+                    seen.add(sig)
+                    derived = self.derived_context(event_type, payload, depth + 1, parent_type)
+                    worklist.append((derived, depth + 1, ancestry + ((sig, origin) if origin else (sig,))))
+        finally:
+            self._local.pending = outer
+
+        report.elapsed_ms = (time.monotonic() - started) * 1000.0
+        if report.cycles or report.depth_limited or report.truncated:
+            self.logger.warning(
+                f"Cascade from {root_type}: {report.events_processed} events in {report.elapsed_ms:.1f}ms, "
+                f"{len(report.cycles)} cycles, {len(report.depth_limited)} over depth limit"
+            )
+        return report
@@ -1,9 +1,14 @@
-from typing import Dict, Any, List, Callable
+from typing import Dict, Any, List, Callable, Set
 import operator
 import re
+from lookup_sets import LookupSetRegistry, default_registry
+from path_index import extension_in, path_glob, path_under
+from lazy_fields import resolve_lazy
+from content_inspection import file_contains, file_matches, python_imports
 
 class ConditionEvaluator:
-    def __init__(self):
+    def __init__(self, lookup_sets: LookupSetRegistry = None):
+        self.lookup_sets = lookup_sets or default_registry
         self.operators = {
             "eq": operator.eq,
             "ne": operator.ne,
@@ -20,7 +25,16 @@ class ConditionEvaluator:
             "type": lambda x, y: isinstance(x, eval(y)),
             "length": lambda x, y: len(x) == y,
             "empty": lambda x, _: not bool(x),
-            "not_empty": lambda x, _: bool(x)
+            "not_empty": lambda x, _: bool(x),
+            "path_under": path_under,
+            "path_glob": path_glob,
+            "extension_in": extension_in
+        }
+        # Operators that also receive the event context (for per-event shared caches)
+        self.context_operators = {
+            "file_contains": file_contains,
+            "file_matches": file_matches,
+            "python_imports": python_imports
         }
 
     def evaluate(self, conditions: Dict[str, Any], context: Dict[str, Any]) -> bool:
@@ -33,9 +47,17 @@ class ConditionEvaluator:
             "conditions": [
                 {
                     "field": "path.to.field",
-                    "operator": "eq|ne|gt|lt|ge|le|in|not_in|contains|not_contains|matches|not_matches|type|length|empty|not_empty",
+                    "operator": "eq|ne|gt|lt|ge|le|in|not_in|contains|not_contains|matches|not_matches|type|length|empty|not_empty|path_under|path_glob|extension_in|file_contains|file_matches|python_imports",
                     "value": any
                 },
+                {
+                    "field": "path.to.field",
+                    "operator": "in|not_in",
+                    "value_file": "path/to/list.txt",  # external lookup set instead of "value"
+                    "file_format": "text|csv",          # optional, default text
+                    "column": 0,                        # optional, csv column
+                    "index": "set|sorted"               # optional, sorted = mmap + bisect
+                },
                 {
                     "operator": "and|or",
                     "conditions": [...] # nested conditions
@@ -69,10 +91,27 @@ class ConditionEvaluator:
         if not field or not operator_name:
             raise ValueError("Invalid condition format: missing field or operator")
 
+        if "value_file" in condition:
+            if operator_name not in ("in", "not_in"):
+                raise ValueError(f"value_file is only supported for in/not_in, not {operator_name}")
+            expected_value = self.lookup_sets.get(
+                condition["value_file"],
+                file_format=condition.get("file_format", "text"),
+                column=condition.get("column", 0),
+                index=condition.get("index", "set")
+            )
+
         # Get actual value from context using dot notation
         actual_value = self._get_field_value(context, field)
         
         # Get operator function
+        context_func = self.context_operators.get(operator_name)
+        if context_func:
+            try:
+                return context_func(actual_value, expected_value, context)
+            except Exception as e:
+                raise ValueError(f"Error evaluating condition: {str(e)}")
+
         operator_func = self.operators.get(operator_name)
         if not operator_func:
             raise ValueError(f"Unknown operator: {operator_name}")
@@ -82,9 +121,23 @@ class ConditionEvaluator:
         except Exception as e:
             raise ValueError(f"Error evaluating condition: {str(e)}")
 
+    def referenced_fields(self, conditions: Dict[str, Any], operators: Set[str] = None) -> Set[str]:
+        """Collect every field path read by a (possibly nested) condition tree,
+        optionally only those compared with one of the given operators"""
+        fields: Set[str] = set()
+        stack = [conditions] if conditions else []
+        while stack:
+            node = stack.pop()
+            if "conditions" in node:
+                stack.extend(node.get("conditions", []))
+            elif node.get("field") and (operators is None or node.get("operator") in operators):
+                fields.add(node["field"])
+        return fields
+
     def _get_field_value(self, data: Dict[str, Any], field_path: str) -> Any:
-        """Get a value from a nested dictionary using dot notation"""
-        current = data
+        """Get a value from a nested dictionary using dot notation, computing any
+        LazyField met along the way"""
+        current = resolve_lazy(data)
         for key in field_path.split('.'):
             if isinstance(current, dict):
                 if key in current:
@@ -99,4 +152,5 @@ class ConditionEvaluator:
                     return None
             else:
                 return None
+            current = resolve_lazy(current)
         return current 
\ No newline at end of file
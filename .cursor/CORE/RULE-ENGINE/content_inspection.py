@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Any, Iterator, Optional, Pattern, Set, Union
+import ast
+import mmap
+import os
+import re
+import threading
+
+ARTIFACTS_KEY = "_artifacts"
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+MMAP_THRESHOLD = 1024 * 1024
+BINARY_SAMPLE = 8192
+
+Content = Union[bytes, mmap.mmap]
+
+class FileArtifacts:
+    """
+    Per-event cache of file contents and parsed ASTs
+
+    Stored in the event context under "_artifacts" the first time a content operator
+    needs it, so every rule inspecting the same file during one event shares a single
+    read (mmap for large files) and a single parse. RuleEngine wraps each evaluation
+    in scoped_artifacts, which closes the cache when the evaluation ends. Files over max_bytes and binary
+    files (NUL byte in the first 8 KiB) are never inspected.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, mmap_threshold: int = MMAP_THRESHOLD):
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._content: Dict[str, Optional[Content]] = {}
+        self._imports: Dict[str, Optional[Set[str]]] = {}
+        self._lock = threading.Lock()
+
+    def content(self, path: str) -> Optional[Content]:
+        """File bytes, or None when missing, too large or binary"""
+        if path not in self._content:
+            with self._lock:
+                if path not in self._content:
+                    self._content[path] = self._read(path)
+        return self._content[path]
+
+    def _read(self, path: str) -> Optional[Content]:
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size > self.max_bytes:
+                    return None
+                if size >= self.mmap_threshold:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    data = f.read()
+        except (OSError, ValueError):
+            return None
+        if b"\x00" in data[:BINARY_SAMPLE]:
+            if isinstance(data, mmap.mmap):
+                data.close()
+            return None
+        return data
+
+    def python_imports(self, path: str) -> Optional[Set[str]]:
+        """Module names imported by a Python file, including every dotted prefix"""
+        if path not in self._imports:
+            content = self.content(path)
+            imports = None
+            if content is not None:
+                try:
+                    imports = _collect_imports(ast.parse(bytes(content), filename=path))
+                except (SyntaxError, ValueError):
+                    imports = None
+            with self._lock:
+                self._imports.setdefault(path, imports)
+        return self._imports[path]
+
+    def close(self) -> None:
+        with self._lock:
+            for content in self._content.values():
+                if isinstance(content, mmap.mmap):
+                    content.close()
+            self._content.clear()
+            self._imports.clear()
+
+def _collect_imports(tree: ast.AST) -> Set[str]:
+    names: Set[str] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules = [node.module]
+        else:
+            continue
+        for module in modules:
+            parts = module.split('.')
+            for i in range(1, len(parts) + 1):
+                names.add('.'.join(parts[:i]))
+    return names
+
+def artifacts_for(context: Dict[str, Any]) -> FileArtifacts:
+    """Return (creating if needed) the per-event artifact cache stored in context"""
+    artifacts = context.get(ARTIFACTS_KEY)
+    if not isinstance(artifacts, FileArtifacts):
+        artifacts = context.setdefault(ARTIFACTS_KEY, FileArtifacts())
+    return artifacts
+
+@contextmanager
+def scoped_artifacts(context: Dict[str, Any]) -> Iterator[None]:
+    """Limit the artifact cache to one evaluation: a cache created inside the block is
+    removed from context and closed (unmapping large files) on exit, so a reused
+    context never sees stale contents. A cache already in context belongs to an
+    enclosing evaluation and is left to it."""
+    owned = ARTIFACTS_KEY not in context
+    try:
+        yield
+    finally:
+        if owned:
+            artifacts = context.pop(ARTIFACTS_KEY, None)
+            if isinstance(artifacts, FileArtifacts):
+                artifacts.close()
+
+@lru_cache(maxsize=1024)
+def _compile_bytes(pattern: str) -> Pattern:
+    return re.compile(pattern.encode('utf-8'), re.MULTILINE)
+
+def _as_list(value: Any):
+    return [value] if isinstance(value, str) else list(value or [])
+
+def file_contains(path: Any, needles: Any, context: Dict[str, Any]) -> bool:
+    """True if the file contains any of the given substrings"""
+    if not isinstance(path, str):
+        return False
+    content = artifacts_for(context).content(path)
+    if content is None:
+        return False
+    return any(content.find(needle.encode('utf-8')) != -1 for needle in _as_list(needles))
+
+def file_matches(path: Any, patterns: Any, context: Dict[str, Any]) -> bool:
+    """True if any regex (searched in multiline mode) matches the file content"""
+    if not isinstance(path, str):
+        return False
+    content = artifacts_for(context).content(path)
+    if content is None:
+        return False
+    return any(_compile_bytes(pattern).search(content) for pattern in _as_list(patterns))
+
+def python_imports(path: Any, modules: Any, context: Dict[str, Any]) -> bool:
+    """True if the Python file imports any of the modules (or a submodule of one)"""
+    if not isinstance(path, str):
+        return False
+    imports = artifacts_for(context).python_imports(path)
+    if not imports:
+        return False
+    return any(module in imports for module in _as_list(modules))
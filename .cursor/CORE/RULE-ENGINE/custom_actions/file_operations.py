@@ -1,7 +1,8 @@
 import os
 import shutil
+import logging
 from typing import Dict, Any
-from ..action_executor import action
+from action_executor import action
 
 @action("backup_file")
 def backup_file(context: Dict[str, Any], source_path: str, backup_dir: str = "backups") -> Dict[str, Any]:
@@ -1,9 +1,31 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Optional, Union
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, Optional, Set, Tuple, Union
 from dataclasses import dataclass
 from datetime import datetime
 import logging
+from condition_evaluator import ConditionEvaluator
+from result_cache import ResultCache
+from evaluation_strategy import EvaluationOutcome, EvaluationStrategy
+from rule_analyzer import AnalysisReport, RuleAnalyzer
+from rule_tables import RuleTable
+from path_index import PathIndex
+from lazy_fields import LazyField, resolve_lazy
+from content_inspection import scoped_artifacts
+from action_executor import ActionCall, ActionExecutor
+from variable_resolver import VariableResolver
+from cascade import CascadeReport, CascadeScheduler
+from windowed_aggregates import AggregateRegistry
+from bulk_evaluation import BulkEvaluator, BulkReport, EventStore
+from action_outbox import INLINE_ACTIONS, ActionOutbox
+from action_stage import ActionStage
 
 @dataclass
 class Rule:
@@ -20,12 +42,241 @@ class Rule:
     actions: Dict[str, any]
     metadata: Dict[str, any]
 
+@dataclass(frozen=True)
+class RuleSetSnapshot:
+    """Immutable, versioned view of the rule set used for evaluation"""
+    version: int
+    rules: Mapping[str, Rule]
+    active_rules: Tuple[Rule, ...]
+    positions: Mapping[str, int]
+    rule_fields: Mapping[str, FrozenSet[str]]
+    field_index: Mapping[str, FrozenSet[str]]
+    prefix_index: Mapping[str, FrozenSet[str]]
+    referenced_fields: Tuple[str, ...]
+    content_fields: Tuple[str, ...]
+    tables: Mapping[str, RuleTable]
+    active_tables: Tuple[RuleTable, ...]
+    path_index: PathIndex
+    ungated_rules: Tuple[Rule, ...]
+
+    @classmethod
+    def build(cls, version: int, rules: Dict[str, Rule], evaluator: ConditionEvaluator,
+              tables: Optional[Dict[str, RuleTable]] = None) -> "RuleSetSnapshot":
+        """Compile a snapshot from a rule dict, pre-sorting active rules by priority
+        and indexing which context fields each active rule reads"""
+        tables = tables or {}
+        active = sorted(
+            (rule for rule in rules.values() if rule.is_active),
+            key=lambda x: x.priority,
+            reverse=True
+        )
+
+        rule_fields: Dict[str, FrozenSet[str]] = {}
+        field_index: Dict[str, Set[str]] = {}
+        prefix_index: Dict[str, Set[str]] = {}
+        path_index = PathIndex()
+        for rule in active:
+            gate = PathIndex.gate_of(rule.conditions)
+            if gate is not None:
+                path_index.add(rule.id, gate)
+            fields = frozenset(evaluator.referenced_fields(rule.conditions))
+            rule_fields[rule.id] = fields
+            for field in fields:
+                field_index.setdefault(field, set()).add(rule.id)
+                # Register under every ancestor so a change to "file" reaches "file.size"
+                parts = field.split('.')
+                for i in range(1, len(parts)):
+                    prefix_index.setdefault('.'.join(parts[:i]), set()).add(rule.id)
+
+        active_tables = sorted(
+            (table for table in tables.values() if table.is_active),
+            key=lambda x: x.priority,
+            reverse=True
+        )
+        referenced = set(field_index)
+        for table in active_tables:
+            referenced |= table.referenced_fields(evaluator)
+
+        # Fields holding paths whose file content some rule inspects
+        content_ops = set(evaluator.context_operators)
+        content_fields: Set[str] = set()
+        for rule in active:
+            content_fields |= evaluator.referenced_fields(rule.conditions, content_ops)
+        for table in active_tables:
+            content_fields |= evaluator.referenced_fields(table.conditions, content_ops)
+
+        return cls(
+            version=version,
+            rules=MappingProxyType(dict(rules)),
+            active_rules=tuple(active),
+            positions=MappingProxyType({rule.id: i for i, rule in enumerate(active)}),
+            rule_fields=MappingProxyType(rule_fields),
+            field_index=MappingProxyType({k: frozenset(v) for k, v in field_index.items()}),
+            prefix_index=MappingProxyType({k: frozenset(v) for k, v in prefix_index.items()}),
+            referenced_fields=tuple(sorted(referenced)),
+            content_fields=tuple(sorted(content_fields)),
+            tables=MappingProxyType(dict(tables)),
+            active_tables=tuple(active_tables),
+            path_index=path_index,
+            ungated_rules=tuple(rule for rule in active if rule.id not in path_index.gated)
+        )
+
+    def route(self, context: Dict[str, any], evaluator: ConditionEvaluator) -> Iterable[Rule]:
+        """Active rules that could match context, in priority order. Rules gated by a
+        path operator are only included when the path index says the gate passes."""
+        if not self.path_index.gated:
+            return self.active_rules
+        passed = self.path_index.lookup(context, evaluator._get_field_value)
+        gated = [self.rules[rule_id] for rule_id in sorted(passed, key=self.positions.__getitem__)]
+        return heapq.merge(self.ungated_rules, gated, key=lambda x: self.positions[x.id])
+
+    def table_matches(self, context: Dict[str, any], evaluator: ConditionEvaluator) -> List[Rule]:
+        """Row rules of all active rule tables matching context, highest priority first"""
+        hits: List[Rule] = []
+        for table in self.active_tables:
+            try:
+                hits.extend(table.match(context, evaluator))
+            except Exception as e:
+                logging.getLogger("RuleEngine").error(f"Error matching rule table {table.id}: {str(e)}")
+        return hits
+
+    def candidates(self, context: Dict[str, any], evaluator: ConditionEvaluator) -> Iterator[Tuple[Rule, bool]]:
+        """Yield (rule, already_matched) in priority order, merging plain rules (still to
+        be evaluated) with table rows already matched by index lookup"""
+        hits = self.table_matches(context, evaluator) if self.active_tables else []
+        position = 0
+        for rule in self.route(context, evaluator):
+            while position < len(hits) and hits[position].priority > rule.priority:
+                yield hits[position], True
+                position += 1
+            yield rule, False
+        for hit in hits[position:]:
+            yield hit, True
+
+    def lookup(self, rule_id: str) -> Rule:
+        """Resolve a plain rule id or a "<table id>:<row id>" table row id"""
+        rule = self.rules.get(rule_id)
+        if rule is not None:
+            return rule
+        table_id, _, row_id = rule_id.partition(':')
+        return self.tables[table_id].row_rule(row_id)
+
+    def rules_reading(self, changed_paths: Iterable[str]) -> Set[str]:
+        """Return ids of active rules whose inputs overlap any of the changed paths"""
+        affected: Set[str] = set()
+        for path in changed_paths:
+            affected.update(self.prefix_index.get(path, ()))
+            parts = path.split('.')
+            for i in range(1, len(parts) + 1):
+                affected.update(self.field_index.get('.'.join(parts[:i]), ()))
+        return affected
+
+def _fingerprint_default(value: any) -> any:
+    """JSON fallback for fingerprints: lazy fields by their cheap identity (see
+    LazyField.fingerprint), repr anything else"""
+    if isinstance(value, LazyField):
+        return value.fingerprint()
+    return repr(value)
+
 class RuleEngine:
-    def __init__(self, rules_dir: str = ".cursor/CORE/RULE-ENGINE/rules"):
+    def __init__(self, rules_dir: str = ".cursor/CORE/RULE-ENGINE/rules", max_delta_contexts: int = 1024,
+                 result_cache_size: int = 0, tables_dir: str = ".cursor/CORE/RULE-ENGINE/rule_tables",
+                 action_executor: Optional[ActionExecutor] = None, max_cascade_depth: int = 8,
+                 aggregates_dir: str = ".cursor/CORE/RULE-ENGINE/aggregates",
+                 action_outbox: Optional[ActionOutbox] = None, action_stage: Optional[ActionStage] = None):
         self.rules_dir = rules_dir
-        self.rules: Dict[str, Rule] = {}
+        self.tables_dir = tables_dir
+        self.aggregates_dir = aggregates_dir
+        self.condition_evaluator = ConditionEvaluator()
+        # Sliding-window aggregates, updated once per incoming event
+        self.aggregates = AggregateRegistry(self.condition_evaluator)
+        self.variable_resolver = VariableResolver()
+        self.action_executor = action_executor or ActionExecutor()
+        # Events published by actions are routed to the cascade scheduler
+        self.cascade = CascadeScheduler(self, max_depth=max_cascade_depth)
+        self.action_executor.event_sink = self.cascade.collect
+        # With an outbox, side-effecting actions are journaled and run asynchronously
+        self.action_outbox = action_outbox
+        # Without an outbox, a started ActionStage runs them on its worker pool instead
+        self.action_stage = action_stage
+        # Optional whole-evaluation cache; 0 disables it
+        self.result_cache: Optional[ResultCache] = ResultCache(result_cache_size) if result_cache_size > 0 else None
+        self._write_lock = threading.Lock()
+        self._snapshot = RuleSetSnapshot.build(0, {}, self.condition_evaluator)
+        # Rules as loaded and edited; the published snapshot may hold a minimized copy
+        self._source_rules: Dict[str, Rule] = {}
+        # (drop_shadowed, drop_duplicates) once minimize_rules(apply=True) was called
+        self._minimize_options: Optional[Tuple[bool, bool]] = None
+        # id(context) -> (context, snapshot version, ids of rules currently true) for evaluate_delta
+        self.max_delta_contexts = max_delta_contexts
+        self._delta_states: "OrderedDict[int, Tuple[Dict[str, any], int, Set[str]]]" = OrderedDict()
+        self._delta_lock = threading.Lock()
         self.logger = self._setup_logger()
         self._load_rules()
+        self._load_aggregates()
+
+    @property
+    def rules(self) -> Mapping[str, Rule]:
+        """Read-only mapping of the current rule set"""
+        return self._snapshot.rules
+
+    def snapshot(self) -> RuleSetSnapshot:
+        """Return the current rule set snapshot (lock-free)"""
+        return self._snapshot
+
+    def _publish(self, rules: Dict[str, Rule], tables: Optional[Dict[str, RuleTable]] = None) -> RuleSetSnapshot:
+        """Swap in a new snapshot built from rules (and tables, if given; otherwise the
+        current tables are kept), minimized again if minimization was applied. Callers
+        must hold _write_lock."""
+        if tables is None:
+            tables = dict(self._snapshot.tables)
+        self._source_rules = rules
+        if self._minimize_options is not None:
+            drop_shadowed, drop_duplicates = self._minimize_options
+            rules, _ = RuleAnalyzer().minimize(rules, drop_shadowed=drop_shadowed, drop_duplicates=drop_duplicates)
+        snapshot = RuleSetSnapshot.build(self._snapshot.version + 1, rules, self.condition_evaluator, tables)
+        self._snapshot = snapshot
+        if self.result_cache is not None:
+            self.result_cache.clear()
+        return snapshot
+
+    def _fingerprint(self, snapshot: RuleSetSnapshot, context: Dict[str, any]) -> bytes:
+        """Hash the projection of context onto the fields the rule set reads"""
+        projection = [[field, self._peek_field(context, field)] for field in snapshot.referenced_fields]
+        # Content operators depend on the file, not just its path: add its stat signature
+        for field in snapshot.content_fields:
+            path = self.condition_evaluator._get_field_value(context, field)
+            try:
+                stat = os.stat(path)
+                projection.append([field, "stat", stat.st_mtime_ns, stat.st_size])
+            except (OSError, TypeError, ValueError):
+                projection.append([field, "stat", None])
+        # Include the lookup-set generation so reloaded value_file lists invalidate entries
+        generation = self.condition_evaluator.lookup_sets.refresh()
+        encoded = json.dumps([snapshot.version, generation, projection], sort_keys=True, default=_fingerprint_default)
+        return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).digest()
+
+    @staticmethod
+    def _peek_field(context: Dict[str, any], field: str) -> any:
+        """A field's value for fingerprinting: like _get_field_value, but a lazy field
+        at the end of the path is left unresolved (the JSON encoder then uses its
+        identity), so keys never force enrichment no candidate rule asked for"""
+        current = context
+        for key in field.split('.'):
+            current = resolve_lazy(current)
+            if isinstance(current, dict):
+                if key not in current:
+                    return None
+                current = current[key]
+            elif isinstance(current, (list, tuple)) and key.isdigit() and 0 <= int(key) < len(current):
+                current = current[int(key)]
+            else:
+                return None
+        return current
+
+    def cache_stats(self) -> Dict[str, any]:
+        """Return result cache statistics (empty if the cache is disabled)"""
+        return self.result_cache.stats() if self.result_cache is not None else {}
 
     def _setup_logger(self) -> logging.Logger:
         logger = logging.getLogger("RuleEngine")
@@ -41,19 +292,121 @@ class RuleEngine:
         if not os.path.exists(self.rules_dir):
             os.makedirs(self.rules_dir)
             self.logger.info(f"Created rules directory: {self.rules_dir}")
-            return
 
+        rules: Dict[str, Rule] = {}
         for filename in os.listdir(self.rules_dir):
             if filename.endswith(".json"):
                 try:
                     with open(os.path.join(self.rules_dir, filename), 'r') as f:
                         rule_data = json.load(f)
                         rule = Rule(**rule_data)
-                        self.rules[rule.id] = rule
+                        rules[rule.id] = rule
                         self.logger.info(f"Loaded rule: {rule.id}")
                 except Exception as e:
                     self.logger.error(f"Error loading rule {filename}: {str(e)}")
 
+        with self._write_lock:
+            self._publish(rules, self._load_tables())
+
+    def _load_tables(self) -> Dict[str, RuleTable]:
+        """Load all rule tables from the tables directory (if it exists)"""
+        tables: Dict[str, RuleTable] = {}
+        if not os.path.exists(self.tables_dir):
+            return tables
+
+        for filename in os.listdir(self.tables_dir):
+            if filename.endswith(".json"):
+                try:
+                    table = RuleTable.from_file(os.path.join(self.tables_dir, filename))
+                    tables[table.id] = table
+                    self.logger.info(f"Loaded rule table: {table.id} ({len(table.rows)} rows)")
+                except Exception as e:
+                    self.logger.error(f"Error loading rule table {filename}: {str(e)}")
+        return tables
+
+    def add_rule_table(self, table_data: Dict[str, any]) -> Optional[str]:
+        """Add (or replace) a parameterized rule table"""
+        try:
+            table = RuleTable(table_data)
+            os.makedirs(self.tables_dir, exist_ok=True)
+            table_path = os.path.join(self.tables_dir, f"{table.id}.json")
+            with self._write_lock:
+                with open(table_path, 'w') as f:
+                    json.dump(table_data, f, indent=2)
+
+                tables = dict(self._snapshot.tables)
+                tables[table.id] = table
+                self._publish(dict(self._source_rules), tables)
+            self.logger.info(f"Added rule table: {table.id} ({len(table.rows)} rows)")
+            return table.id
+        except Exception as e:
+            self.logger.error(f"Error adding rule table: {str(e)}")
+            return None
+
+    def delete_rule_table(self, table_id: str) -> bool:
+        """Delete a parameterized rule table"""
+        if table_id not in self._snapshot.tables:
+            self.logger.warning(f"Rule table not found: {table_id}")
+            return False
+
+        try:
+            with self._write_lock:
+                os.remove(os.path.join(self.tables_dir, f"{table_id}.json"))
+                tables = dict(self._snapshot.tables)
+                del tables[table_id]
+                self._publish(dict(self._source_rules), tables)
+            self.logger.info(f"Deleted rule table: {table_id}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Error deleting rule table {table_id}: {str(e)}")
+            return False
+
+    def _load_aggregates(self) -> None:
+        """Load windowed aggregate definitions from the aggregates directory (if it exists)"""
+        if not os.path.exists(self.aggregates_dir):
+            return
+
+        for filename in os.listdir(self.aggregates_dir):
+            if filename.endswith(".json"):
+                try:
+                    with open(os.path.join(self.aggregates_dir, filename), 'r') as f:
+                        aggregate = self.aggregates.define(json.load(f))
+                    self.logger.info(f"Loaded aggregate: {aggregate.name}")
+                except Exception as e:
+                    self.logger.error(f"Error loading aggregate {filename}: {str(e)}")
+
+    def add_aggregate(self, spec: Dict[str, any]) -> Optional[str]:
+        """Define (or replace) a windowed aggregate, exposed to rules as aggregates.<name>"""
+        try:
+            aggregate = self.aggregates.define(spec)
+            os.makedirs(self.aggregates_dir, exist_ok=True)
+            with open(os.path.join(self.aggregates_dir, f"{aggregate.name}.json"), 'w') as f:
+                json.dump(spec, f, indent=2)
+            self.logger.info(f"Added aggregate: {aggregate.name}")
+            return aggregate.name
+        except Exception as e:
+            self.logger.error(f"Error adding aggregate: {str(e)}")
+            return None
+
+    def delete_aggregate(self, name: str) -> bool:
+        """Remove a windowed aggregate and its definition file"""
+        if not self.aggregates.remove(name):
+            self.logger.warning(f"Aggregate not found: {name}")
+            return False
+        aggregate_path = os.path.join(self.aggregates_dir, f"{name}.json")
+        if os.path.exists(aggregate_path):
+            os.remove(aggregate_path)
+        self.logger.info(f"Deleted aggregate: {name}")
+        return True
+
+    def _observe(self, context: Dict[str, any]) -> None:
+        """Update windowed aggregates for a new event and expose their values"""
+        if self.aggregates.aggregates:
+            try:
+                self.aggregates.observe(context)
+            except Exception as e:
+                self.logger.error(f"Error updating aggregates: {str(e)}")
+
     def add_rule(self, rule_data: Dict[str, any]) -> Optional[str]:
         """Add a new rule to the engine"""
         try:
@@ -63,10 +416,13 @@ class RuleEngine:
             
             # Save rule to file
             rule_path = os.path.join(self.rules_dir, f"{rule.id}.json")
-            with open(rule_path, 'w') as f:
-                json.dump(rule_data, f, indent=2)
-            
-            self.rules[rule.id] = rule
+            with self._write_lock:
+                with open(rule_path, 'w') as f:
+                    json.dump(rule_data, f, indent=2)
+
+                rules = dict(self._source_rules)
+                rules[rule.id] = rule
+                self._publish(rules)
             self.logger.info(f"Added new rule: {rule.id}")
             return rule.id
         except Exception as e:
@@ -80,16 +436,21 @@ class RuleEngine:
             return False
 
         try:
-            rule_data = self.rules[rule_id].__dict__
-            rule_data.update(updates)
-            rule_data["updated_at"] = datetime.now().isoformat()
-            
-            # Update rule file
-            rule_path = os.path.join(self.rules_dir, f"{rule_id}.json")
-            with open(rule_path, 'w') as f:
-                json.dump(rule_data, f, indent=2)
-            
-            self.rules[rule_id] = Rule(**rule_data)
+            with self._write_lock:
+                # Copy so the Rule held by in-flight snapshots is never mutated; edit the
+                # source rule, never its minimized copy
+                rules = dict(self._source_rules)
+                rule_data = dict(rules[rule_id].__dict__)
+                rule_data.update(updates)
+                rule_data["updated_at"] = datetime.now().isoformat()
+                
+                # Update rule file
+                rule_path = os.path.join(self.rules_dir, f"{rule_id}.json")
+                with open(rule_path, 'w') as f:
+                    json.dump(rule_data, f, indent=2)
+                
+                rules[rule_id] = Rule(**rule_data)
+                self._publish(rules)
             self.logger.info(f"Updated rule: {rule_id}")
             return True
         except Exception as e:
@@ -103,9 +464,12 @@ class RuleEngine:
             return False
 
         try:
-            rule_path = os.path.join(self.rules_dir, f"{rule_id}.json")
-            os.remove(rule_path)
-            del self.rules[rule_id]
+            with self._write_lock:
+                rule_path = os.path.join(self.rules_dir, f"{rule_id}.json")
+                os.remove(rule_path)
+                rules = dict(self._source_rules)
+                del rules[rule_id]
+                self._publish(rules)
             self.logger.info(f"Deleted rule: {rule_id}")
             return True
         except Exception as e:
@@ -114,36 +478,313 @@ class RuleEngine:
 
     def evaluate_rules(self, context: Dict[str, any]) -> List[Dict[str, any]]:
         """Evaluate all active rules against the given context"""
-        results = []
-        for rule in sorted(self.rules.values(), key=lambda x: x.priority, reverse=True):
-            if not rule.is_active:
-                continue
+        with scoped_artifacts(context):
+            # Pin one snapshot for the whole call; concurrent writers swap in a new one
+            snapshot = self._snapshot
+            self._observe(context)
+            if self.result_cache is not None:
+                return self._evaluate_cached(snapshot, context)
+
+            results = []
+            for rule, matched in snapshot.candidates(context, self.condition_evaluator):
+                try:
+                    if matched or self._evaluate_conditions(rule.conditions, context):
+                        results.append(self._run_rule(rule, context))
+                except Exception as e:
+                    self.logger.error(f"Error evaluating rule {rule.id}: {str(e)}")
+
+            return results
+
+    def evaluate(self, context: Dict[str, any], strategy: Optional[EvaluationStrategy] = None) -> EvaluationOutcome:
+        """Evaluate active rules in priority order under an EvaluationStrategy,
+        stopping early once the strategy is satisfied or its deadline passes"""
+        with scoped_artifacts(context):
+            strategy = strategy or EvaluationStrategy()
+            snapshot = self._snapshot
+            started = time.monotonic()
+            self._observe(context)
+            deadline = strategy.deadline()
+            outcome = EvaluationOutcome()
+            tier: Optional[int] = None
+
+            candidates = snapshot.candidates(context, self.condition_evaluator)
+            for rule, matched in candidates:
+                if strategy.min_priority is not None and rule.priority < strategy.min_priority:
+                    break
+                if tier is not None and rule.priority != tier:
+                    break
+                if deadline is not None and time.monotonic() >= deadline:
+                    outcome.deadline_exceeded = True
+                    outcome.skipped = [rule.id] + [
+                        skipped.id for skipped, _ in candidates
+                        if strategy.min_priority is None or skipped.priority >= strategy.min_priority
+                    ]
+                    self.logger.warning(f"Evaluation deadline exceeded, skipped {len(outcome.skipped)} rules")
+                    break
 
+                outcome.evaluated += 1
+                try:
+                    if not matched and not self._evaluate_conditions(rule.conditions, context):
+                        continue
+                    outcome.results.append(self._run_rule(rule, context))
+                except Exception as e:
+                    self.logger.error(f"Error evaluating rule {rule.id}: {str(e)}")
+                    continue
+
+                if strategy.mode == "first_match":
+                    break
+                if strategy.mode == "top_k" and len(outcome.results) >= strategy.k:
+                    break
+                if strategy.mode == "first_tier":
+                    tier = rule.priority
+
+            outcome.elapsed_ms = (time.monotonic() - started) * 1000.0
+            return outcome
+
+    def match_rules(self, context: Dict[str, any]) -> List[str]:
+        """Ids of the active rules matching context, in priority order, without
+        executing any actions"""
+        with scoped_artifacts(context):
+            snapshot = self._snapshot
+            self._observe(context)
+            return list(self._matched_ids(snapshot, context))
+
+    def _matched_ids(self, snapshot: RuleSetSnapshot, context: Dict[str, any]) -> Tuple[str, ...]:
+        """Matching rule ids, served from the result cache when one is configured"""
+        key = self._fingerprint(snapshot, context) if self.result_cache is not None else None
+        matched = self.result_cache.get(key) if key is not None else None
+        if matched is None:
+            hits = []
+            for rule, prematched in snapshot.candidates(context, self.condition_evaluator):
+                try:
+                    if prematched or self._evaluate_conditions(rule.conditions, context):
+                        hits.append(rule.id)
+                except Exception as e:
+                    self.logger.error(f"Error evaluating rule {rule.id}: {str(e)}")
+            matched = tuple(hits)
+            if key is not None:
+                self.result_cache.put(key, matched)
+        return matched
+
+    def _evaluate_cached(self, snapshot: RuleSetSnapshot, context: Dict[str, any]) -> List[Dict[str, any]]:
+        """Evaluate via the result cache: conditions are skipped on a hit, actions always run"""
+        matched = self._matched_ids(snapshot, context)
+        results = []
+        for rule_id in matched:
             try:
-                if self._evaluate_conditions(rule.conditions, context):
-                    action_results = self._execute_actions(rule.actions, context)
-                    results.append({
-                        "rule_id": rule.id,
-                        "rule_name": rule.name,
-                        "actions_executed": action_results
-                    })
-                    self.logger.info(f"Rule {rule.id} executed successfully")
+                results.append(self._run_rule(snapshot.lookup(rule_id), context))
             except Exception as e:
-                self.logger.error(f"Error evaluating rule {rule.id}: {str(e)}")
-
+                self.logger.error(f"Error evaluating rule {rule_id}: {str(e)}")
         return results
 
+    def evaluate_batch(self, contexts: List[Dict[str, any]]) -> List[List[Dict[str, any]]]:
+        """
+        Evaluate many events and execute all their actions together through
+        ActionExecutor.execute_many, so same-type actions of every match share one
+        batch (one write per file, one level check per log level, one pass per
+        context for value actions). Actions are handed over in event, rule and
+        action order, and execute_many keeps that order wherever two actions may
+        interact. Returns one evaluate_rules-style result list per context.
+
+        Unlike evaluate_rules, every event is matched before any action runs:
+        conditions and ${...} variables see the contexts as delivered, not the
+        effects of earlier rules' actions.
+        """
+        with ExitStack() as scopes:
+            snapshot = self._snapshot
+            batch: List[List[Dict[str, any]]] = []
+            pending: List[ActionCall] = []
+            slots: List[Tuple[List[Dict[str, any]], int]] = []
+            for context in contexts:
+                scopes.enter_context(scoped_artifacts(context))
+                self._observe(context)
+                results = []
+                for rule_id in self._matched_ids(snapshot, context):
+                    rule = snapshot.lookup(rule_id)
+                    executed: List[Dict[str, any]] = []
+                    for index, action in enumerate(rule.actions):
+                        try:
+                            resolved = self.variable_resolver.resolve(action, context)
+                            routed = self._route_action(resolved, context, rule.id, index)
+                        except Exception as e:
+                            self.logger.error(f"Error executing action {action.get('type')}: {str(e)}")
+                            routed = {"success": False, "action_type": action.get("type"), "error": str(e)}
+                        if routed is None:
+                            slots.append((executed, len(executed)))
+                            pending.append((resolved, context, rule.id))
+                        executed.append(routed)
+                    results.append({"rule_id": rule.id, "rule_name": rule.name, "actions_executed": executed})
+                batch.append(results)
+
+            for (executed, position), result in zip(slots, self.action_executor.execute_many(pending)):
+                executed[position] = result
+            self.logger.info(f"Batch of {len(contexts)} events executed {len(pending)} actions")
+            return batch
+
+    def evaluate_delta(self, context: Dict[str, any], changed_paths: Iterable[str]) -> List[Dict[str, any]]:
+        """Re-evaluate only the rules that read one of changed_paths, reusing cached
+        truth values from the previous call with the same context object.
+
+        Falls back to a full evaluation the first time a context is seen or when
+        the rule set has changed since its truth values were cached. Rule tables are
+        matched in full on every call since each costs a single index lookup.
+        """
+        with scoped_artifacts(context):
+            snapshot = self._snapshot
+            changed_paths = list(changed_paths)
+            key = id(context)
+            with self._delta_lock:
+                state = self._delta_states.get(key)
+                if state is not None:
+                    self._delta_states.move_to_end(key)
+                    # Work on a copy: the cached set is shared with concurrent calls and
+                    # is only replaced once this evaluation has finished
+                    cached = set(state[2])
+
+            if state is None or state[0] is not context or state[1] != snapshot.version:
+                matched: Set[str] = set()
+                candidates = [rule.id for rule in snapshot.active_rules]
+            else:
+                matched = cached
+                candidates = snapshot.rules_reading(changed_paths)
+
+            for rule_id in candidates:
+                rule = snapshot.rules[rule_id]
+                try:
+                    hit = self._evaluate_conditions(rule.conditions, context)
+                except Exception as e:
+                    hit = False
+                    self.logger.error(f"Error evaluating rule {rule_id}: {str(e)}")
+                if hit:
+                    matched.add(rule_id)
+                else:
+                    matched.discard(rule_id)
+
+            with self._delta_lock:
+                self._delta_states[key] = (context, snapshot.version, matched)
+                self._delta_states.move_to_end(key)
+                while len(self._delta_states) > self.max_delta_contexts:
+                    self._delta_states.popitem(last=False)
+
+            ordered = [snapshot.rules[rule_id] for rule_id in sorted(matched, key=snapshot.positions.__getitem__)]
+            if snapshot.active_tables:
+                ordered.extend(snapshot.table_matches(context, self.condition_evaluator))
+                ordered.sort(key=lambda x: x.priority, reverse=True)
+
+            results = []
+            for rule in ordered:
+                try:
+                    results.append(self._run_rule(rule, context))
+                except Exception as e:
+                    self.logger.error(f"Error evaluating rule {rule.id}: {str(e)}")
+            return results
+
+    def forget_context(self, context: Dict[str, any]) -> None:
+        """Drop cached delta-evaluation state for a context"""
+        with self._delta_lock:
+            self._delta_states.pop(id(context), None)
+
+    def _run_rule(self, rule: Rule, context: Dict[str, any]) -> Dict[str, any]:
+        """Execute a matched rule's actions and build its result entry"""
+        with self.cascade.publishing(rule.id):
+            action_results = self._execute_actions(rule.actions, context, namespace=rule.id)
+        self.logger.info(f"Rule {rule.id} executed successfully")
+        return {
+            "rule_id": rule.id,
+            "rule_name": rule.name,
+            "actions_executed": action_results
+        }
+
     def _evaluate_conditions(self, conditions: Dict[str, any], context: Dict[str, any]) -> bool:
         """Evaluate rule conditions against the context"""
-        # Implement condition evaluation logic here
-        # This is a placeholder implementation
-        return True
+        return self.condition_evaluator.evaluate(conditions, context)
+
+    def _execute_actions(self, actions: List[Dict[str, any]], context: Dict[str, any],
+                         namespace: Optional[str] = None) -> List[Dict[str, any]]:
+        """Resolve ${...} variables in each action against the context and execute it;
+        namespace (the rule id) scopes persistent state"""
+        results = []
+        for index, action in enumerate(actions):
+            try:
+                resolved = self.variable_resolver.resolve(action, context)
+                routed = self._route_action(resolved, context, namespace, index)
+                results.append(routed if routed is not None
+                               else self.action_executor.execute(resolved, context, namespace=namespace))
+            except Exception as e:
+                self.logger.error(f"Error executing action {action.get('type')}: {str(e)}")
+                results.append({
+                    "success": False,
+                    "action_type": action.get("type"),
+                    "error": str(e)
+                })
+        return results
+
+    def _route_action(self, action: Dict[str, any], context: Dict[str, any], namespace: Optional[str],
+                      index: int) -> Optional[Dict[str, any]]:
+        """Hand a side-effecting action to the outbox or action stage, if configured,
+        and return its result entry; None means the caller executes it directly"""
+        if action.get("type") in INLINE_ACTIONS:
+            return None
+        if self.action_outbox is not None:
+            return self._enqueue_action(action, context, namespace, index)
+        if self.action_stage is not None:
+            future = self.action_stage.submit(action, context, namespace=namespace)
+            # Rejections (open circuit, full queue) are known immediately
+            return future.result() if future.done() else {
+                "success": True,
+                "action_type": action.get("type"),
+                "queued": True
+            }
+        return None
+
+    def _enqueue_action(self, action: Dict[str, any], context: Dict[str, any], namespace: Optional[str],
+                        index: int) -> Dict[str, any]:
+        """Journal an action in the outbox. Its idempotency key is the action's own
+        "idempotency_key" (variables resolved) or, for events carrying event.id,
+        "<rule id>:<event id>:<action index>"; redelivered events then never repeat it."""
+        action = dict(action)
+        key = action.pop("idempotency_key", None)
+        event_id = context.get("event", {}).get("id") if isinstance(context.get("event"), dict) else None
+        if key is None and event_id is not None:
+            key = f"{namespace}:{event_id}:{index}"
+        entry_id = self.action_outbox.submit(action, context, namespace=namespace, key=key)
+        return {
+            "success": True,
+            "action_type": action.get("type"),
+            "queued": entry_id is not None,
+            "outbox_id": entry_id
+        }
+
+    def evaluate_cascade(self, context: Dict[str, any]) -> CascadeReport:
+        """Evaluate context and, breadth first, every event its actions publish until no
+        new events appear (see CascadeScheduler for cycle, duplicate and depth handling)"""
+        return self.cascade.run(context)
+
+    def evaluate_bulk(self, store: EventStore) -> BulkReport:
+        """Match active rules against every event in a SQLite EventStore, set-wise where
+        conditions compile to SQL (see BulkEvaluator); no actions are executed"""
+        return BulkEvaluator(store, self.condition_evaluator).evaluate_engine(self)
+
+    def analyze_rules(self) -> AnalysisReport:
+        """Report dead, duplicate and shadowed rules in the current rule set"""
+        return RuleAnalyzer().analyze(self._source_rules)
 
-    def _execute_actions(self, actions: Dict[str, any], context: Dict[str, any]) -> List[str]:
-        """Execute rule actions based on the context"""
-        # Implement action execution logic here
-        # This is a placeholder implementation
-        return ["action_executed"]
+    def minimize_rules(self, drop_shadowed: bool = False, drop_duplicates: bool = False,
+                       apply: bool = False) -> AnalysisReport:
+        """Compute a minimized rule set; with apply=True publish it as the active snapshot.
+        The minimized state lives in memory only: rule files and later edits apply to the
+        source rules, and each edit is minimized again before it is published."""
+        with self._write_lock:
+            minimized, report = RuleAnalyzer().minimize(self._source_rules, drop_shadowed=drop_shadowed,
+                                                        drop_duplicates=drop_duplicates)
+            if apply:
+                self._minimize_options = (drop_shadowed, drop_duplicates)
+                self._publish(dict(self._source_rules))
+        self.logger.info(
+            f"Minimized rule set: {report.rules_before} -> {report.rules_after} active rules"
+            f"{' (applied)' if apply else ''}"
+        )
+        return report
 
     def get_rule(self, rule_id: str) -> Optional[Rule]:
         """Get a rule by ID"""
@@ -158,7 +799,7 @@ class RuleEngine:
     def export_rules(self, output_path: str) -> bool:
         """Export all rules to a JSON file"""
         try:
-            rules_data = {rule_id: rule.__dict__ for rule_id, rule in self.rules.items()}
+            rules_data = {rule_id: rule.__dict__ for rule_id, rule in self._source_rules.items()}
             with open(output_path, 'w') as f:
                 json.dump(rules_data, f, indent=2)
             self.logger.info(f"Exported rules to: {output_path}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Load generator for the rule evaluation sidecar
+
+Opens --connections concurrent asyncio clients, each sending --requests match
+requests of --batch events, and reports throughput and latency percentiles. With
+--spawn it starts evaluation_server.py in a subprocess on a temporary Unix socket
+first, so a benchmark needs no other setup.
+
+Usage:
+  python evaluation_bench.py --spawn --connections 32 --requests 500 --batch 10
+  python evaluation_bench.py --unix /tmp/rule-engine.sock --events sample.jsonl
+"""
+
+from typing import Dict, Any, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from evaluation_client import AsyncEvaluationClient
+
+def synthetic_events(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        extension = rng.choice([".py", ".json", ".md", ".txt", ".log"])
+        events.append({
+            "event": {"type": rng.choice(["file_modified", "file_created", "file_deleted"]), "id": i},
+            "file": {
+                "path": f"src/module_{rng.randrange(500)}/file_{i}{extension}",
+                "extension": extension,
+                "size": rng.randrange(1 << 20)
+            }
+        })
+    return events
+
+def load_events(path: str) -> List[Dict[str, Any]]:
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+async def _client_loop(client: AsyncEvaluationClient, events: List[Dict[str, Any]], requests: int,
+                       batch: int, offset: int, latencies: List[float]) -> int:
+    matches = 0
+    for i in range(requests):
+        start = (offset + i * batch) % len(events)
+        chunk = [events[(start + j) % len(events)] for j in range(batch)]
+        started = time.perf_counter()
+        if batch == 1:
+            result = [await client.match(chunk[0])]
+        else:
+            result = await client.match_batch(chunk)
+        latencies.append((time.perf_counter() - started) * 1000.0)
+        matches += sum(len(ids) for ids in result)
+    return matches
+
+async def run_load(events: List[Dict[str, Any]], connections: int, requests: int, batch: int,
+                   unix_path: Optional[str] = None, port: Optional[int] = None) -> Dict[str, Any]:
+    clients = [AsyncEvaluationClient(unix_path=unix_path, port=port) for _ in range(connections)]
+    await asyncio.gather(*(client.connect() for client in clients))
+    latencies: List[float] = []
+    started = time.perf_counter()
+    matches = await asyncio.gather(*(
+        _client_loop(client, events, requests, batch, n * 7919, latencies)
+        for n, client in enumerate(clients)
+    ))
+    elapsed = time.perf_counter() - started
+    server_stats = await clients[0].stats()
+    await asyncio.gather(*(client.close() for client in clients))
+
+    latencies.sort()
+    total_requests = connections * requests
+    return {
+        "connections": connections,
+        "requests": total_requests,
+        "batch": batch,
+        "events": total_requests * batch,
+        "matches": sum(matches),
+        "elapsed_s": elapsed,
+        "requests_per_s": total_requests / elapsed if elapsed else 0.0,
+        "events_per_s": total_requests * batch / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "max": latencies[-1] if latencies else 0.0
+        },
+        "server": server_stats
+    }
+
+def spawn_server(unix_path: str, rules_dir: Optional[str]) -> subprocess.Popen:
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "evaluation_server.py"),
+               "--unix", unix_path]
+    if rules_dir:
+        command += ["--rules-dir", rules_dir]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith("ready"):
+        process.kill()
+        raise RuntimeError(f"Server failed to start: {line.strip()}")
+    return process
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the rule evaluation sidecar")
+    parser.add_argument("--unix", help="Unix socket of a running server")
+    parser.add_argument("--port", type=int, help="Localhost TCP port of a running server")
+    parser.add_argument("--spawn", action="store_true", help="Start a server on a temporary Unix socket")
+    parser.add_argument("--rules-dir", help="Rules directory for --spawn")
+    parser.add_argument("--events", help="JSONL file of contexts (default: synthetic file events)")
+    parser.add_argument("--connections", "-c", type=int, default=16, help="Concurrent connections")
+    parser.add_argument("--requests", "-n", type=int, default=200, help="Requests per connection")
+    parser.add_argument("--batch", "-b", type=int, default=1, help="Events per request")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    args = parser.parse_args(argv)
+    if not (args.spawn or args.unix or args.port):
+        parser.error("need --spawn, --unix or --port")
+
+    events = load_events(args.events) if args.events else synthetic_events(10000)
+    process = None
+    unix_path = args.unix
+    if args.spawn:
+        unix_path = os.path.join(tempfile.mkdtemp(), "rule-engine.sock")
+        process = spawn_server(unix_path, args.rules_dir)
+    try:
+        report = asyncio.run(run_load(events, args.connections, args.requests, args.batch,
+                                      unix_path=unix_path, port=None if unix_path else args.port))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+
+    if args.format == "json":
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report["latency_ms"]
+        print(f"{report['requests']:,} requests x {report['batch']} events over {report['connections']} connections "
+              f"in {report['elapsed_s']:.2f}s")
+        print(f"{report['requests_per_s']:,.0f} requests/s, {report['events_per_s']:,.0f} events/s, "
+              f"{report['matches']:,} matches")
+        print(f"latency ms: p50 {latency['p50']:.2f}  p90 {latency['p90']:.2f}  "
+              f"p99 {latency['p99']:.2f}  max {latency['max']:.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+Client library for the rule evaluation sidecar (evaluation_server.py)
+
+Wire format, both directions: a 4-byte big-endian payload length followed by a
+UTF-8 JSON object. Requests carry an "id" that the response echoes:
+
+  {"id": 1, "op": "match", "context": {...}}          -> {"id": 1, "ok": true, "matches": ["rule_a"]}
+  {"id": 2, "op": "match_batch", "contexts": [...]}   -> {"id": 2, "ok": true, "matches": [[...], ...]}
+  {"id": 3, "op": "evaluate", "context": {...}}       -> {"id": 3, "ok": true, "results": [...]}
+  {"id": 4, "op": "ping"} / {"op": "stats"}
+  errors                                              -> {"id": n, "ok": false, "error": "..."}
+
+Connections stay open for any number of requests, and requests may be pipelined;
+responses come back in request order. This module depends only on the standard
+library so services can use it without the engine.
+"""
+
+from typing import Dict, Any, List, Optional
+import asyncio
+import itertools
+import json
+import socket
+import struct
+import threading
+
+HEADER = struct.Struct(">I")
+MAX_FRAME = 16 * 1024 * 1024
+
+class ProtocolError(Exception):
+    pass
+
+class EvaluationError(Exception):
+    """The server answered a request with ok: false"""
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, separators=(",", ":"), default=str).encode("utf-8")
+    if len(payload) > MAX_FRAME:
+        raise ProtocolError(f"Frame of {len(payload)} bytes exceeds {MAX_FRAME}")
+    return HEADER.pack(len(payload)) + payload
+
+def decode_payload(payload: bytes) -> Dict[str, Any]:
+    try:
+        message = json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"Invalid JSON frame: {str(e)}")
+    if not isinstance(message, dict):
+        raise ProtocolError("Frame must be a JSON object")
+    return message
+
+async def read_frame(reader: asyncio.StreamReader, max_frame: int = MAX_FRAME) -> Optional[Dict[str, Any]]:
+    """Read one frame; None on a clean end of stream"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ProtocolError("Connection closed inside a frame header")
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > max_frame:
+        raise ProtocolError(f"Frame of {length} bytes exceeds {max_frame}")
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Connection closed inside a frame")
+    return decode_payload(payload)
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            raise ConnectionError("Connection closed by server")
+        buffer.extend(chunk)
+    return bytes(buffer)
+
+def _result(response: Dict[str, Any], key: str) -> Any:
+    if not response.get("ok"):
+        raise EvaluationError(response.get("error", "unknown error"))
+    return response.get(key)
+
+class EvaluationClient:
+    """
+    Blocking client over one kept-alive connection (thread-safe; calls are serialized)
+
+    Connect with unix_path for the Unix socket or host/port for localhost TCP.
+    """
+
+    def __init__(self, unix_path: Optional[str] = None, host: str = "127.0.0.1", port: Optional[int] = None,
+                 timeout: Optional[float] = 30.0):
+        if unix_path is None and port is None:
+            raise ValueError("Need unix_path or port")
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            if self.unix_path is not None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                sock.settimeout(self.timeout)
+                sock.connect(self.unix_path)
+            else:
+                sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = sock
+        return self._sock
+
+    def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            message = dict(message, id=next(self._ids))
+            sock = self._connect()
+            try:
+                sock.sendall(encode_frame(message))
+                (length,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+                response = decode_payload(_recv_exactly(sock, length))
+            except (OSError, ProtocolError):
+                self._close_socket()
+                raise
+            if response.get("id") != message["id"]:
+                self._close_socket()
+                raise ProtocolError(f"Response id {response.get('id')} for request {message['id']}")
+            return response
+
+    def match(self, context: Dict[str, Any]) -> List[str]:
+        """Ids of the rules matching context; no actions run"""
+        return _result(self.request({"op": "match", "context": context}), "matches")
+
+    def match_batch(self, contexts: List[Dict[str, Any]]) -> List[List[str]]:
+        return _result(self.request({"op": "match_batch", "contexts": contexts}), "matches")
+
+    def evaluate(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Full evaluation, including the matched rules' actions"""
+        return _result(self.request({"op": "evaluate", "context": context}), "results")
+
+    def ping(self) -> bool:
+        return bool(self.request({"op": "ping"}).get("ok"))
+
+    def stats(self) -> Dict[str, Any]:
+        return _result(self.request({"op": "stats"}), "stats")
+
+    def _close_socket(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def close(self) -> None:
+        with self._lock:
+            self._close_socket()
+
+    def __enter__(self) -> "EvaluationClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+class AsyncEvaluationClient:
+    """
+    asyncio client over one kept-alive connection
+
+    Concurrent calls are pipelined: requests are written as they come and a reader
+    task resolves each caller's future from the in-order responses.
+    """
+
+    def __init__(self, unix_path: Optional[str] = None, host: str = "127.0.0.1", port: Optional[int] = None):
+        if unix_path is None and port is None:
+            raise ValueError("Need unix_path or port")
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            if self.unix_path is not None:
+                self._reader, self._writer = await asyncio.open_unix_connection(self.unix_path)
+            else:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                sock = self._writer.get_extra_info("socket")
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reader_task = asyncio.ensure_future(self._read_responses())
+
+    async def _read_responses(self) -> None:
+        error: Exception = ConnectionError("Connection closed by server")
+        try:
+            while True:
+                response = await read_frame(self._reader)
+                if response is None:
+                    break
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        except (OSError, ProtocolError) as e:
+            error = e
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
+            self._writer = None
+
+    async def request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        await self.connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(encode_frame(dict(message, id=request_id)))
+        await self._writer.drain()
+        return await future
+
+    async def match(self, context: Dict[str, Any]) -> List[str]:
+        return _result(await self.request({"op": "match", "context": context}), "matches")
+
+    async def match_batch(self, contexts: List[Dict[str, Any]]) -> List[List[str]]:
+        return _result(await self.request({"op": "match_batch", "contexts": contexts}), "matches")
+
+    async def evaluate(self, context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        return _result(await self.request({"op": "evaluate", "context": context}), "results")
+
+    async def ping(self) -> bool:
+        return bool((await self.request({"op": "ping"})).get("ok"))
+
+    async def stats(self) -> Dict[str, Any]:
+        return _result(await self.request({"op": "stats"}), "stats")
+
+    async def close(self) -> None:
+        writer = self._writer
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+        if self._reader_task is not None:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+
+    async def __aenter__(self) -> "AsyncEvaluationClient":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
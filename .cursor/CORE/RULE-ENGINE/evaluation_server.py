@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Rule evaluation sidecar
+
+Serves RuleEngine over a Unix domain socket and/or localhost TCP so other services
+can ask which rules match an event without embedding the engine. The protocol
+(length-prefixed JSON frames, batched and pipelined requests on kept-alive
+connections) is described in evaluation_client.py.
+
+Usage:
+  python evaluation_server.py --unix /tmp/rule-engine.sock
+  python evaluation_server.py --unix /tmp/rule-engine.sock --port 7878 --rules-dir path/to/rules
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Set
+import argparse
+import asyncio
+import ipaddress
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+from engine import RuleEngine
+from evaluation_client import MAX_FRAME, ProtocolError, encode_frame, read_frame
+
+class EvaluationServer:
+    """
+    asyncio server answering match / match_batch / evaluate requests
+
+    Nothing runs on the event loop, so one large match_batch or a slow content
+    operator does not stall the other connections. match and match_batch run in a
+    match_workers thread pool; evaluate also executes actions, which may block on
+    I/O, so it gets its own action_workers pool and cannot starve matching. Each
+    connection handles its requests in order and stays open until the client
+    closes it or idle_timeout passes.
+    """
+
+    def __init__(self, engine: RuleEngine, unix_path: Optional[str] = None, host: str = "127.0.0.1",
+                 port: Optional[int] = None, max_frame: int = MAX_FRAME, max_batch: int = 10000,
+                 idle_timeout: Optional[float] = 300.0, action_workers: int = 4, match_workers: int = 2):
+        if unix_path is None and port is None:
+            raise ValueError("Need unix_path or port")
+        if port is not None and not ipaddress.ip_address(socket.gethostbyname(host)).is_loopback:
+            raise ValueError(f"TCP listener must bind to localhost, not {host}")
+        self.engine = engine
+        self.unix_path = unix_path
+        self.host = host
+        self.port = port
+        self.max_frame = max_frame
+        self.max_batch = max_batch
+        self.idle_timeout = idle_timeout
+        self.logger = logging.getLogger("EvaluationServer")
+        self._executor = ThreadPoolExecutor(max_workers=action_workers, thread_name_prefix="rule-actions")
+        self._match_executor = ThreadPoolExecutor(max_workers=match_workers, thread_name_prefix="rule-match")
+        self._servers = []
+        self._connections: Set[asyncio.Task] = set()
+        self.started = time.time()
+        self.requests = 0
+        self.events = 0
+        self.errors = 0
+        self.connections_total = 0
+
+    async def start(self) -> None:
+        if self.unix_path is not None:
+            if os.path.exists(self.unix_path):
+                os.unlink(self.unix_path)
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=self.unix_path))
+            self.logger.info(f"Listening on unix:{self.unix_path}")
+        if self.port is not None:
+            server = await asyncio.start_server(self._handle, host=self.host, port=self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            self._servers.append(server)
+            self.logger.info(f"Listening on tcp:{self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        if not self._servers:
+            await self.start()
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self._servers = []
+        self._executor.shutdown(wait=False)
+        self._match_executor.shutdown(wait=False)
+        if self.unix_path is not None and os.path.exists(self.unix_path):
+            os.unlink(self.unix_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        task = asyncio.current_task()
+        self._connections.add(task)
+        self.connections_total += 1
+        sock = writer.get_extra_info("socket")
+        if sock is not None and sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_frame(reader, self.max_frame), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except ProtocolError as e:
+                    # The stream position is lost after a bad frame; report and hang up
+                    self.errors += 1
+                    writer.write(encode_frame({"id": None, "ok": False, "error": str(e)}))
+                    break
+                if request is None:
+                    break
+                writer.write(encode_frame(await self._dispatch(request)))
+                # Only wait for the socket when the client is not reading fast enough
+                if writer.transport.get_write_buffer_size() > 1 << 20:
+                    await writer.drain()
+            await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        self.requests += 1
+        request_id = request.get("id")
+        op = request.get("op")
+        loop = asyncio.get_running_loop()
+        try:
+            if op == "match":
+                self.events += 1
+                context = self._context(request)
+                matches = await loop.run_in_executor(self._match_executor, self.engine.match_rules, context)
+                return {"id": request_id, "ok": True, "matches": matches}
+            if op == "match_batch":
+                contexts = request.get("contexts")
+                if not isinstance(contexts, list) or len(contexts) > self.max_batch:
+                    raise ValueError(f"contexts must be a list of at most {self.max_batch} objects")
+                if not all(isinstance(context, dict) for context in contexts):
+                    raise ValueError("Every context must be an object")
+                self.events += len(contexts)
+                matches = await loop.run_in_executor(self._match_executor, self._match_batch, contexts)
+                return {"id": request_id, "ok": True, "matches": matches}
+            if op == "evaluate":
+                self.events += 1
+                context = self._context(request)
+                results = await loop.run_in_executor(self._executor, self.engine.evaluate_rules, context)
+                return {"id": request_id, "ok": True, "results": results}
+            if op == "ping":
+                return {"id": request_id, "ok": True}
+            if op == "stats":
+                return {"id": request_id, "ok": True, "stats": self.stats()}
+            raise ValueError(f"Unknown op: {op}")
+        except Exception as e:
+            self.errors += 1
+            return {"id": request_id, "ok": False, "error": str(e)}
+
+    def _match_batch(self, contexts: List[Dict[str, Any]]) -> List[List[str]]:
+        return [self.engine.match_rules(context) for context in contexts]
+
+    @staticmethod
+    def _context(request: Dict[str, Any]) -> Dict[str, Any]:
+        context = request.get("context")
+        if not isinstance(context, dict):
+            raise ValueError("context must be an object")
+        return context
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "uptime_s": time.time() - self.started,
+            "requests": self.requests,
+            "events": self.events,
+            "errors": self.errors,
+            "open_connections": len(self._connections),
+            "connections_total": self.connections_total,
+            "rules": len(self.engine.snapshot().active_rules),
+            "snapshot_version": self.engine.snapshot().version
+        }
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve RuleEngine over a Unix socket and/or localhost TCP")
+    parser.add_argument("--unix", help="Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1", help="TCP host (loopback only)")
+    parser.add_argument("--port", type=int, help="TCP port (0 picks a free port)")
+    parser.add_argument("--rules-dir", default=".cursor/CORE/RULE-ENGINE/rules", help="Rules directory")
+    parser.add_argument("--result-cache-size", type=int, default=0, help="Result cache entries (0 disables)")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="Close idle connections after seconds")
+    args = parser.parse_args(argv)
+    if args.unix is None and args.port is None:
+        parser.error("need --unix and/or --port")
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    engine = RuleEngine(rules_dir=args.rules_dir, result_cache_size=args.result_cache_size)
+    # Per-rule info logging would dominate a busy sidecar
+    engine.logger.setLevel(logging.WARNING)
+    server = EvaluationServer(engine, unix_path=args.unix, host=args.host, port=args.port,
+                              idle_timeout=args.idle_timeout)
+
+    async def run() -> None:
+        await server.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"ready unix={args.unix} port={server.port}", flush=True)
+        await stop.wait()
+        await server.close()
+
+    asyncio.run(run())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
+import time
+
+MODES = ("all", "first_match", "top_k", "first_tier")
+
+@dataclass(frozen=True)
+class EvaluationStrategy:
+    """
+    How much of the rule set an evaluation should cover
+
+    mode:
+        all         - evaluate every active rule (same as evaluate_rules)
+        first_match - stop at the highest-priority matching rule
+        top_k       - stop after k matches
+        first_tier  - stop after the highest priority tier that has a match
+    min_priority: skip rules with a lower priority (rules are visited in priority order,
+                  so evaluation simply stops there)
+    deadline_ms: wall-clock budget for the call; rules not reached in time are reported
+                 as skipped
+    """
+    mode: str = "all"
+    k: int = 1
+    min_priority: Optional[int] = None
+    deadline_ms: Optional[float] = None
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown evaluation mode: {self.mode}")
+        if self.mode == "top_k" and self.k < 1:
+            raise ValueError("k must be at least 1 for top_k")
+
+    @classmethod
+    def first_match(cls, deadline_ms: Optional[float] = None) -> "EvaluationStrategy":
+        return cls(mode="first_match", deadline_ms=deadline_ms)
+
+    @classmethod
+    def top_k(cls, k: int, deadline_ms: Optional[float] = None) -> "EvaluationStrategy":
+        return cls(mode="top_k", k=k, deadline_ms=deadline_ms)
+
+    @classmethod
+    def first_tier(cls, deadline_ms: Optional[float] = None) -> "EvaluationStrategy":
+        return cls(mode="first_tier", deadline_ms=deadline_ms)
+
+    def deadline(self) -> Optional[float]:
+        """Absolute time.monotonic() deadline for a call starting now"""
+        if self.deadline_ms is None:
+            return None
+        return time.monotonic() + self.deadline_ms / 1000.0
+
+@dataclass
+class EvaluationOutcome:
+    """Result of a strategy-driven evaluation"""
+    results: List[Dict[str, Any]] = field(default_factory=list)
+    evaluated: int = 0
+    skipped: List[str] = field(default_factory=list)
+    deadline_exceeded: bool = False
+    elapsed_ms: float = 0.0
@@ -0,0 +1,152 @@
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+from condition_evaluator import ConditionEvaluator
+
+class _Burst:
+    __slots__ = ("first_type", "context", "first_seen", "last_seen", "count")
+
+    def __init__(self, context: Dict[str, Any], now: float):
+        self.first_type = context.get("event", {}).get("type")
+        self.context = context
+        self.first_seen = now
+        self.last_seen = now
+        self.count = 1
+
+class EventCoalescer:
+    """
+    Merges bursts of events for the same key before they reach the rule engine
+
+    Events are grouped by key_field (default file.path). A burst is emitted as one
+    event once no new event for its key arrived for quiet_window seconds, or at the
+    latest max_delay seconds after its first event, so a steady stream cannot
+    postpone it forever. The emitted context is the latest one in the burst with
+    event.coalesced_count set; a burst that began with file_created keeps that type
+    unless it ended in file_deleted, in which case nothing is emitted at all.
+    """
+
+    def __init__(self, key_field: str = "file.path", quiet_window: float = 0.2, max_delay: float = 2.0,
+                 clock: Callable[[], float] = time.monotonic):
+        if quiet_window < 0 or max_delay < quiet_window:
+            raise ValueError("Require 0 <= quiet_window <= max_delay")
+        self.key_field = key_field
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay
+        self.clock = clock
+        self.logger = logging.getLogger("EventCoalescer")
+        self._evaluator = ConditionEvaluator()
+        self._pending: Dict[Any, _Burst] = {}
+        # (deadline, seq, key); entries superseded by a later add are skipped lazily
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._deadlines: Dict[Any, float] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.received = 0
+        self.emitted = 0
+
+    def _deadline(self, burst: _Burst) -> float:
+        return min(burst.last_seen + self.quiet_window, burst.first_seen + self.max_delay)
+
+    def add(self, context: Dict[str, Any]) -> None:
+        """Queue an event; events without a key are passed through on the next due()"""
+        now = self.clock()
+        key = self._evaluator._get_field_value(context, self.key_field)
+        with self._lock:
+            self.received += 1
+            if key is None:
+                # Unique placeholder key so keyless events are never merged
+                key = ("__unkeyed__", next(self._seq))
+            burst = self._pending.get(key)
+            if burst is None:
+                burst = _Burst(context, now)
+                self._pending[key] = burst
+            else:
+                burst.context = context
+                burst.last_seen = now
+                burst.count += 1
+            deadline = self._deadline(burst)
+            self._deadlines[key] = deadline
+            heapq.heappush(self._heap, (deadline, next(self._seq), key))
+
+    def due(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Pop and return every burst whose deadline has passed"""
+        now = self.clock() if now is None else now
+        ready: List[_Burst] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, key = heapq.heappop(self._heap)
+                if self._deadlines.get(key) != deadline:
+                    continue
+                del self._deadlines[key]
+                ready.append(self._pending.pop(key))
+        return self._emit(ready)
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Emit every pending burst immediately"""
+        with self._lock:
+            ready = list(self._pending.values())
+            self._pending.clear()
+            self._deadlines.clear()
+            self._heap.clear()
+        return self._emit(ready)
+
+    def next_deadline(self) -> Optional[float]:
+        """Clock time of the earliest pending deadline, or None if nothing is pending"""
+        with self._lock:
+            while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def _emit(self, bursts: List[_Burst]) -> List[Dict[str, Any]]:
+        contexts = []
+        for burst in sorted(bursts, key=lambda b: b.first_seen):
+            event = burst.context.setdefault("event", {})
+            if burst.first_type == "file_created":
+                if event.get("type") == "file_deleted":
+                    continue
+                event["type"] = "file_created"
+            event["coalesced_count"] = burst.count
+            contexts.append(burst.context)
+        self.emitted += len(contexts)
+        return contexts
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "emitted": self.emitted,
+            "pending": self.pending
+        }
+
+    def run(self, source, handler: Callable[[Dict[str, Any]], Any], stop: Optional[threading.Event] = None,
+            idle_timeout: float = 1.0) -> None:
+        """
+        Pump events from source (anything with read_events(timeout), e.g. InotifyWatcher)
+        through the coalescer into handler (e.g. RuleEngine.evaluate_rules) until stop
+        is set. The read timeout follows the next burst deadline, so an idle pipeline
+        sleeps in the source's poll.
+        """
+        while not (stop and stop.is_set()):
+            deadline = self.next_deadline()
+            timeout = idle_timeout if deadline is None else max(0.0, min(idle_timeout, deadline - self.clock()))
+            for context in source.read_events(timeout):
+                self.add(context)
+            for context in self.due():
+                try:
+                    handler(context)
+                except Exception as e:
+                    self.logger.error(f"Error handling coalesced event: {str(e)}")
+
+        for context in self.flush():
+            try:
+                handler(context)
+            except Exception as e:
+                self.logger.error(f"Error handling coalesced event: {str(e)}")
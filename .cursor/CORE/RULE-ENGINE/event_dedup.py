@@ -0,0 +1,174 @@
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence
+import hashlib
+import json
+import logging
+import math
+import threading
+import time
+
+from condition_evaluator import ConditionEvaluator
+
+class DecayingBloomFilter:
+    """
+    Bloom filter that forgets keys older than `window` seconds
+
+    Keys go into the newest of `generations` filters and lookups check all of them.
+    The oldest generation is dropped every window / (generations - 1) seconds, or
+    early once the newest one holds `capacity` keys, so memory stays fixed and a key
+    is remembered for at least `window` seconds (unless volume forces an early
+    rotation). Each generation is sized for fp_rate / generations, keeping the
+    combined false-positive rate at or below fp_rate.
+    """
+
+    def __init__(self, capacity: int = 100000, fp_rate: float = 0.001, window: float = 300.0,
+                 generations: int = 2, clock: Callable[[], float] = time.monotonic):
+        if capacity <= 0 or not 0 < fp_rate < 1 or window <= 0 or generations < 2:
+            raise ValueError("Require capacity > 0, 0 < fp_rate < 1, window > 0 and generations >= 2")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.window = window
+        self.generations = generations
+        self.clock = clock
+        per_generation = fp_rate / generations
+        self.bits = max(8, int(math.ceil(-capacity * math.log(per_generation) / (math.log(2) ** 2))))
+        self.hashes = max(1, int(round(self.bits / capacity * math.log(2))))
+        self.rotate_every = window / (generations - 1)
+        self._filters: List[bytearray] = [self._empty() for _ in range(generations)]
+        self._count = 0
+        self._rotated_at = clock()
+        self.rotations = 0
+
+    def _empty(self) -> bytearray:
+        return bytearray((self.bits + 7) // 8)
+
+    def _positions(self, digest: bytes) -> List[int]:
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _maybe_rotate(self) -> None:
+        now = self.clock()
+        elapsed = now - self._rotated_at
+        if elapsed >= self.rotate_every or self._count >= self.capacity:
+            steps = min(self.generations, max(1, int(elapsed // self.rotate_every)))
+            for _ in range(steps):
+                self._filters.pop()
+                self._filters.insert(0, self._empty())
+            self._count = 0
+            self._rotated_at = now
+            self.rotations += steps
+
+    def check_and_add(self, digest: bytes) -> bool:
+        """Record the key and return whether it was (probably) present already"""
+        self._maybe_rotate()
+        positions = self._positions(digest)
+        present = any(
+            all(bloom[p >> 3] & (1 << (p & 7)) for p in positions)
+            for bloom in self._filters
+        )
+        newest = self._filters[0]
+        for p in positions:
+            newest[p >> 3] |= 1 << (p & 7)
+        self._count += 1
+        return present
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(len(bloom) for bloom in self._filters)
+
+class EventDeduplicator:
+    """
+    Drops redelivered events before they reach the rule engine
+
+    An event's key is the value at id_field (default event.id) or, when that is
+    missing, a hash of key_fields. Keys are checked against a DecayingBloomFilter:
+    a miss means the event is new. A hit is confirmed against an exact LRU of the
+    most recent lru_size keys seen within the window; a confirmed hit is a duplicate.
+    A Bloom hit the LRU cannot confirm (a false positive, or a key evicted from the
+    LRU) is passed through unless drop_unconfirmed is set, so a false positive never
+    silently loses an event. Events without any key are always passed through.
+
+    Use filter() on batches or wrap() a handler such as RuleEngine.evaluate_rules.
+    """
+
+    def __init__(self, id_field: Optional[str] = "event.id", key_fields: Optional[Sequence[str]] = None,
+                 window: float = 300.0, capacity: int = 100000, fp_rate: float = 0.001,
+                 lru_size: int = 10000, drop_unconfirmed: bool = False,
+                 clock: Callable[[], float] = time.monotonic):
+        self.id_field = id_field
+        self.key_fields = tuple(key_fields or ())
+        self.window = window
+        self.lru_size = lru_size
+        self.drop_unconfirmed = drop_unconfirmed
+        self.clock = clock
+        self.bloom = DecayingBloomFilter(capacity, fp_rate, window, clock=clock)
+        self.logger = logging.getLogger("EventDeduplicator")
+        self._evaluator = ConditionEvaluator()
+        # digest -> time last seen
+        self._recent: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.received = 0
+        self.duplicates = 0
+        self.unconfirmed = 0
+
+    def key(self, context: Dict[str, Any]) -> Optional[bytes]:
+        """16-byte digest identifying the event, or None if it has no key"""
+        if self.id_field:
+            event_id = self._evaluator._get_field_value(context, self.id_field)
+            if event_id is not None:
+                return hashlib.blake2b(f"id:{event_id}".encode("utf-8"), digest_size=16).digest()
+        if self.key_fields:
+            values = [self._evaluator._get_field_value(context, field) for field in self.key_fields]
+            if all(value is None for value in values):
+                return None
+            encoded = json.dumps(values, sort_keys=True, default=str)
+            return hashlib.blake2b(f"fields:{encoded}".encode("utf-8"), digest_size=16).digest()
+        return None
+
+    def is_duplicate(self, context: Dict[str, Any]) -> bool:
+        """Record the event and return whether it should be dropped"""
+        digest = self.key(context)
+        with self._lock:
+            self.received += 1
+            if digest is None:
+                return False
+            now = self.clock()
+            probably_seen = self.bloom.check_and_add(digest)
+            last_seen = self._recent.pop(digest, None)
+            self._recent[digest] = now
+            if len(self._recent) > self.lru_size:
+                self._recent.popitem(last=False)
+            if not probably_seen:
+                return False
+            if last_seen is not None and now - last_seen <= self.window:
+                self.duplicates += 1
+                return True
+            self.unconfirmed += 1
+            if self.drop_unconfirmed:
+                self.duplicates += 1
+                return True
+            return False
+
+    def filter(self, contexts: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [context for context in contexts if not self.is_duplicate(context)]
+
+    def wrap(self, handler: Callable[[Dict[str, Any]], Any]) -> Callable[[Dict[str, Any]], Any]:
+        """Return a handler that skips duplicates (returning []) and forwards the rest"""
+        def deduplicated(context: Dict[str, Any]) -> Any:
+            if self.is_duplicate(context):
+                return []
+            return handler(context)
+        return deduplicated
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "received": self.received,
+                "duplicates": self.duplicates,
+                "unconfirmed": self.unconfirmed,
+                "recent": len(self._recent),
+                "bloom_bytes": self.bloom.memory_bytes,
+                "bloom_hashes": self.bloom.hashes,
+                "bloom_rotations": self.bloom.rotations
+            }
@@ -0,0 +1,250 @@
+from datetime import datetime
+from fnmatch import fnmatch
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence
+import ctypes
+import ctypes.util
+import errno
+import logging
+import os
+import select
+import struct
+import threading
+
+from lazy_fields import file_fields
+from path_index import path_glob
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+DEFAULT_MASK = IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF
+DEFAULT_IGNORE = (".git", "__pycache__", "node_modules", "*.swp", "*.swx", "*~", ".#*", "*.tmp")
+
+EVENT_HEADER = struct.Struct("iIII")
+
+class InotifyWatcher:
+    """
+    Linux inotify file event source producing RuleEngine contexts
+
+    Watches directories (recursively by default) through libc's inotify calls via
+    ctypes, so no extra service or package is needed. The watcher blocks in poll()
+    while idle. Every event becomes a context shaped like the bundled rules expect:
+
+    {
+        "event": {"type": "file_modified", "timestamp": "...", "source": "inotify"},
+        "file": {"path": ..., "extension": ..., "size": ..., ...}   # lazy fields
+    }
+
+    Event types are file_created, file_modified, file_deleted and file_moved (with
+    file.previous_path). Paths matching an ignore pattern (a glob on the path or on
+    any single component) produce no events, and ignored directories are not watched.
+    """
+
+    def __init__(self, paths: Sequence[str], recursive: bool = True,
+                 ignore_patterns: Optional[Sequence[str]] = DEFAULT_IGNORE,
+                 mask: int = DEFAULT_MASK, include_modify: bool = False):
+        self.logger = logging.getLogger("InotifyWatcher")
+        self.recursive = recursive
+        self.ignore_patterns = tuple(ignore_patterns or ())
+        self.mask = mask | (IN_MODIFY if include_modify else 0)
+        self._libc = self._load_libc()
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._watches: Dict[int, str] = {}
+        self._paths: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        for path in paths:
+            self.add_watch(path)
+
+    @staticmethod
+    def _load_libc():
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+
+    def is_ignored(self, path: str) -> bool:
+        if not self.ignore_patterns:
+            return False
+        parts = path.replace('\\', '/').split('/')
+        for pattern in self.ignore_patterns:
+            if any(fnmatch(part, pattern) for part in parts if part) or path_glob(path, pattern):
+                return True
+        return False
+
+    def add_watch(self, path: str) -> None:
+        """Watch a directory (and, if recursive, every directory below it)"""
+        path = os.path.abspath(path)
+        if self.is_ignored(path):
+            return
+        self._add_single(path)
+        if self.recursive:
+            for root, dirs, _ in os.walk(path):
+                dirs[:] = [d for d in dirs if not self.is_ignored(os.path.join(root, d))]
+                for d in dirs:
+                    self._add_single(os.path.join(root, d))
+
+    def _add_single(self, path: str) -> None:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), self.mask | IN_ONLYDIR)
+        if wd < 0:
+            err = ctypes.get_errno()
+            # The directory may vanish between listing and watching
+            if err in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(err, f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+        with self._lock:
+            self._watches[wd] = path
+            self._paths[path] = wd
+
+    def remove_watch(self, path: str) -> None:
+        path = os.path.abspath(path)
+        with self._lock:
+            wd = self._paths.pop(path, None)
+            if wd is not None:
+                self._watches.pop(wd, None)
+        if wd is not None:
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    @property
+    def watched(self) -> List[str]:
+        with self._lock:
+            return sorted(self._paths)
+
+    def read_events(self, timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Wait up to timeout seconds (None = forever) and return the pending contexts"""
+        if self._closed:
+            return []
+        poller = select.poll()
+        poller.register(self.fd, select.POLLIN)
+        if not poller.poll(None if timeout is None else int(timeout * 1000)):
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        return self._parse(data)
+
+    def _parse(self, data: bytes) -> List[Dict[str, Any]]:
+        raw = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            raw.append((wd, mask, cookie, os.fsdecode(name)))
+
+        contexts: List[Dict[str, Any]] = []
+        moved_from: Dict[int, str] = {}
+        for wd, mask, cookie, name in raw:
+            if mask & IN_Q_OVERFLOW:
+                self.logger.warning("inotify queue overflowed; events were lost")
+                continue
+            with self._lock:
+                directory = self._watches.get(wd)
+            if mask & IN_IGNORED:
+                with self._lock:
+                    self._watches.pop(wd, None)
+                    if directory is not None:
+                        self._paths.pop(directory, None)
+                continue
+            if directory is None or not name:
+                continue
+
+            path = os.path.join(directory, name)
+            if self.is_ignored(path):
+                continue
+
+            if mask & IN_ISDIR:
+                if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_watch(path)
+                    # Files created before the watch existed would otherwise be missed
+                    contexts.extend(self._context("file_created", p) for p in self._scan(path))
+                continue
+
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = path
+            elif mask & IN_MOVED_TO:
+                previous = moved_from.pop(cookie, None)
+                if previous is None:
+                    contexts.append(self._context("file_created", path))
+                else:
+                    contexts.append(self._context("file_moved", path, previous_path=previous))
+            elif mask & IN_CREATE:
+                contexts.append(self._context("file_created", path))
+            elif mask & IN_DELETE:
+                contexts.append(self._context("file_deleted", path))
+            elif mask & (IN_CLOSE_WRITE | IN_MODIFY):
+                contexts.append(self._context("file_modified", path))
+
+        # A move out of the watched tree looks like a delete
+        contexts.extend(self._context("file_deleted", path) for path in moved_from.values())
+        return contexts
+
+    def _scan(self, directory: str) -> Iterator[str]:
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not self.is_ignored(os.path.join(root, d))]
+            for filename in files:
+                path = os.path.join(root, filename)
+                if not self.is_ignored(path):
+                    yield path
+
+    def _context(self, event_type: str, path: str, **extra) -> Dict[str, Any]:
+        file_context = file_fields(path)
+        file_context.update(extra)
+        return {
+            "event": {
+                "type": event_type,
+                "timestamp": datetime.now().isoformat(),
+                "source": "inotify"
+            },
+            "file": file_context
+        }
+
+    def events(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield contexts until closed; with a timeout, stop after an idle period"""
+        while not self._closed:
+            batch = self.read_events(timeout)
+            if not batch and timeout is not None:
+                return
+            yield from batch
+
+    def run(self, handler: Callable[[Dict[str, Any]], Any], stop: Optional[threading.Event] = None,
+            poll_interval: float = 1.0) -> None:
+        """Feed every event to handler (e.g. RuleEngine.evaluate_rules) until stop is set"""
+        while not self._closed and not (stop and stop.is_set()):
+            for context in self.read_events(poll_interval):
+                try:
+                    handler(context)
+                except Exception as e:
+                    self.logger.error(f"Error handling {context['event']['type']} for {context['file']['path']}: {str(e)}")
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            os.close(self.fd)
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the http_request action against a local stand-in webhook server
+
+Starts a threaded HTTP/1.1 server on 127.0.0.1 in a child process (optionally adding latency and
+failing a fraction of requests with 503), then sends --requests webhook POSTs with
+each client mode and reports throughput, latency percentiles, retries and how many
+TCP connections the server had to accept:
+
+  unpooled  a new connection per request (requests.post without a session)
+  pooled    HttpClient shared by --concurrency threads
+  async     AsyncHttpClient with --concurrency requests in flight
+
+Usage:
+  python http_bench.py --requests 2000 --concurrency 16
+  python http_bench.py --latency-ms 20 --fail-rate 0.05 --modes pooled async
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Callable, List
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import sys
+import time
+
+import requests
+
+from async_http_client import AsyncHttpClient
+from http_client import HttpClient, HttpRequestError
+
+def _serve(ready, counters, latency_ms: float, fail_rate: float, seed: int) -> None:
+    """Stand-in server process; counters are shared [requests, connections, failed]"""
+    rng = random.Random(seed)
+    latency = latency_ms / 1000.0
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; without this Nagle holds the body
+        disable_nagle_algorithm = True
+
+        def setup(self) -> None:
+            super().setup()
+            with counters.get_lock():
+                counters[1] += 1
+
+        def do_POST(self) -> None:
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            with counters.get_lock():
+                counters[0] += 1
+                fail = rng.random() < fail_rate
+                if fail:
+                    counters[2] += 1
+            if latency:
+                time.sleep(latency)
+            payload = b'{"error": "unavailable"}' if fail else b'{"received": true}'
+            self.send_response(503 if fail else 200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        # Room for the unpooled mode's connection churn
+        request_queue_size = 1024
+
+    httpd = Server(("127.0.0.1", 0), Handler)
+    ready.put(httpd.server_address[1])
+    httpd.serve_forever()
+
+class StandInServer:
+    """
+    Local webhook receiver in its own process (so it does not share the client's
+    GIL): answers POSTs with a small JSON body over kept-alive HTTP/1.1
+    connections and counts requests and accepted connections
+    """
+
+    def __init__(self, latency_ms: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self._mp = multiprocessing.get_context("spawn")
+        self._counters = self._mp.Array("q", 3)
+        self._args = (latency_ms, fail_rate, seed)
+        self._process = None
+        self.url = None
+
+    def start(self) -> "StandInServer":
+        ready = self._mp.Queue()
+        self._process = self._mp.Process(target=_serve, args=(ready, self._counters) + self._args,
+                                         name="StandInServer", daemon=True)
+        self._process.start()
+        self.url = f"http://127.0.0.1:{ready.get(timeout=30)}/hook"
+        return self
+
+    @property
+    def requests(self) -> int:
+        return self._counters[0]
+
+    @property
+    def connections(self) -> int:
+        return self._counters[1]
+
+    @property
+    def failed(self) -> int:
+        return self._counters[2]
+
+    def reset(self) -> None:
+        with self._counters.get_lock():
+            for i in range(3):
+                self._counters[i] = 0
+
+    def stop(self) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def _payload(i: int) -> Dict[str, Any]:
+    return {"event": {"type": "file_modified", "id": i}, "file": {"path": f"src/module_{i % 97}.py"}}
+
+def _run_threads(send: Callable[[int], Any], count: int, concurrency: int, latencies: List[float]) -> int:
+    errors = 0
+
+    def one(i: int) -> bool:
+        started = time.perf_counter()
+        try:
+            send(i)
+            return True
+        except (HttpRequestError, requests.RequestException):
+            return False
+        finally:
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for ok in pool.map(one, range(count)):
+            errors += not ok
+    return errors
+
+def bench_unpooled(url: str, count: int, concurrency: int, latencies: List[float]) -> Dict[str, Any]:
+    def send(i: int) -> None:
+        response = requests.post(url, json=_payload(i), timeout=10)
+        response.raise_for_status()
+    return {"errors": _run_threads(send, count, concurrency, latencies)}
+
+def bench_pooled(url: str, count: int, concurrency: int, latencies: List[float]) -> Dict[str, Any]:
+    with HttpClient(per_host_limit=concurrency, backoff_base=0.01, seed=0) as client:
+        errors = _run_threads(lambda i: client.request(url, method="POST", json=_payload(i),
+                                                       headers={"Idempotency-Key": f"bench-{i}"}),
+                              count, concurrency, latencies)
+        return {"errors": errors, "retried": client.stats()["retried"]}
+
+def bench_async(url: str, count: int, concurrency: int, latencies: List[float]) -> Dict[str, Any]:
+    async def run() -> Dict[str, Any]:
+        async with AsyncHttpClient(per_host_limit=concurrency, backoff_base=0.01, seed=0) as client:
+            next_index = iter(range(count))
+            errors = 0
+
+            async def lane() -> None:
+                nonlocal errors
+                for i in next_index:
+                    started = time.perf_counter()
+                    try:
+                        await client.request(url, method="POST", json=_payload(i),
+                                             headers={"Idempotency-Key": f"bench-{i}"})
+                    except HttpRequestError:
+                        errors += 1
+                    latencies.append((time.perf_counter() - started) * 1000.0)
+
+            await asyncio.gather(*(lane() for _ in range(concurrency)))
+            return {"errors": errors, "retried": client.stats()["retried"]}
+    return asyncio.run(run())
+
+MODES = {"unpooled": bench_unpooled, "pooled": bench_pooled, "async": bench_async}
+
+def run_benchmark(modes: List[str], count: int, concurrency: int, latency_ms: float = 0.0,
+                  fail_rate: float = 0.0) -> List[Dict[str, Any]]:
+    server = StandInServer(latency_ms=latency_ms, fail_rate=fail_rate).start()
+    reports = []
+    try:
+        for mode in modes:
+            server.reset()
+            latencies: List[float] = []
+            started = time.perf_counter()
+            outcome = MODES[mode](server.url, count, concurrency, latencies)
+            elapsed = time.perf_counter() - started
+            latencies.sort()
+            reports.append({
+                "mode": mode,
+                "requests": count,
+                "concurrency": concurrency,
+                "elapsed_s": elapsed,
+                "requests_per_s": count / elapsed if elapsed else 0.0,
+                "errors": outcome["errors"],
+                "retried": outcome.get("retried", 0),
+                "server_requests": server.requests,
+                "connections": server.connections,
+                "latency_ms": {
+                    "p50": percentile(latencies, 0.50),
+                    "p99": percentile(latencies, 0.99),
+                    "max": latencies[-1] if latencies else 0.0
+                }
+            })
+    finally:
+        server.stop()
+    return reports
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark http_request clients against a local stand-in server")
+    parser.add_argument("--requests", "-n", type=int, default=2000, help="Requests per mode")
+    parser.add_argument("--concurrency", "-c", type=int, default=16, help="Concurrent requests")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Server-side delay per request")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES), help="Client modes")
+    parser.add_argument("--format", choices=["text", "json"], default="text", help="Output format")
+    args = parser.parse_args(argv)
+
+    # Retry warnings would swamp the report when --fail-rate is set
+    logging.basicConfig(level=logging.ERROR)
+    reports = run_benchmark(args.modes, args.requests, args.concurrency, args.latency_ms, args.fail_rate)
+    if args.format == "json":
+        print(json.dumps(reports, indent=2))
+        return 0
+    print(f"{args.requests:,} POSTs per mode, concurrency {args.concurrency}, "
+          f"server latency {args.latency_ms:g}ms, fail rate {args.fail_rate:g}")
+    print(f"{'mode':<10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'conns':>8}{'retries':>9}{'errors':>8}")
+    for report in reports:
+        latency = report["latency_ms"]
+        print(f"{report['mode']:<10}{report['requests_per_s']:>10,.0f}{latency['p50']:>10.2f}"
+              f"{latency['p99']:>10.2f}{report['connections']:>8}{report['retried']:>9}{report['errors']:>8}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
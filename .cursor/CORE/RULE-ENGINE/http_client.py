@@ -0,0 +1,232 @@
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+import email.utils
+import json
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# Methods that may be sent again without changing the outcome (RFC 9110 9.2.2)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+RETRY_STATUSES = frozenset({408, 429, 500, 502, 503, 504})
+# Statuses telling the client the request was not processed, safe to retry for any method
+NOT_PROCESSED_STATUSES = frozenset({429})
+
+class HttpRequestError(Exception):
+    """An HTTP request failed after all attempts, or returned an error status"""
+
+    def __init__(self, message: str, status: Optional[int] = None, attempts: int = 0,
+                 response: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.status = status
+        self.attempts = attempts
+        self.response = response
+
+def host_key(url: str) -> str:
+    """scheme://host:port a request is pooled and limited under"""
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        raise ValueError(f"Not an absolute URL: {url}")
+    return f"{parts.scheme.lower()}://{parts.netloc.lower()}"
+
+def backoff_delay(attempt: int, base: float, cap: float, rng: random.Random) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)]"""
+    return rng.uniform(0.0, min(cap, base * (2 ** attempt)))
+
+def retry_after(value: Optional[str], cap: float) -> Optional[float]:
+    """Seconds from a Retry-After header (delta seconds or HTTP date), capped"""
+    if not value:
+        return None
+    try:
+        return min(cap, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return min(cap, max(0.0, when.timestamp() - time.time()))
+
+def is_retry_safe(method: str, headers: Optional[Dict[str, str]]) -> bool:
+    """Whether a request may be repeated after it might have reached the server"""
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    return any(name.lower() == "idempotency-key" for name in (headers or {}))
+
+def was_not_sent(error: Optional[Exception]) -> bool:
+    """Whether a requests error happened before the request reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError) and error.args:
+        return isinstance(getattr(error.args[0], "reason", None), NewConnectionError)
+    return False
+
+def decode_body(content_type: str, text: str, max_body: int) -> Any:
+    """JSON bodies as objects, anything else as (truncated) text"""
+    if "json" in (content_type or "").lower():
+        try:
+            return json.loads(text)
+        except ValueError:
+            pass
+    return text if len(text) <= max_body else text[:max_body]
+
+class HttpClient:
+    """
+    Shared, thread-safe HTTP client for the http_request action
+
+    One requests.Session keeps connections alive in a per-host pool (up to
+    per_host_limit connections for each of pool_size hosts), so repeated webhooks
+    to the same endpoint skip the TCP and TLS handshakes. A semaphore per host caps
+    concurrent requests to that host at per_host_limit; callers beyond it wait up
+    to timeout seconds for a slot.
+
+    Connection errors, timeouts and RETRY_STATUSES are retried up to `retries`
+    times with full-jitter exponential backoff (or the server's Retry-After).
+    Requests that may already have been processed are only retried when that is
+    safe: idempotent methods or an Idempotency-Key header. Other methods are only
+    retried when the connection could not be made and on 429.
+    """
+
+    def __init__(self, pool_size: int = 32, per_host_limit: int = 8, timeout: float = 10.0,
+                 connect_timeout: float = 3.0, retries: int = 3, backoff_base: float = 0.1,
+                 backoff_max: float = 5.0, max_body: int = 65536, seed: Optional[int] = None):
+        self.per_host_limit = per_host_limit
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_body = max_body
+        self.logger = logging.getLogger("HttpClient")
+        self.session = requests.Session()
+        # Retries are done here (with jitter and the idempotency rules above), not by urllib3
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=per_host_limit, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self.requests = 0
+        self.attempts = 0
+        self.retried = 0
+        self.failures = 0
+
+    def _slots(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slots = self._hosts.get(host)
+            if slots is None:
+                slots = threading.BoundedSemaphore(self.per_host_limit)
+                self._hosts[host] = slots
+            return slots
+
+    def _backoff(self, attempt: int) -> float:
+        with self._lock:
+            return backoff_delay(attempt, self.backoff_base, self.backoff_max, self._rng)
+
+    def request(self, url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None,
+                params: Optional[Dict[str, Any]] = None, json: Any = None, body: Optional[str] = None,
+                timeout: Optional[float] = None, retries: Optional[int] = None,
+                raise_for_status: bool = True) -> Dict[str, Any]:
+        """
+        Send a request and return {"status", "ok", "headers", "body", "attempts", "elapsed_ms"}.
+        Raises HttpRequestError when every attempt failed, or on a 4xx/5xx final
+        status if raise_for_status.
+        """
+        method = method.upper()
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        retry_safe = is_retry_safe(method, headers)
+        slots = self._slots(host_key(url))
+        started = time.monotonic()
+        with self._lock:
+            self.requests += 1
+
+        attempt = 0
+        while True:
+            response = None
+            error: Optional[Exception] = None
+            if not slots.acquire(timeout=timeout):
+                raise HttpRequestError(f"No free connection slot for {host_key(url)} within {timeout}s",
+                                       attempts=attempt)
+            try:
+                with self._lock:
+                    self.attempts += 1
+                response = self.session.request(
+                    method, url, headers=headers, params=params, json=json, data=body,
+                    timeout=(min(self.connect_timeout, timeout), timeout)
+                )
+                # Reading the body hands the connection back to the pool
+                text = response.text
+            except requests.RequestException as e:
+                response = None
+                error = e
+            finally:
+                slots.release()
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            retryable = (
+                retry_safe
+                or was_not_sent(error)
+                or (response is not None and response.status_code in NOT_PROCESSED_STATUSES)
+            )
+            if attempt >= retries or not retryable:
+                break
+            delay = None
+            if response is not None:
+                delay = retry_after(response.headers.get("Retry-After"), self.backoff_max)
+            if delay is None:
+                delay = self._backoff(attempt)
+            attempt += 1
+            with self._lock:
+                self.retried += 1
+            self.logger.warning(
+                f"Retrying {method} {url} in {delay:.2f}s (attempt {attempt + 1}/{retries + 1}): "
+                f"{str(error) if error is not None else response.status_code}"
+            )
+            time.sleep(delay)
+
+        attempts = attempt + 1
+        if response is None:
+            with self._lock:
+                self.failures += 1
+            raise HttpRequestError(f"{method} {url} failed after {attempts} attempts: {str(error)}",
+                                   attempts=attempts)
+        result = {
+            "status": response.status_code,
+            "ok": response.status_code < 400,
+            "headers": dict(response.headers),
+            "body": decode_body(response.headers.get("Content-Type", ""), text, self.max_body),
+            "attempts": attempts,
+            "elapsed_ms": (time.monotonic() - started) * 1000.0
+        }
+        if raise_for_status and not result["ok"]:
+            with self._lock:
+                self.failures += 1
+            raise HttpRequestError(f"{method} {url} returned {response.status_code} after {attempts} attempts",
+                                   status=response.status_code, attempts=attempts, response=result)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "retried": self.retried,
+                "failures": self.failures,
+                "hosts": len(self._hosts)
+            }
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> "HttpClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,145 @@
+from typing import Dict, Any, Callable, Optional
+import hashlib
+import mimetypes
+import os
+import threading
+
+class LazyField:
+    """
+    A context value computed on first access and memoized
+
+    ConditionEvaluator and VariableResolver resolve LazyField values transparently
+    while walking field paths, so expensive enrichment (stat, hashing, sniffing)
+    only runs for fields some rule actually reads.
+
+    identity, if given, returns a cheap value that changes whenever the computed
+    value may change (for file fields: path, mtime and size). Cache keys use it
+    instead of computing the field.
+    """
+    __slots__ = ("_compute", "_value", "_resolved", "_lock", "_identity")
+
+    def __init__(self, compute: Callable[[], Any], identity: Optional[Callable[[], Any]] = None):
+        self._compute = compute
+        self._value = None
+        self._resolved = False
+        self._lock = threading.Lock()
+        self._identity = identity
+
+    def get(self) -> Any:
+        if not self._resolved:
+            with self._lock:
+                if not self._resolved:
+                    self._value = self._compute()
+                    self._resolved = True
+                    self._compute = None
+        return self._value
+
+    @property
+    def resolved(self) -> bool:
+        return self._resolved
+
+    def fingerprint(self) -> Any:
+        """Stand-in for the value in cache keys: the identity if there is one,
+        otherwise the computed value"""
+        if self._identity is not None:
+            return ["lazy", self._identity()]
+        return self.get()
+
+    def __repr__(self) -> str:
+        return f"LazyField({self._value!r})" if self._resolved else "LazyField(<pending>)"
+
+def resolve_lazy(value: Any) -> Any:
+    """Return the computed value of a LazyField, or value unchanged"""
+    return value.get() if isinstance(value, LazyField) else value
+
+# Built-in providers. They return None when the file cannot be read, which the
+# condition evaluator treats like a missing field.
+
+def file_stat(path: str) -> Optional[os.stat_result]:
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def file_extension(path: str) -> str:
+    return os.path.splitext(path)[1].lower()
+
+MAGIC_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"\x7fELF", "application/x-executable"),
+    (b"BZh", "application/x-bzip2"),
+    (b"\xfd7zXZ\x00", "application/x-xz"),
+)
+
+def sniff_mime_type(path: str, sample_size: int = 512) -> Optional[str]:
+    """Guess a MIME type from the first bytes of a file, falling back to the name"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(sample_size)
+    except OSError:
+        return None
+
+    for signature, mime_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+
+    guessed, _ = mimetypes.guess_type(path)
+    if b"\x00" in head:
+        return guessed or "application/octet-stream"
+    try:
+        head.decode('utf-8')
+    except UnicodeDecodeError as e:
+        # A multi-byte sequence cut off by the sample boundary is still text
+        if e.start < len(head) - 3:
+            return guessed or "application/octet-stream"
+    return guessed or "text/plain"
+
+def file_hash(path: str, algorithm: str = "sha256", chunk_size: int = 1 << 20) -> Optional[str]:
+    """Hex digest of a file's content, read in chunks"""
+    try:
+        digest = hashlib.new(algorithm)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except OSError:
+        return None
+
+def file_fields(path: str) -> Dict[str, Any]:
+    """
+    Lazily enriched "file" context for a path
+
+    Only "path" and "name" are computed up front; stat, extension, MIME type and
+    content hash are LazyFields. size/mtime share a single stat call, which also
+    gives every field its identity (path, mtime, size) for cache keys.
+    """
+    stat = LazyField(lambda: file_stat(path))
+
+    def signature() -> Any:
+        result = stat.get()
+        return [path, result.st_mtime_ns, result.st_size] if result is not None else [path, None]
+
+    def lazy(compute: Callable[[], Any]) -> LazyField:
+        return LazyField(compute, identity=signature)
+
+    def from_stat(attribute: str) -> LazyField:
+        return lazy(lambda: getattr(stat.get(), attribute, None))
+
+    return {
+        "path": path,
+        "name": os.path.basename(path),
+        "directory": os.path.dirname(path),
+        "extension": LazyField(lambda: file_extension(path), identity=lambda: path),
+        "size": from_stat("st_size"),
+        "mtime": from_stat("st_mtime"),
+        "mode": from_stat("st_mode"),
+        "exists": lazy(lambda: stat.get() is not None),
+        "mime_type": lazy(lambda: sniff_mime_type(path)),
+        "sha256": lazy(lambda: file_hash(path))
+    }
@@ -0,0 +1,185 @@
+from typing import Dict, Any, Optional, Tuple
+import csv
+import mmap
+import os
+import threading
+import time
+
+class LookupSet:
+    """Membership test over an external list of values (paths, hashes, IDs, ...)"""
+
+    def __contains__(self, value: Any) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def _key(value: Any) -> Optional[str]:
+        # Entries are read from text, so compare non-string values by their string form
+        if value is None:
+            return None
+        return value if isinstance(value, str) else str(value)
+
+class FrozenLookupSet(LookupSet):
+    """Entries held in memory as a frozenset"""
+
+    def __init__(self, entries):
+        self.entries = frozenset(entries)
+
+    def __contains__(self, value: Any) -> bool:
+        key = self._key(value)
+        return key is not None and key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+class SortedFileLookupSet(LookupSet):
+    """
+    Memory-mapped text file of byte-wise sorted, newline-separated entries
+
+    Membership is a binary search over byte offsets, so the file is never loaded into
+    the Python heap and the OS page cache is shared between processes. The file must be
+    sorted (e.g. `LC_ALL=C sort -u`).
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._count: Optional[int] = None
+
+    def _line_at(self, pos: int) -> Tuple[int, int]:
+        """(start, end) of the first line starting at or after pos"""
+        if pos == 0:
+            start = 0
+        else:
+            newline = self._mm.find(b'\n', pos - 1)
+            start = self.size if newline == -1 else newline + 1
+        end = self._mm.find(b'\n', start)
+        return start, self.size if end == -1 else end
+
+    def __contains__(self, value: Any) -> bool:
+        key = self._key(value)
+        if key is None or self._mm is None:
+            return False
+        target = key.encode('utf-8')
+
+        lo, hi = 0, self.size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start, end = self._line_at(mid)
+            if start >= hi:
+                hi = mid
+                continue
+            line = self._mm[start:end].rstrip(b'\r')
+            if line == target:
+                return True
+            if line < target:
+                lo = end + 1
+            else:
+                hi = mid
+        return False
+
+    def __len__(self) -> int:
+        if self._count is None:
+            if self._mm is None:
+                self._count = 0
+            else:
+                chunk = 1 << 20
+                newlines = sum(self._mm[i:i + chunk].count(b'\n') for i in range(0, self.size, chunk))
+                self._count = newlines + (0 if self._mm[-1:] == b'\n' else 1)
+        return self._count
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+def read_entries(path: str, file_format: str = "text", column: int = 0):
+    """Yield entries from a text (one per line, '#' comments) or CSV file"""
+    with open(path, 'r', newline='' if file_format == "csv" else None) as f:
+        if file_format == "csv":
+            for row in csv.reader(f):
+                if len(row) > column and row[column].strip():
+                    yield row[column].strip()
+        elif file_format == "text":
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+        else:
+            raise ValueError(f"Unknown lookup file format: {file_format}")
+
+class LookupSetRegistry:
+    """
+    Loads each lookup file once and shares it between all rules that reference it
+
+    Files are re-stat'ed at most every check_interval seconds; when size or mtime
+    changed the set is rebuilt and swapped in, so evaluations already holding the
+    old set finish with it.
+    """
+
+    def __init__(self, check_interval: float = 1.0):
+        self.check_interval = check_interval
+        # key -> (set, (mtime_ns, size), last check time)
+        self._sets: Dict[Tuple[str, str, int, str], Tuple[LookupSet, Tuple[int, int], float]] = {}
+        self._lock = threading.Lock()
+        # Bumped on every (re)load so callers caching evaluation results can key on it
+        self.generation = 0
+        self._last_refresh = 0.0
+
+    def get(self, path: str, file_format: str = "text", column: int = 0, index: str = "set") -> LookupSet:
+        """Return the lookup set for a file, loading or reloading it as needed"""
+        key = (os.path.abspath(path), file_format, column, index)
+        entry = self._sets.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[2] < self.check_interval:
+            return entry[0]
+
+        with self._lock:
+            entry = self._sets.get(key)
+            stat = os.stat(key[0])
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if entry is not None and entry[1] == signature:
+                self._sets[key] = (entry[0], signature, now)
+                return entry[0]
+
+            lookup = self._load(key[0], file_format, column, index)
+            self._sets[key] = (lookup, signature, now)
+            self.generation += 1
+            # The replaced set is left to the garbage collector rather than closed, since
+            # an in-flight evaluation may still be probing it
+            return lookup
+
+    def _load(self, path: str, file_format: str, column: int, index: str) -> LookupSet:
+        if index == "set":
+            return FrozenLookupSet(read_entries(path, file_format, column))
+        if index == "sorted":
+            if file_format != "text":
+                raise ValueError("Sorted lookup files must be plain text, one entry per line")
+            return SortedFileLookupSet(path)
+        raise ValueError(f"Unknown lookup index type: {index}")
+
+    def refresh(self) -> int:
+        """Re-check every loaded file (throttled to check_interval) and return the
+        current generation"""
+        now = time.monotonic()
+        if now - self._last_refresh >= self.check_interval:
+            self._last_refresh = now
+            for path, file_format, column, index in list(self._sets):
+                try:
+                    self.get(path, file_format, column, index)
+                except OSError:
+                    pass
+        return self.generation
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sets.clear()
+
+# Shared by every ConditionEvaluator unless one is given its own registry
+default_registry = LookupSetRegistry()
@@ -0,0 +1,345 @@
+from bisect import bisect_right, insort
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import pickle
+import queue
+import threading
+import time
+
+from action_outbox import snapshot_context
+from condition_evaluator import ConditionEvaluator
+
+def _point(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+class HashRing:
+    """
+    Consistent hash ring with virtual nodes
+
+    Each node owns `vnodes` points on a 64-bit ring and a key belongs to the first
+    point at or after its hash. Adding or removing a node only moves the keys in
+    the ranges next to that node's points (about 1/N of all keys).
+    """
+
+    def __init__(self, vnodes: int = 64):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: Dict[int, Hashable] = {}
+
+    def add(self, node: Hashable) -> None:
+        for i in range(self.vnodes):
+            point = _point(f"{node}#{i}")
+            if point not in self._owners:
+                self._owners[point] = node
+                insort(self._points, point)
+
+    def remove(self, node: Hashable) -> None:
+        points = [point for point, owner in self._owners.items() if owner == node]
+        for point in points:
+            del self._owners[point]
+        self._points = [point for point in self._points if point in self._owners]
+
+    def nodes(self) -> List[Hashable]:
+        return sorted(set(self._owners.values()), key=str)
+
+    def owner(self, key: str) -> Hashable:
+        if not self._points:
+            raise LookupError("Hash ring is empty")
+        index = bisect_right(self._points, _point(key)) % len(self._points)
+        return self._owners[self._points[index]]
+
+@dataclass
+class PartitionResult:
+    seq: int
+    key: Optional[str]
+    worker: int
+    results: Any = None
+    error: Optional[str] = None
+
+def _worker_main(worker_id: int, inbox, outbox, engine_kwargs: Dict[str, Any], mode: str) -> None:
+    """Worker process: one RuleEngine fed from this worker's inbox, in order"""
+    from engine import RuleEngine
+
+    engine = RuleEngine(**engine_kwargs)
+    evaluate = engine.match_rules if mode == "match" else engine.evaluate_rules
+    processed = 0
+    while True:
+        message = inbox.get()
+        kind = message[0]
+        if kind == "event":
+            _, seq, key, payload = message
+            try:
+                context = pickle.loads(payload)
+                outbox.put(("result", worker_id, seq, key, evaluate(context), None))
+            except Exception as e:
+                outbox.put(("result", worker_id, seq, key, None, str(e)))
+            processed += 1
+        elif kind == "barrier":
+            outbox.put(("barrier", worker_id, message[1]))
+        elif kind == "stop":
+            outbox.put(("stopped", worker_id, processed))
+            return
+
+class PartitionedRunner:
+    """
+    Runs RuleEngine in N worker processes, partitioned by an event key
+
+    Events are routed by consistent hashing of key_field (default file.path), so
+    every event for one key goes to the same worker, whose inbox is FIFO: events
+    with the same key are evaluated in submission order, while different keys run
+    in parallel. Events without a key are spread round robin.
+
+    add_worker() and remove_worker() rebalance the ring. Ordering survives a
+    rebalance because routing pauses while a barrier drains every worker; only
+    then do moved keys start going to their new owner. Stateful components
+    (aggregates, delta state) are per worker and are not migrated: a moved key
+    starts with fresh state on its new worker. Workers that die are dropped from
+    the ring by check_workers(); their unprocessed events are reported as lost.
+
+    Results go to handler(PartitionResult) on a collector thread, or are queued for
+    results(). Each worker builds its own engine from engine_kwargs; mode "match"
+    returns rule ids only, "evaluate" runs actions too.
+    """
+
+    def __init__(self, workers: int = 4, key_field: str = "file.path",
+                 engine_kwargs: Optional[Dict[str, Any]] = None, mode: str = "evaluate",
+                 handler: Optional[Callable[[PartitionResult], Any]] = None, vnodes: int = 64,
+                 max_queue: int = 10000, start_method: str = "spawn"):
+        if mode not in ("evaluate", "match"):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.initial_workers = workers
+        self.key_field = key_field
+        self.engine_kwargs = engine_kwargs or {}
+        self.mode = mode
+        self.handler = handler
+        self.max_queue = max_queue
+        self.logger = logging.getLogger("PartitionedRunner")
+        self._mp = multiprocessing.get_context(start_method)
+        self._outbox = self._mp.Queue()
+        self._ring = HashRing(vnodes)
+        self._workers: Dict[int, Tuple[Any, Any]] = {}  # worker id -> (process, inbox)
+        self._worker_ids = itertools.count()
+        self._seq = itertools.count()
+        self._round_robin = itertools.count()
+        self._evaluator = ConditionEvaluator()
+        self._route_lock = threading.Lock()
+        self._state = threading.Condition()
+        self._acks: Dict[int, set] = {}
+        self._barrier_ids = itertools.count()
+        self._in_flight: Dict[int, int] = {}  # worker id -> submitted but not finished
+        self._results: "queue.Queue[PartitionResult]" = queue.Queue()
+        self._collector: Optional[threading.Thread] = None
+        self._running = False
+        self.submitted = 0
+        self.completed = 0
+        self.lost = 0
+        self.rebalances = 0
+
+    def start(self) -> "PartitionedRunner":
+        self._running = True
+        self._collector = threading.Thread(target=self._collect, name="PartitionedRunner-collector", daemon=True)
+        self._collector.start()
+        for _ in range(self.initial_workers):
+            self.add_worker()
+        return self
+
+    def _spawn(self) -> int:
+        worker_id = next(self._worker_ids)
+        inbox = self._mp.Queue(self.max_queue)
+        process = self._mp.Process(
+            target=_worker_main, args=(worker_id, inbox, self._outbox, self.engine_kwargs, self.mode),
+            name=f"rule-worker-{worker_id}", daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = (process, inbox)
+        with self._state:
+            self._in_flight[worker_id] = 0
+        return worker_id
+
+    def key_of(self, context: Dict[str, Any]) -> Optional[str]:
+        value = self._evaluator._get_field_value(context, self.key_field)
+        return None if value is None else str(value)
+
+    def owner(self, key: str) -> int:
+        return self._ring.owner(key)
+
+    def submit(self, context: Dict[str, Any]) -> int:
+        """Route one event to its key's worker; returns its sequence number.
+
+        The context is copied into plain data (lazy fields computed, per-event
+        artifacts dropped) and pickled here, so an event that cannot be sent raises
+        to the caller instead of being dropped by the queue's feeder thread."""
+        key = self.key_of(context)
+        payload = pickle.dumps(snapshot_context(context, resolve=True), protocol=pickle.HIGHEST_PROTOCOL)
+        with self._route_lock:
+            if not self._workers:
+                raise RuntimeError("No workers running")
+            if key is None:
+                workers = sorted(self._workers)
+                worker_id = workers[next(self._round_robin) % len(workers)]
+            else:
+                worker_id = self._ring.owner(key)
+            seq = next(self._seq)
+            with self._state:
+                self._in_flight[worker_id] += 1
+                self.submitted += 1
+            self._workers[worker_id][1].put(("event", seq, key, payload))
+        return seq
+
+    def add_worker(self) -> int:
+        """Start a worker and give it its share of the key space"""
+        with self._route_lock:
+            self._drain_barrier()
+            worker_id = self._spawn()
+            self._ring.add(worker_id)
+        self.rebalances += 1
+        self.logger.info(f"Worker {worker_id} joined ({len(self._workers)} workers)")
+        return worker_id
+
+    def remove_worker(self, worker_id: int, timeout: Optional[float] = 30.0) -> bool:
+        """Drain a worker, stop it and hand its keys to the remaining workers"""
+        with self._route_lock:
+            if worker_id not in self._workers:
+                return False
+            self._ring.remove(worker_id)
+            process, inbox = self._workers.pop(worker_id)
+            # The stop message queues behind the worker's pending events, so
+            # joining it drains them before the keys move anywhere else
+            inbox.put(("stop",))
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            with self._state:
+                # Results written before the worker exited may still be in transit
+                self._state.wait_for(lambda: not self._in_flight.get(worker_id), timeout=5.0)
+            self._forget(worker_id)
+        self.rebalances += 1
+        self.logger.info(f"Worker {worker_id} left ({len(self._workers)} workers)")
+        return True
+
+    def check_workers(self) -> List[int]:
+        """Drop workers whose process died; returns their ids"""
+        with self._route_lock:
+            dead = [worker_id for worker_id, (process, _) in self._workers.items() if not process.is_alive()]
+            for worker_id in dead:
+                self._ring.remove(worker_id)
+                del self._workers[worker_id]
+                self._forget(worker_id)
+                self.logger.error(f"Worker {worker_id} died; its keys moved to the remaining workers")
+        return dead
+
+    def _forget(self, worker_id: int) -> None:
+        with self._state:
+            lost = self._in_flight.pop(worker_id, 0)
+            self.lost += lost
+            self._state.notify_all()
+        if lost:
+            self.logger.error(f"{lost} events for worker {worker_id} were not processed")
+
+    def _drain_barrier(self, timeout: Optional[float] = 60.0) -> bool:
+        """Wait until every worker has finished everything queued before this call.
+        Called with _route_lock held, so nothing new is routed meanwhile."""
+        if not self._workers:
+            return True
+        barrier = next(self._barrier_ids)
+        expected = set(self._workers)
+        with self._state:
+            self._acks[barrier] = set()
+        for _, inbox in self._workers.values():
+            inbox.put(("barrier", barrier))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._state:
+            while True:
+                # Workers that died meanwhile have left _in_flight and are not waited for
+                pending = (expected & set(self._in_flight)) - self._acks[barrier]
+                if not pending:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    self.logger.warning(f"Rebalance barrier timed out waiting for workers {sorted(pending)}")
+                    break
+                self._state.wait(remaining)
+            del self._acks[barrier]
+        return not pending
+
+    def _collect(self) -> None:
+        while self._running or any(self._in_flight.values()):
+            try:
+                message = self._outbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "result":
+                _, worker_id, seq, key, results, error = message
+                result = PartitionResult(seq=seq, key=key, worker=worker_id, results=results, error=error)
+                if self.handler is not None:
+                    try:
+                        self.handler(result)
+                    except Exception as e:
+                        self.logger.error(f"Error in result handler for event {seq}: {str(e)}")
+                else:
+                    self._results.put(result)
+                with self._state:
+                    if worker_id in self._in_flight:
+                        self._in_flight[worker_id] -= 1
+                    self.completed += 1
+                    self._state.notify_all()
+            elif kind == "barrier":
+                with self._state:
+                    if message[2] in self._acks:
+                        self._acks[message[2]].add(message[1])
+                    self._state.notify_all()
+
+    def results(self, timeout: Optional[float] = 0.0) -> List[PartitionResult]:
+        """Collected results (when no handler is set); waits up to timeout for the first"""
+        collected: List[PartitionResult] = []
+        try:
+            collected.append(self._results.get(timeout=timeout) if timeout else self._results.get_nowait())
+            while True:
+                collected.append(self._results.get_nowait())
+        except queue.Empty:
+            pass
+        return collected
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted event has been processed (or lost)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._state:
+            while self.completed + self.lost < self.submitted:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._state.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._state:
+            return {
+                "workers": sorted(self._workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "lost": self.lost,
+                "in_flight": dict(self._in_flight),
+                "rebalances": self.rebalances
+            }
+
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """Process everything already submitted, then stop all workers"""
+        for worker_id in list(self._workers):
+            self.remove_worker(worker_id, timeout)
+        self._running = False
+        if self._collector is not None:
+            self._collector.join(timeout)
+
+    def __enter__(self) -> "PartitionedRunner":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
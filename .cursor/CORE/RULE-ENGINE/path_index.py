@@ -0,0 +1,188 @@
+from functools import lru_cache
+from pathlib import PurePosixPath
+from typing import Dict, Any, Iterable, List, Optional, Pattern, Set, Tuple
+import re
+
+PATH_OPERATORS = ("path_under", "path_glob", "extension_in")
+GLOB_CHARS = set("*?[")
+
+def normalize_path(path: Any) -> Optional[str]:
+    """Posix form of a path with '\\' separators converted, or None for non-strings"""
+    if not isinstance(path, str) or not path:
+        return None
+    return PurePosixPath(path.replace('\\', '/')).as_posix()
+
+def path_parts(path: str) -> Tuple[str, ...]:
+    return PurePosixPath(path).parts
+
+def _as_list(value: Any) -> List[str]:
+    return [value] if isinstance(value, str) else list(value or [])
+
+@lru_cache(maxsize=4096)
+def compile_glob(pattern: str) -> Pattern:
+    """
+    Compile a path glob: '*' and '?' stay inside one path component, '**' spans any
+    number of components and '[...]' is a character class ('[!...]' negates)
+    """
+    pattern = normalize_path(pattern) or ""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern[i:i + 3] == '**/':
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern[i:i + 2] == '**':
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return re.compile(''.join(out) + r'\Z')
+
+def normalize_extension(ext: str) -> str:
+    ext = ext.lower()
+    return ext if ext.startswith('.') else '.' + ext
+
+def path_under(path: Any, prefixes: Any) -> bool:
+    """True if path equals or lies below any of the prefix directories"""
+    normalized = normalize_path(path)
+    if normalized is None:
+        return False
+    parts = path_parts(normalized)
+    for prefix in _as_list(prefixes):
+        prefix_parts = path_parts(normalize_path(prefix) or "")
+        if parts[:len(prefix_parts)] == prefix_parts:
+            return True
+    return False
+
+def path_glob(path: Any, patterns: Any) -> bool:
+    """True if path matches any of the globs"""
+    normalized = normalize_path(path)
+    if normalized is None:
+        return False
+    return any(compile_glob(pattern).match(normalized) for pattern in _as_list(patterns))
+
+def extension_in(path: Any, extensions: Any) -> bool:
+    """True if the path's (case-insensitive) suffix is one of extensions"""
+    normalized = normalize_path(path)
+    if normalized is None:
+        return False
+    suffix = PurePosixPath(normalized).suffix.lower()
+    return bool(suffix) and suffix in {normalize_extension(ext) for ext in _as_list(extensions)}
+
+class _TrieNode:
+    __slots__ = ("children", "under", "globs")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.under: Set[str] = set()
+        self.globs: List[Tuple[Pattern, str]] = []
+
+class PathIndex:
+    """
+    Routes file events to the rules that can possibly match them
+
+    A rule is "gated" when its conditions are a conjunction containing a path operator
+    (path_under, path_glob or extension_in): it can only fire if that predicate holds.
+    Gates are indexed per field in a trie of path components. path_under prefixes are
+    stored at their node, globs at the node of their literal (wildcard-free) leading
+    components, and extensions in a dict. One walk down the event path therefore finds
+    every gate that passes, so routing cost follows path depth, not rule count.
+    """
+
+    def __init__(self):
+        self.roots: Dict[str, _TrieNode] = {}
+        self.extensions: Dict[str, Dict[str, Set[str]]] = {}
+        self.gated: Set[str] = set()
+
+    @staticmethod
+    def gate_of(conditions: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """The first path predicate that every match of conditions must satisfy"""
+        if not conditions:
+            return None
+        if "conditions" not in conditions:
+            leaves = [conditions]
+        elif conditions.get("operator", "and").lower() == "and":
+            leaves = [c for c in conditions.get("conditions", []) if "conditions" not in c]
+        else:
+            return None
+        for leaf in leaves:
+            if leaf.get("operator") in PATH_OPERATORS and leaf.get("field") and "value" in leaf:
+                return leaf
+        return None
+
+    def add(self, rule_id: str, gate: Dict[str, Any]) -> None:
+        field, op, value = gate["field"], gate["operator"], gate["value"]
+        self.gated.add(rule_id)
+        if op == "extension_in":
+            by_ext = self.extensions.setdefault(field, {})
+            for ext in _as_list(value):
+                by_ext.setdefault(normalize_extension(ext), set()).add(rule_id)
+            return
+
+        root = self.roots.setdefault(field, _TrieNode())
+        for entry in _as_list(value):
+            normalized = normalize_path(entry) or ""
+            parts = path_parts(normalized)
+            if op == "path_glob":
+                literal = []
+                for part in parts:
+                    if GLOB_CHARS & set(part):
+                        break
+                    literal.append(part)
+                node = self._node(root, literal)
+                node.globs.append((compile_glob(entry), rule_id))
+            else:
+                self._node(root, parts).under.add(rule_id)
+
+    def _node(self, root: _TrieNode, parts: Iterable[str]) -> _TrieNode:
+        node = root
+        for part in parts:
+            node = node.children.setdefault(part, _TrieNode())
+        return node
+
+    def lookup(self, context: Dict[str, Any], get_value) -> Set[str]:
+        """Ids of gated rules whose gate passes for context; get_value(context, field)
+        reads a field"""
+        passed: Set[str] = set()
+        for field, by_ext in self.extensions.items():
+            normalized = normalize_path(get_value(context, field))
+            if normalized is not None:
+                passed.update(by_ext.get(PurePosixPath(normalized).suffix.lower(), ()))
+
+        for field, root in self.roots.items():
+            normalized = normalize_path(get_value(context, field))
+            if normalized is None:
+                continue
+            node = root
+            self._collect(node, normalized, passed)
+            for part in path_parts(normalized):
+                node = node.children.get(part)
+                if node is None:
+                    break
+                self._collect(node, normalized, passed)
+        return passed
+
+    @staticmethod
+    def _collect(node: _TrieNode, path: str, passed: Set[str]) -> None:
+        passed.update(node.under)
+        for pattern, rule_id in node.globs:
+            if rule_id not in passed and pattern.match(path):
+                passed.add(rule_id)
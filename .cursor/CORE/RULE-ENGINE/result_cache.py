@@ -0,0 +1,54 @@
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Tuple
+import threading
+
+class ResultCache:
+    """Thread-safe LRU cache of rule match sets keyed by a context fingerprint"""
+
+    def __init__(self, max_size: int = 4096):
+        if max_size <= 0:
+            raise ValueError("max_size must be positive")
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, ...]]:
+        """Return the cached match set for key, or None on a miss"""
+        with self._lock:
+            matched = self._entries.get(key)
+            if matched is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return matched
+
+    def put(self, key: Hashable, matched: Tuple[str, ...]) -> None:
+        """Store a match set, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = matched
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss statistics"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
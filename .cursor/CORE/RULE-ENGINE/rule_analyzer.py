@@ -0,0 +1,287 @@
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Dict, Any, List, Mapping, Optional, Set, Tuple
+import json
+import math
+
+if TYPE_CHECKING:
+    from engine import Rule
+
+@dataclass
+class AnalysisReport:
+    """Findings of a static pass over a rule set"""
+    dead: Dict[str, str] = field(default_factory=dict)            # rule_id -> reason
+    duplicates: Dict[str, str] = field(default_factory=dict)      # rule_id -> kept rule_id
+    shadowed: Dict[str, str] = field(default_factory=dict)        # rule_id -> shadowing rule_id
+    condition_groups: List[List[str]] = field(default_factory=list)  # rules sharing one condition tree
+    rules_before: int = 0
+    rules_after: int = 0
+
+    def eliminated(self, include_shadowed: bool = False, include_duplicates: bool = False) -> Set[str]:
+        """Rule ids a minimized rule set leaves out"""
+        ids = set(self.dead)
+        if include_duplicates:
+            ids |= set(self.duplicates)
+        if include_shadowed:
+            ids |= set(self.shadowed)
+        return ids
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dead": self.dead,
+            "duplicates": self.duplicates,
+            "shadowed": self.shadowed,
+            "condition_groups": self.condition_groups,
+            "rules_before": self.rules_before,
+            "rules_after": self.rules_after
+        }
+
+class RuleAnalyzer:
+    """
+    Static analysis of rule conditions
+
+    Condition trees are canonicalized (operators lower-cased, nested groups of the same
+    operator flattened, children de-duplicated) and compared through key(), which
+    ignores child order, so structurally equal trees compare equal. Canonical trees
+    keep the author's child order: it is the evaluation (short-circuit) order, and
+    cheap guards written first must keep skipping expensive or None-sensitive checks. On top of that the analyzer finds:
+      - dead rules: conditions that can never hold (e.g. eq 1 and eq 2 on one field)
+      - duplicates: same conditions and same actions as a higher-priority rule
+      - shadowed rules: a higher-priority rule fires whenever this one does, so it
+        never wins under first-match evaluation
+    The checks are conservative; a rule is only reported when the finding is certain.
+    """
+
+    def canonicalize(self, conditions: Dict[str, Any]) -> Dict[str, Any]:
+        """Return a normalized copy of a condition tree"""
+        if not conditions:
+            return {}
+        if "conditions" not in conditions:
+            # Keep every key: leaves may carry extra sources such as value_file
+            leaf = dict(conditions)
+            leaf.setdefault("value", None)
+            return leaf
+
+        op = conditions.get("operator", "and").lower()
+        children: Dict[str, Dict[str, Any]] = {}
+        for child in conditions.get("conditions", []):
+            canonical = self.canonicalize(child)
+            if not canonical:
+                # An empty group is always true: neutral in "and", decisive in "or"
+                if op == "or":
+                    return {}
+                continue
+            if "conditions" in canonical and canonical["operator"] == op:
+                for grandchild in canonical["conditions"]:
+                    children.setdefault(self.key(grandchild), grandchild)
+            else:
+                children.setdefault(self.key(canonical), canonical)
+
+        if not children:
+            # and([]) is always true, or([]) never is
+            return {} if op == "and" else {"operator": "or", "conditions": []}
+        if len(children) == 1:
+            return next(iter(children.values()))
+        return {"operator": op, "conditions": list(children.values())}
+
+    def key(self, conditions: Dict[str, Any]) -> str:
+        """Stable string key for a (canonical) condition tree, independent of child order"""
+        return json.dumps(self._sorted(conditions), sort_keys=True, default=repr)
+
+    def _sorted(self, conditions: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of a tree with every group's children sorted, for comparison only"""
+        if "conditions" not in conditions:
+            return conditions
+        children = [self._sorted(child) for child in conditions["conditions"]]
+        children.sort(key=lambda child: json.dumps(child, sort_keys=True, default=repr))
+        return dict(conditions, conditions=children)
+
+    def is_unsatisfiable(self, conditions: Dict[str, Any]) -> Optional[str]:
+        """Return a reason if a canonical condition tree can never be true"""
+        if not conditions:
+            return None
+        if "conditions" not in conditions:
+            return self._leaf_conflict([conditions])
+
+        children = conditions["conditions"]
+        if conditions["operator"] == "or":
+            if not children:
+                return "empty 'or' group"
+            reasons = [self.is_unsatisfiable(child) for child in children]
+            if all(reasons):
+                return "every 'or' branch is unsatisfiable"
+            return None
+
+        for child in children:
+            if "conditions" in child:
+                reason = self.is_unsatisfiable(child)
+                if reason:
+                    return reason
+        return self._leaf_conflict([child for child in children if "conditions" not in child])
+
+    def _leaf_conflict(self, leaves: List[Dict[str, Any]]) -> Optional[str]:
+        """Check a conjunction of leaf predicates for contradictions, per field"""
+        by_field: Dict[str, List[Dict[str, Any]]] = {}
+        for leaf in leaves:
+            by_field.setdefault(leaf["field"], []).append(leaf)
+
+        for field_path, preds in by_field.items():
+            equals: List[Any] = []
+            not_equals: List[Any] = []
+            allowed: Optional[List[Any]] = None
+            denied: List[Any] = []
+            lower, lower_strict = -math.inf, False
+            upper, upper_strict = math.inf, False
+            empty = not_empty = False
+
+            for pred in preds:
+                op, value = pred["operator"], pred["value"]
+                if op == "eq":
+                    equals.append(value)
+                elif op == "ne":
+                    not_equals.append(value)
+                elif op == "in" and isinstance(value, list):
+                    allowed = value if allowed is None else [v for v in allowed if v in value]
+                elif op == "not_in" and isinstance(value, list):
+                    denied.extend(value)
+                elif op in ("gt", "ge") and _is_number(value):
+                    strict = op == "gt"
+                    if value > lower or (value == lower and strict):
+                        lower, lower_strict = value, strict
+                elif op in ("lt", "le") and _is_number(value):
+                    strict = op == "lt"
+                    if value < upper or (value == upper and strict):
+                        upper, upper_strict = value, strict
+                elif op == "empty":
+                    empty = True
+                elif op == "not_empty":
+                    not_empty = True
+
+            if empty and not_empty:
+                return f"{field_path}: both empty and not_empty"
+            if any(a != b for a in equals for b in equals):
+                return f"{field_path}: equal to several different values"
+            if lower > upper or (lower == upper and (lower_strict or upper_strict)):
+                return f"{field_path}: empty numeric range"
+            if allowed is not None and not [v for v in allowed if v not in denied]:
+                return f"{field_path}: no value left in 'in' list"
+            for value in equals:
+                if value in not_equals:
+                    return f"{field_path}: eq and ne {value!r}"
+                if allowed is not None and value not in allowed:
+                    return f"{field_path}: eq {value!r} not in 'in' list"
+                if value in denied:
+                    return f"{field_path}: eq {value!r} is in 'not_in' list"
+                if _is_number(value) and (
+                    value < lower or (value == lower and lower_strict)
+                    or value > upper or (value == upper and upper_strict)
+                ):
+                    return f"{field_path}: eq {value!r} outside numeric range"
+        return None
+
+    def _conjuncts(self, conditions: Dict[str, Any]) -> Optional[Set[str]]:
+        """Keys of the top-level conjuncts of a canonical tree, or None for an 'or' root"""
+        if not conditions:
+            return set()
+        if "conditions" not in conditions:
+            return {self.key(conditions)}
+        if conditions["operator"] != "and":
+            return {self.key(conditions)}
+        return {self.key(child) for child in conditions["conditions"]}
+
+    def analyze(self, rules: Mapping[str, "Rule"]) -> AnalysisReport:
+        """Analyze the active rules of a rule set"""
+        active = sorted(
+            (rule for rule in rules.values() if rule.is_active),
+            key=lambda x: (-x.priority, x.id)
+        )
+        report = AnalysisReport(rules_before=len(active))
+
+        canonical: Dict[str, Dict[str, Any]] = {}
+        groups: Dict[str, List[str]] = {}
+        for rule in active:
+            tree = self.canonicalize(rule.conditions)
+            canonical[rule.id] = tree
+            reason = self.is_unsatisfiable(tree)
+            if reason:
+                report.dead[rule.id] = reason
+                continue
+            groups.setdefault(self.key(tree), []).append(rule.id)
+
+        # Same conditions and same actions: keep the highest-priority copy
+        seen_actions: Dict[Tuple[str, str], str] = {}
+        for rule in active:
+            if rule.id in report.dead:
+                continue
+            signature = (self.key(canonical[rule.id]), self.key(rule.actions))
+            if signature in seen_actions:
+                report.duplicates[rule.id] = seen_actions[signature]
+            else:
+                seen_actions[signature] = rule.id
+
+        report.condition_groups = [ids for ids in groups.values() if len(ids) > 1]
+
+        # Shadowing: a strictly higher-priority rule whose conjuncts are a subset of ours
+        survivors = [rule for rule in active if rule.id not in report.dead and rule.id not in report.duplicates]
+        anchors: Dict[str, List[Tuple["Rule", Set[str]]]] = {}
+        always_true: Optional["Rule"] = None
+        for rule in survivors:
+            conjuncts = self._conjuncts(canonical[rule.id])
+            if conjuncts is not None and conjuncts:
+                # Index each rule under one conjunct; a superset must contain it
+                anchors.setdefault(min(conjuncts), []).append((rule, conjuncts))
+
+        for rule in survivors:
+            conjuncts = self._conjuncts(canonical[rule.id])
+            if always_true is not None and always_true.priority > rule.priority:
+                report.shadowed[rule.id] = always_true.id
+                continue
+            if not conjuncts:
+                if always_true is None:
+                    always_true = rule
+                continue
+            for conjunct in conjuncts:
+                for other, other_conjuncts in anchors.get(conjunct, ()):
+                    if other.priority > rule.priority and other_conjuncts <= conjuncts:
+                        report.shadowed[rule.id] = other.id
+                        break
+                if rule.id in report.shadowed:
+                    break
+
+        return report
+
+    def minimize(self, rules: Mapping[str, "Rule"], drop_shadowed: bool = False,
+                 drop_duplicates: bool = False) -> Tuple[Dict[str, "Rule"], AnalysisReport]:
+        """
+        Build a minimized copy of a rule set
+
+        Dead rules (and shadowed or duplicate ones if drop_shadowed / drop_duplicates)
+        are kept but marked inactive; rules with identical canonical conditions (same
+        child order too) share one condition tree. Shadowed and duplicate rules are kept by default
+        because every matching rule fires under the default evaluation mode: two
+        identical rules run their actions twice. Drop them only for first-match or
+        top-k evaluation.
+        """
+        report = self.analyze(rules)
+        eliminated = report.eliminated(include_shadowed=drop_shadowed, include_duplicates=drop_duplicates)
+
+        shared: Dict[str, Dict[str, Any]] = {}
+        minimized: Dict[str, "Rule"] = {}
+        for rule_id, rule in rules.items():
+            if rule_id in eliminated:
+                minimized[rule_id] = replace(rule, is_active=False)
+            elif rule.is_active:
+                tree = self.canonicalize(rule.conditions)
+                if tree and "conditions" not in tree:
+                    # The evaluator expects an and/or group at the root
+                    tree = {"operator": "and", "conditions": [tree]}
+                # Share only trees that also list their children in the same order
+                tree = shared.setdefault(json.dumps(tree, sort_keys=True, default=repr), tree)
+                minimized[rule_id] = replace(rule, conditions=tree)
+            else:
+                minimized[rule_id] = rule
+
+        report.rules_after = sum(1 for rule in minimized.values() if rule.is_active)
+        return minimized, report
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
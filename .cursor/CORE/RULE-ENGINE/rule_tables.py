@@ -0,0 +1,147 @@
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, Set, Tuple
+import json
+import re
+
+from condition_evaluator import ConditionEvaluator
+from variable_resolver import VariableResolver
+
+if TYPE_CHECKING:
+    from engine import Rule
+
+PARAM_PREFIX = "${param."
+WHOLE_PARAM = re.compile(r'^\$\{param\.([^}]+)\}$')
+
+class RuleTable:
+    """
+    A rule template plus a table of parameter rows
+
+    Instead of one rule per literal value, a table stores a single condition/action
+    skeleton and a compact list of rows. key_fields maps row parameters to context
+    fields; matching looks up the tuple of those context values in a hash index, so
+    the cost per event is one lookup no matter how many rows the table has.
+
+    Table format:
+    {
+        "id": "backup_per_directory",
+        "name": "Backup ${param.dir}",
+        "priority": 1,
+        "is_active": true,
+        "key_fields": {"dir": "file.directory"},
+        "conditions": {...},            # shared skeleton, may use ${param.x}
+        "actions": [...],               # may use ${param.x} and ordinary ${context.paths}
+        "rows": [{"dir": "src", "backup_dir": "backups/src"}, ...]
+    }
+
+    Each matching row behaves like a rule with id "<table id>:<row id>", where the row
+    id is the row's "id" entry or its index.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.id: str = data["id"]
+        if ":" in self.id:
+            raise ValueError(f"Rule table id may not contain ':': {self.id}")
+        self.data = data
+        self.priority: int = data.get("priority", 0)
+        self.is_active: bool = data.get("is_active", True)
+        self.key_fields: Dict[str, str] = data.get("key_fields", {})
+        if not self.key_fields:
+            raise ValueError(f"Rule table {self.id} has no key_fields")
+        self.params: Tuple[str, ...] = tuple(sorted(self.key_fields))
+        self.conditions: Dict[str, Any] = data.get("conditions", {})
+        self.actions = data.get("actions", [])
+        self.rows: List[Dict[str, Any]] = data.get("rows", [])
+        # Conditions without row parameters are evaluated once per event, not per row
+        self.per_row_conditions = PARAM_PREFIX in json.dumps(self.conditions)
+
+        self._resolver = VariableResolver()
+        self._row_rules: Dict[str, "Rule"] = {}
+        self.row_ids: List[str] = []
+        self.rows_by_id: Dict[str, int] = {}
+        self.index: Dict[Tuple[Any, ...], List[int]] = {}
+        for i, row in enumerate(self.rows):
+            row_id = str(row.get("id", i))
+            if row_id in self.rows_by_id:
+                raise ValueError(f"Duplicate row id in rule table {self.id}: {row_id}")
+            self.row_ids.append(row_id)
+            self.rows_by_id[row_id] = i
+            key = tuple(_hashable(row.get(param)) for param in self.params)
+            self.index.setdefault(key, []).append(i)
+
+    @classmethod
+    def from_file(cls, path: str) -> "RuleTable":
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def referenced_fields(self, evaluator: ConditionEvaluator) -> Set[str]:
+        """Context fields this table reads"""
+        return set(self.key_fields.values()) | evaluator.referenced_fields(self.conditions)
+
+    def match(self, context: Dict[str, Any], evaluator: ConditionEvaluator) -> List["Rule"]:
+        """Return the row rules matching context"""
+        if not self.is_active:
+            return []
+        key = tuple(_hashable(evaluator._get_field_value(context, self.key_fields[p])) for p in self.params)
+        try:
+            candidates = self.index.get(key)
+        except TypeError:
+            return []
+        if not candidates:
+            return []
+
+        if not self.per_row_conditions:
+            if not evaluator.evaluate(self.conditions, context):
+                return []
+            return [self.row_rule(self.row_ids[i]) for i in candidates]
+
+        hits = []
+        for i in candidates:
+            rule = self.row_rule(self.row_ids[i])
+            if evaluator.evaluate(rule.conditions, context):
+                hits.append(rule)
+        return hits
+
+    def row_rule(self, row_id: str) -> "Rule":
+        """Materialize (and memoize) the rule for one row"""
+        rule = self._row_rules.get(row_id)
+        if rule is None:
+            from engine import Rule
+
+            row = self.rows[self.rows_by_id[row_id]]
+            rule = Rule(
+                id=f"{self.id}:{row_id}",
+                name=self._bind(self.data.get("name", self.id), row),
+                pattern=self.data.get("pattern", ""),
+                priority=self.priority,
+                is_active=self.is_active,
+                description=self.data.get("description", ""),
+                created_at=self.data.get("created_at", ""),
+                updated_at=self.data.get("updated_at", ""),
+                tags=self.data.get("tags", []),
+                # Only ${param.x} placeholders resolve here; context variables are left
+                # for action execution because they are absent from params
+                conditions=self._bind(self.conditions, row),
+                actions=self._bind(self.actions, row),
+                metadata=dict(self.data.get("metadata", {}), table_id=self.id, row_id=row_id)
+            )
+            self._row_rules[row_id] = rule
+        return rule
+
+    def _bind(self, template: Any, row: Dict[str, Any]) -> Any:
+        """Substitute ${param.x} placeholders, keeping the row value's type when the
+        placeholder is the whole string"""
+        if isinstance(template, str):
+            whole = WHOLE_PARAM.match(template)
+            if whole and whole.group(1) in row:
+                return row[whole.group(1)]
+            return self._resolver.resolve(template, {"param": row})
+        if isinstance(template, dict):
+            return {key: self._bind(value, row) for key, value in template.items()}
+        if isinstance(template, list):
+            return [self._bind(item, row) for item in template]
+        return template
+
+def _hashable(value: Any) -> Any:
+    """Index lists as tuples so list-valued fields can be keys"""
+    if isinstance(value, list):
+        return tuple(_hashable(v) for v in value)
+    return value
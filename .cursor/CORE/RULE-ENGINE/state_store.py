@@ -0,0 +1,290 @@
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional, Tuple
+import atexit
+import dbm
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+# Marks a cached entry as deleted until the next flush
+_DELETED = object()
+_MISSING = object()
+
+class StateBackend:
+    """Durable storage behind a StateStore; values are JSON strings"""
+
+    def load(self, namespace: str, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def write_many(self, items: List[Tuple[str, str, Optional[str]]]) -> None:
+        """Apply (namespace, key, value) writes in one commit; value None deletes"""
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class SqliteStateBackend(StateBackend):
+    """state(namespace, key, value) in a SQLite database in WAL mode"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+        self._lock = threading.Lock()
+
+    def load(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM state WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def write_many(self, items: List[Tuple[str, str, Optional[str]]]) -> None:
+        upserts = [item for item in items if item[2] is not None]
+        deletes = [(namespace, key) for namespace, key, value in items if value is None]
+        with self._lock, self.conn:
+            if upserts:
+                self.conn.executemany(
+                    "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                    upserts
+                )
+            if deletes:
+                self.conn.executemany("DELETE FROM state WHERE namespace = ? AND key = ?", deletes)
+
+    def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self.conn.execute("SELECT key FROM state WHERE namespace = ?", (namespace,))]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+class DbmStateBackend(StateBackend):
+    """Standard-library dbm file; keys are "<namespace>\\x1f<key>" """
+
+    SEPARATOR = "\x1f"
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db = dbm.open(path, 'c')
+        self._lock = threading.Lock()
+
+    def load(self, namespace: str, key: str) -> Optional[str]:
+        with self._lock:
+            value = self.db.get(f"{namespace}{self.SEPARATOR}{key}".encode("utf-8"))
+        return None if value is None else value.decode("utf-8")
+
+    def write_many(self, items: List[Tuple[str, str, Optional[str]]]) -> None:
+        with self._lock:
+            for namespace, key, value in items:
+                db_key = f"{namespace}{self.SEPARATOR}{key}".encode("utf-8")
+                if value is None:
+                    if db_key in self.db:
+                        del self.db[db_key]
+                else:
+                    self.db[db_key] = value.encode("utf-8")
+            if hasattr(self.db, "sync"):
+                self.db.sync()
+
+    def keys(self, namespace: str) -> List[str]:
+        prefix = f"{namespace}{self.SEPARATOR}".encode("utf-8")
+        with self._lock:
+            return [key[len(prefix):].decode("utf-8") for key in self.db.keys() if key.startswith(prefix)]
+
+    def close(self) -> None:
+        with self._lock:
+            self.db.close()
+
+class StateStore:
+    """
+    Persistent key/value state for stateful actions, namespaced per rule
+
+    Reads are served from an in-memory cache (misses load from the backend once).
+    Writes only update the cache and mark the entry dirty; dirty entries are
+    written in one batched commit every flush_interval seconds by a background
+    thread, as soon as max_dirty entries are pending, and on flush()/close(). With
+    flush_interval=0 every write commits immediately. At most flush_interval
+    seconds of updates are lost if the process dies.
+
+    max_cached bounds the cache; the least recently used clean entries are evicted.
+    """
+
+    def __init__(self, backend: StateBackend, flush_interval: float = 0.5, max_dirty: int = 10000,
+                 max_cached: int = 100000):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.max_cached = max_cached
+        self.logger = logging.getLogger("StateStore")
+        self._cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+        self._dirty: Dict[Tuple[str, str], Any] = {}
+        # Entries handed to the backend but not yet committed; never evicted
+        self._flushing: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+        self.hits = 0
+        self.misses = 0
+        self.commits = 0
+        self._flusher: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, name="StateStore-flush", daemon=True)
+            self._flusher.start()
+        atexit.register(self.close)
+
+    @classmethod
+    def sqlite(cls, path: str = ".cursor/CORE/RULE-ENGINE/state/state.db", **kwargs) -> "StateStore":
+        return cls(SqliteStateBackend(path), **kwargs)
+
+    @classmethod
+    def dbm(cls, path: str = ".cursor/CORE/RULE-ENGINE/state/state.dbm", **kwargs) -> "StateStore":
+        return cls(DbmStateBackend(path), **kwargs)
+
+    def _read(self, cache_key: Tuple[str, str]) -> Any:
+        value = self._cache.get(cache_key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            self._cache.move_to_end(cache_key)
+            return value
+        self.misses += 1
+        raw = self.backend.load(*cache_key)
+        value = _DELETED if raw is None else json.loads(raw)
+        self._cache[cache_key] = value
+        self._evict()
+        return value
+
+    def _write(self, cache_key: Tuple[str, str], value: Any) -> bool:
+        """Update the cache; returns whether the caller should flush (after releasing _lock)"""
+        self._cache[cache_key] = value
+        self._cache.move_to_end(cache_key)
+        self._dirty[cache_key] = value
+        self._evict()
+        return self.flush_interval <= 0 or len(self._dirty) >= self.max_dirty
+
+    def _evict(self) -> None:
+        excess = len(self._cache) - self.max_cached
+        if excess <= 0:
+            return
+        for cache_key in list(self._cache):
+            if excess <= 0:
+                break
+            if cache_key not in self._dirty and cache_key not in self._flushing:
+                del self._cache[cache_key]
+                excess -= 1
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        with self._lock:
+            value = self._read((namespace, key))
+        return default if value is _DELETED else value
+
+    def set(self, namespace: str, key: str, value: Any) -> Any:
+        # Round-trip through JSON so the cache holds exactly what a reload would
+        value = json.loads(json.dumps(value, default=str))
+        with self._lock:
+            due = self._write((namespace, key), value)
+        if due:
+            self.flush()
+        return value
+
+    def update(self, namespace: str, key: str, func: Callable[[Any], Any], default: Any = None) -> Any:
+        """Atomically replace the value with func(current value or default)"""
+        with self._lock:
+            current = self._read((namespace, key))
+            value = func(default if current is _DELETED else current)
+            value = json.loads(json.dumps(value, default=str))
+            due = self._write((namespace, key), value)
+        if due:
+            self.flush()
+        return value
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            due = self._write((namespace, key), _DELETED)
+        if due:
+            self.flush()
+
+    def keys(self, namespace: str) -> List[str]:
+        self.flush()
+        return sorted(self.backend.keys(namespace))
+
+    def flush(self) -> int:
+        """Commit all dirty entries in one batch; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return 0
+                pending, self._dirty = self._dirty, {}
+                self._flushing = pending
+            items = [
+                (namespace, key, None if value is _DELETED else json.dumps(value))
+                for (namespace, key), value in pending.items()
+            ]
+            try:
+                self.backend.write_many(items)
+            except Exception:
+                with self._lock:
+                    # Keep newer writes made meanwhile; retry the rest next time
+                    for cache_key, value in pending.items():
+                        self._dirty.setdefault(cache_key, value)
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    # Entries kept while dirty may now push the cache over max_cached
+                    self._evict()
+            self.commits += 1
+            return len(items)
+
+    def _flush_loop(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error flushing state: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached": len(self._cache),
+                "dirty": len(self._dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+                "commits": self.commits
+            }
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        try:
+            self.flush()
+        finally:
+            self.backend.close()
+            atexit.unregister(self.close)
+
+    def __enter__(self) -> "StateStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,144 @@
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_executor import ActionExecutor
+
+BACKUP_ACTION = '''
+import shutil
+from action_executor import action
+
+@action("backup_file")
+def backup_file(context, source_path, backup_path):
+    shutil.copyfile(source_path, backup_path)
+
+@action("check_many", batch=True)
+def check_many(calls):
+    return [ValueError("bad") if params.get("fail") else params.get("value") for context, params in calls]
+'''
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append(record)
+
+class ExecuteManyOrderTest(unittest.TestCase):
+    """execute_many must give the same outcome as executing the calls one by one"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        actions_dir = os.path.join(self.dir, "custom_actions")
+        os.makedirs(actions_dir)
+        with open(os.path.join(actions_dir, "backup.py"), 'w') as f:
+            f.write(BACKUP_ACTION)
+        self.executor = ActionExecutor(custom_actions_dir=actions_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def test_mixed_types_inside_one_rule_keep_their_order(self):
+        a, b = self.path("a.txt"), self.path("b.txt")
+        with open(a, 'w') as f:
+            f.write("a")
+        first, second = {"event": {"id": 1}}, {"event": {"id": 2}}
+        results = self.executor.execute_many([
+            ({"type": "delete_file", "params": {"path": a}}, first, "r1"),
+            ({"type": "create_file", "params": {"path": b, "content": "b"}}, second, "r2"),
+            ({"type": "delete_file", "params": {"path": b}}, second, "r2"),
+        ])
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertFalse(os.path.exists(a))
+        self.assertFalse(os.path.exists(b))
+
+    def test_custom_action_runs_before_a_later_write_to_its_file(self):
+        source, backup = self.path("x.txt"), self.path("x.txt.bak")
+        with open(source, 'w') as f:
+            f.write("original\n")
+        context = {"event": {"id": 1}}
+        results = self.executor.execute_many([
+            ({"type": "append_to_file", "params": {"path": self.path("audit.txt"), "content": "x\n"}}, context, "r"),
+            ({"type": "backup_file", "params": {"source_path": source, "backup_path": backup}}, context, "r"),
+            ({"type": "append_to_file", "params": {"path": source, "content": "more\n"}}, context, "r"),
+        ])
+        self.assertTrue(all(result["success"] for result in results))
+        with open(backup) as f:
+            self.assertEqual(f.read(), "original\n")
+        with open(source) as f:
+            self.assertEqual(f.read(), "original\nmore\n")
+
+    def test_aliased_paths_of_one_file_keep_their_order(self):
+        cwd = os.getcwd()
+        os.chdir(self.dir)
+        try:
+            context = {"event": {"id": 1}}
+            results = self.executor.execute_many([
+                ({"type": "append_to_file", "params": {"path": "a.txt", "content": "1"}}, context, "r"),
+                ({"type": "create_file", "params": {"path": "./a.txt", "content": "X"}}, context, "r"),
+                ({"type": "append_to_file", "params": {"path": "a.txt", "content": "2"}}, context, "r"),
+            ])
+        finally:
+            os.chdir(cwd)
+        self.assertTrue(all(result["success"] for result in results))
+        with open(self.path("a.txt")) as f:
+            self.assertEqual(f.read(), "X2")
+
+    def test_value_actions_and_file_writes_match_sequential_execution(self):
+        out = self.path("out.txt")
+        contexts = [{"event": {"id": i}} for i in range(3)]
+        calls = []
+        for context in contexts:
+            calls += [
+                ({"type": "set_value", "params": {"path": "seen", "value": 1}}, context, "r"),
+                ({"type": "append_to_file", "params": {"path": out, "content": f"{context['event']['id']}\n"}}, context, "r"),
+                ({"type": "increment_value", "params": {"path": "seen"}}, context, "r"),
+                ({"type": "log", "params": {"message": "done"}}, context, "r"),
+            ]
+        results = self.executor.execute_many(calls)
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual([context["seen"] for context in contexts], [2, 2, 2])
+        with open(out) as f:
+            self.assertEqual(f.read(), "0\n1\n2\n")
+
+    def test_log_emits_one_record_per_message(self):
+        logger = logging.getLogger("ActionExecutor")
+        handler = _Records()
+        logger.addHandler(handler)
+        previous = logger.level
+        logger.setLevel(logging.INFO)
+        try:
+            self.executor.execute_many([
+                ({"type": "log", "params": {"level": "warning", "message": "first"}}, {}, "r"),
+                ({"type": "log", "params": {"level": "debug", "message": "hidden"}}, {}, "r"),
+                ({"type": "log", "params": {"level": "warning", "message": "second"}}, {}, "r"),
+                ({"type": "log", "params": {"message": "third"}}, {}, "r"),
+            ])
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(previous)
+        self.assertEqual(
+            [(record.levelno, record.getMessage()) for record in handler.records],
+            [(logging.WARNING, "first"), (logging.WARNING, "second"), (logging.INFO, "third")]
+        )
+
+    def test_batch_action_failure_is_reported_the_same_by_execute(self):
+        single = self.executor.execute({"type": "check_many", "params": {"fail": True}}, {}, "r")
+        batched = self.executor.execute_many([({"type": "check_many", "params": {"fail": True}}, {}, "r")])[0]
+        self.assertFalse(single["success"])
+        self.assertFalse(batched["success"])
+        self.assertEqual(single["error"], batched["error"])
+        ok = self.executor.execute({"type": "check_many", "params": {"value": 3}}, {}, "r")
+        self.assertEqual((ok["success"], ok["result"]), (True, 3))
+
+if __name__ == "__main__":
+    unittest.main()
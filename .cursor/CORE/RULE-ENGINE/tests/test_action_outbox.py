@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import action_outbox
+from action_outbox import ActionOutbox
+
+class _Executor:
+    """Records executed calls; blocks while `gate` is cleared"""
+
+    def __init__(self):
+        self.calls = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def execute(self, action, context, namespace=None):
+        self.gate.wait()
+        self.calls.append((action, context, namespace))
+        return {"success": True}
+
+class ActionOutboxTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.journal = os.path.join(self.dir, "outbox", "journal.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def outbox(self, executor: _Executor, journal: str = None) -> ActionOutbox:
+        return ActionOutbox(executor, journal_path=journal or self.journal, workers=2, commit_interval=0).start()
+
+    def records(self, journal: str = None) -> list:
+        with open(journal or self.journal) as f:
+            return [json.loads(line) for line in f]
+
+    def test_entries_journaled_but_not_executed_are_replayed_once(self):
+        action = {"type": "log", "params": {"message": "hello"}}
+        stalled = _Executor()
+        stalled.gate.clear()
+        outbox = self.outbox(stalled)
+        try:
+            outbox.submit(action, {"event": {"id": 1}}, namespace="r1", key="k1")
+            # The process dies here: the entry is durable, its action has not run
+            crashed = os.path.join(self.dir, "crashed.log")
+            shutil.copyfile(self.journal, crashed)
+        finally:
+            stalled.gate.set()
+            outbox.stop()
+        with open(crashed, 'a') as f:
+            f.write('{"op":"enqueue","id":"torn')
+
+        executor = _Executor()
+        outbox = self.outbox(executor, crashed)
+        self.assertTrue(outbox.drain(timeout=10))
+        self.assertEqual(outbox.stats()["replayed"], 1)
+        self.assertEqual(executor.calls, [(action, {"event": {"id": 1}}, "r1")])
+        self.assertIsNone(outbox.submit(action, {}, key="k1"))
+        outbox.stop()
+
+        executor = _Executor()
+        outbox = self.outbox(executor, crashed)
+        self.assertTrue(outbox.drain(timeout=10))
+        self.assertEqual((outbox.stats()["replayed"], executor.calls), (0, []))
+        self.assertIsNone(outbox.submit(action, {}, key="k1"))
+        outbox.stop()
+
+    def test_failed_journal_write_raises_and_frees_the_key(self):
+        executor = _Executor()
+        outbox = self.outbox(executor)
+        fsync = os.fsync
+        failures = [OSError("disk full")]
+
+        def failing_fsync(fd):
+            if failures:
+                raise failures.pop()
+            fsync(fd)
+
+        try:
+            with mock.patch.object(action_outbox.os, "fsync", failing_fsync):
+                with self.assertRaises(OSError):
+                    outbox.submit({"type": "log", "params": {"message": "lost"}}, {}, key="k1")
+            stats = outbox.stats()
+            self.assertEqual((stats["rejected"], stats["pending"], stats["queued"]), (1, 0, 0))
+            self.assertEqual(self.records(), [])
+
+            action = {"type": "log", "params": {"message": "kept"}}
+            self.assertIsNotNone(outbox.submit(action, {}, key="k1"))
+            self.assertTrue(outbox.drain(timeout=10))
+        finally:
+            outbox.stop()
+        self.assertEqual(executor.calls, [(action, {}, None)])
+
+        executor = _Executor()
+        outbox = self.outbox(executor)
+        self.assertTrue(outbox.drain(timeout=10))
+        outbox.stop()
+        self.assertEqual(executor.calls, [])
+        self.assertEqual([record["op"] for record in self.records()], ["key"])
+
+    def test_concurrent_submits_share_commits(self):
+        executor = _Executor()
+        outbox = ActionOutbox(executor, journal_path=self.journal, workers=2, commit_interval=0.05).start()
+        try:
+            threads = [
+                threading.Thread(target=outbox.submit, args=({"type": "log", "params": {}}, {}), kwargs={"key": str(i)})
+                for i in range(20)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertTrue(outbox.drain(timeout=10))
+            stats = outbox.stats()
+        finally:
+            outbox.stop()
+        self.assertEqual((stats["executed"], len(executor.calls)), (20, 20))
+        self.assertGreater(stats["records_per_commit"], 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
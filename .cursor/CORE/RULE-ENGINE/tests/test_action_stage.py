@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_stage import ActionStage
+
+class _Executor:
+    """Action types "flaky" and "ok"; flaky calls fail while `fail` is set and
+    block while `gate` is cleared"""
+
+    def __init__(self):
+        self.actions = {"flaky": None, "ok": None}
+        self.fail = True
+        self.gate = threading.Event()
+        self.gate.set()
+        self.started = threading.Semaphore(0)
+        self.calls = 0
+
+    def execute(self, action, context, namespace=None):
+        self.calls += 1
+        if action["type"] == "ok":
+            return {"success": True}
+        self.started.release()
+        self.gate.wait()
+        return {"success": not self.fail, "error": None if not self.fail else "boom"}
+
+class ActionStageCircuitTest(unittest.TestCase):
+    RESET = 0.2
+
+    def setUp(self):
+        self.executor = _Executor()
+        self.stage = ActionStage(self.executor, workers=4, failure_threshold=2, reset_timeout=self.RESET,
+                                 default_timeout=10).start()
+
+    def tearDown(self):
+        self.executor.gate.set()
+        self.stage.stop()
+
+    def circuit(self) -> str:
+        return self.stage.stats()["types"]["flaky"]["circuit"]
+
+    def run_flaky(self) -> dict:
+        return self.stage.execute({"type": "flaky"}, {})
+
+    def test_open_half_open_and_close(self):
+        self.assertFalse(self.run_flaky()["success"])
+        self.assertEqual(self.circuit(), "closed")
+        self.assertFalse(self.run_flaky()["success"])
+        self.assertEqual(self.circuit(), "open")
+
+        calls = self.executor.calls
+        rejected = self.run_flaky()
+        self.assertEqual((rejected["rejected"], rejected["error"]), (True, "Circuit open"))
+        self.assertEqual(self.executor.calls, calls)
+        self.assertTrue(self.stage.execute({"type": "ok"}, {})["success"])
+
+        # After reset_timeout a single trial call is let through; it fails and reopens
+        time.sleep(self.RESET * 1.5)
+        self.executor.gate.clear()
+        trial = self.stage.submit({"type": "flaky"}, {})
+        self.assertTrue(self.executor.started.acquire(timeout=5))
+        self.assertEqual(self.circuit(), "half_open")
+        self.assertTrue(self.run_flaky()["rejected"])
+        self.executor.gate.set()
+        self.assertFalse(trial.result(timeout=5)["success"])
+        self.assertEqual(self.circuit(), "open")
+        self.assertTrue(self.run_flaky()["rejected"])
+
+        # A successful trial closes the circuit again
+        time.sleep(self.RESET * 1.5)
+        self.executor.fail = False
+        self.assertTrue(self.run_flaky()["success"])
+        self.assertEqual(self.circuit(), "closed")
+        self.assertTrue(self.run_flaky()["success"])
+        stats = self.stage.stats()["types"]["flaky"]
+        self.assertEqual((stats["failed"], stats["rejected"]), (3, 3))
+
+    def test_opening_rejects_queued_calls(self):
+        stage = ActionStage(self.executor, workers=4, limits={"flaky": 1}, failure_threshold=1,
+                            reset_timeout=60).start()
+        try:
+            self.executor.gate.clear()
+            first = stage.submit({"type": "flaky"}, {})
+            self.assertTrue(self.executor.started.acquire(timeout=5))
+            queued = [stage.submit({"type": "flaky"}, {}) for _ in range(3)]
+            self.assertEqual(stage.stats()["types"]["flaky"]["queued"], 3)
+            self.executor.gate.set()
+            self.assertFalse(first.result(timeout=5)["success"])
+            self.assertEqual([future.result(timeout=5).get("rejected") for future in queued], [True] * 3)
+            self.assertEqual(self.executor.calls, 1)
+        finally:
+            stage.stop()
+
+    def test_timeouts_count_as_failures_and_free_the_pool(self):
+        stage = ActionStage(self.executor, workers=1, failure_threshold=1, reset_timeout=60,
+                            timeouts={"flaky": 0.1}).start()
+        try:
+            self.executor.gate.clear()
+            hung = stage.submit({"type": "flaky"}, {})
+            result = hung.result(timeout=5)
+            self.assertTrue(result["timed_out"])
+            self.assertEqual(stage.stats()["types"]["flaky"]["circuit"], "open")
+            # The only worker is stuck in the hung call; its replacement serves other types
+            self.assertTrue(stage.execute({"type": "ok"}, {})["success"])
+            self.executor.gate.set()
+            self.assertTrue(stage.drain(timeout=5))
+            stats = stage.stats()
+            self.assertEqual((stats["replaced_workers"], stats["types"]["flaky"]["timed_out"]), (1, 1))
+            self.assertEqual(hung.result(), result)
+        finally:
+            stage.stop()
+
+if __name__ == "__main__":
+    unittest.main()
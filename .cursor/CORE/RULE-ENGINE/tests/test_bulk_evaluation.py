@@ -0,0 +1,130 @@
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bulk_evaluation import BulkEvaluator, EventStore
+from engine import RuleEngine
+
+MISSING = object()
+VALUES = [MISSING, None, 0, 1, 2, 1.5, -3, True, False, "", "1", "a", "abc", "b", [], [1, "a"], ["abc", 2.5], {}, {"a": 1}]
+OPERANDS = [None, 0, 1, 1.5, "", "1", "a", "abc", [1, "a", None], ["1", 2], []]
+OPERATORS = ["eq", "ne", "gt", "lt", "ge", "le", "in", "not_in", "contains", "empty", "not_empty"]
+
+def _rule(rule_id: str, conditions: dict) -> dict:
+    return {
+        "id": rule_id, "name": rule_id, "pattern": "", "priority": 1, "is_active": True, "description": "",
+        "created_at": "", "updated_at": "", "tags": [], "metadata": {}, "actions": [], "conditions": conditions
+    }
+
+def _leaf(field: str, operator: str, value) -> dict:
+    return {"field": field, "operator": operator, "value": value}
+
+class BulkEvaluationDifferentialTest(unittest.TestCase):
+    """The SQL path must match exactly the rules that evaluate_batch matches"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        # RuleEngine logs to a path relative to the working directory
+        os.makedirs(os.path.join(self.dir, ".cursor", "CORE", "RULE-ENGINE"))
+        os.chdir(self.dir)
+        self.rules_dir = os.path.join(self.dir, "rules")
+        os.makedirs(self.rules_dir)
+        self.store = EventStore()
+
+    def tearDown(self):
+        self.store.close()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def write_rules(self, rules: dict) -> RuleEngine:
+        for rule_id, conditions in rules.items():
+            with open(os.path.join(self.rules_dir, f"{rule_id}.json"), 'w') as f:
+                json.dump(_rule(rule_id, conditions), f)
+        return RuleEngine(rules_dir=self.rules_dir, tables_dir=os.path.join(self.dir, "tables"),
+                          aggregates_dir=os.path.join(self.dir, "aggregates"))
+
+    def contexts(self, count: int, seed: int) -> list:
+        rng = random.Random(seed)
+        contexts = []
+        for i in range(count):
+            context = {"event": {"id": str(i)}}
+            for field in ("x", "y"):
+                value = rng.choice(VALUES)
+                if value is not MISSING:
+                    context[field] = value
+            nested = rng.choice(VALUES + [{"b": rng.choice(VALUES[1:])}] * 4)
+            if nested is not MISSING:
+                context["n"] = nested
+            contexts.append(context)
+        return contexts
+
+    def assert_same_matches(self, rules: dict, contexts: list) -> dict:
+        engine = self.write_rules(rules)
+        expected = {
+            (context["event"]["id"], result["rule_id"])
+            for context, results in zip(contexts, engine.evaluate_batch(contexts))
+            for result in results
+        }
+        self.store.add_events(json.loads(json.dumps(contexts)))
+        report = BulkEvaluator(self.store, engine.condition_evaluator).evaluate(engine.snapshot().active_rules)
+        self.assertEqual(len(report.matches), len(set(report.matches)))
+        for rule_id in sorted(rules):
+            self.assertEqual(
+                sorted(match for match in report.matches if match[1] == rule_id),
+                sorted(match for match in expected if match[1] == rule_id),
+                f"{rule_id} ({report.modes[rule_id]}): {json.dumps(rules[rule_id])}"
+            )
+        return report.modes
+
+    def test_single_predicates_over_mixed_types(self):
+        rules = {}
+        for operator in OPERATORS:
+            for i, value in enumerate(OPERANDS):
+                for field in ("x", "n.b"):
+                    rules[f"{operator}-{field}-{i}"] = {"operator": "and", "conditions": [_leaf(field, operator, value)]}
+        modes = self.assert_same_matches(rules, self.contexts(400, seed=42))
+        self.assertIn("sql", modes.values())
+
+    def test_nested_groups_keep_short_circuit_semantics(self):
+        rng = random.Random(7)
+
+        def tree(depth: int) -> dict:
+            if depth == 0 or rng.random() < 0.3:
+                return _leaf(rng.choice(["x", "y", "n.b"]), rng.choice(OPERATORS), rng.choice(OPERANDS))
+            return {"operator": rng.choice(["and", "or"]), "conditions": [tree(depth - 1) for _ in range(rng.randint(1, 3))]}
+
+        rules = {f"tree-{i}": {"operator": rng.choice(["and", "or"]), "conditions": [tree(2), tree(2)]} for i in range(150)}
+        # A guard first makes the comparison after it safe for None and strings
+        rules["guarded"] = {"operator": "and", "conditions": [
+            _leaf("x", "in", [0, 1, 2, 1.5, -3]), _leaf("x", "gt", 0)
+        ]}
+        modes = self.assert_same_matches(rules, self.contexts(300, seed=3))
+        self.assertEqual(modes["guarded"], "sql")
+
+    def test_value_file_lists(self):
+        with open(os.path.join(self.dir, "names.txt"), 'w') as f:
+            f.write("a\nabc\n1\n")
+        rules = {
+            "in-file": {"operator": "and", "conditions": [
+                {"field": "x", "operator": "in", "value_file": "names.txt"}
+            ]},
+            "not-in-file": {"operator": "and", "conditions": [
+                {"field": "y", "operator": "not_in", "value_file": "names.txt"}
+            ]},
+            "file-and-sql": {"operator": "and", "conditions": [
+                _leaf("x", "ne", None),
+                {"field": "n.b", "operator": "not_in", "value_file": "names.txt"}
+            ]}
+        }
+        modes = self.assert_same_matches(rules, self.contexts(300, seed=11))
+        self.assertEqual(modes["file-and-sql"], "sql+python")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import RuleEngine
+
+def _rule(rule_id: str, event_types, publishes: str) -> dict:
+    return {
+        "id": rule_id, "name": rule_id, "pattern": "", "priority": 1, "is_active": True, "description": "",
+        "created_at": "", "updated_at": "", "tags": [], "metadata": {},
+        "conditions": {"operator": "and", "conditions": [
+            {"field": "event.type", "operator": "in", "value": event_types}
+        ]},
+        "actions": [{"type": "publish_event", "params": {
+            "event_type": publishes,
+            # Differs on every hop, like the bundled backup rule's payload
+            "payload": {"timestamp": "${current_timestamp}", "depth": "${event.depth}"}
+        }}]
+    }
+
+class CascadeCycleTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        # RuleEngine logs to a path relative to the working directory
+        os.makedirs(os.path.join(self.dir, ".cursor", "CORE", "RULE-ENGINE"))
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def engine(self, *rules) -> RuleEngine:
+        rules_dir = os.path.join(self.dir, "rules")
+        os.makedirs(rules_dir, exist_ok=True)
+        for rule in rules:
+            with open(os.path.join(rules_dir, f"{rule['id']}.json"), 'w') as f:
+                json.dump(rule, f)
+        return RuleEngine(rules_dir=rules_dir, tables_dir=os.path.join(self.dir, "tables"),
+                          aggregates_dir=os.path.join(self.dir, "aggregates"), max_cascade_depth=8)
+
+    def test_self_publishing_rule_is_reported_as_a_cycle(self):
+        engine = self.engine(_rule("loop", ["start", "tick"], "tick"))
+        report = engine.evaluate_cascade({"event": {"type": "start", "depth": 0}})
+        self.assertEqual(report.cycles, [{"event_type": "tick", "rule_id": "loop", "depth": 2}])
+        self.assertEqual(report.depth_limited, [])
+        self.assertEqual(report.events_processed, 2)
+
+    def test_cycle_through_two_rules_is_reported(self):
+        engine = self.engine(_rule("ping", ["start", "pong"], "ping"), _rule("pong", ["ping"], "pong"))
+        report = engine.evaluate_cascade({"event": {"type": "start", "depth": 0}})
+        self.assertEqual([cycle["rule_id"] for cycle in report.cycles], ["ping"])
+        self.assertEqual(report.depth_limited, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import RuleEngine
+
+def _rule(rule_id: str, field: str, value) -> dict:
+    return {
+        "id": rule_id, "name": rule_id, "pattern": "", "priority": 1, "is_active": True, "description": "",
+        "created_at": "", "updated_at": "", "tags": [], "metadata": {}, "actions": [],
+        "conditions": {"operator": "and", "conditions": [{"field": field, "operator": "eq", "value": value}]}
+    }
+
+class EvaluateDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        # RuleEngine logs to a path relative to the working directory
+        os.makedirs(os.path.join(self.dir, ".cursor", "CORE", "RULE-ENGINE"))
+        os.chdir(self.dir)
+        rules_dir = os.path.join(self.dir, "rules")
+        os.makedirs(rules_dir)
+        for rule in (_rule("a", "x", 1), _rule("b", "y", 1)):
+            with open(os.path.join(rules_dir, f"{rule['id']}.json"), 'w') as f:
+                json.dump(rule, f)
+        self.engine = RuleEngine(rules_dir=rules_dir, tables_dir=os.path.join(self.dir, "tables"),
+                                 aggregates_dir=os.path.join(self.dir, "aggregates"))
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def matched(self, context) -> list:
+        return [result["rule_id"] for result in self.engine.evaluate_delta(context, ["x", "y"])]
+
+    def test_cached_truth_values_are_replaced_not_mutated(self):
+        context = {"x": 1, "y": 0}
+        self.assertEqual(self.matched(context), ["a"])
+        cached = self.engine._delta_states[id(context)][2]
+        context.update(x=0, y=1)
+        self.assertEqual(self.matched(context), ["b"])
+        self.assertEqual(cached, {"a"})
+        self.assertEqual(self.engine._delta_states[id(context)][2], {"b"})
+
+    def test_failed_evaluation_leaves_cached_state_untouched(self):
+        context = {"x": 1, "y": 0}
+        self.matched(context)
+        state = self.engine._delta_states[id(context)]
+        evaluate = self.engine._evaluate_conditions
+
+        calls = []
+
+        def interrupted(conditions, ctx):
+            # The first rule flips its truth value, then evaluation is cut short
+            calls.append(conditions)
+            if len(calls) > 1:
+                raise KeyboardInterrupt
+            return not evaluate(conditions, ctx)
+
+        self.engine._evaluate_conditions = interrupted
+        try:
+            with self.assertRaises(KeyboardInterrupt):
+                self.engine.evaluate_delta(context, ["x", "y"])
+        finally:
+            self.engine._evaluate_conditions = evaluate
+        self.assertIs(self.engine._delta_states[id(context)], state)
+        self.assertEqual(state[2], {"a"})
+
+if __name__ == "__main__":
+    unittest.main()
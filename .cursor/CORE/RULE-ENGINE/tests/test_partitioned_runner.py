@@ -0,0 +1,42 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lazy_fields import file_fields
+from partitioned_runner import PartitionedRunner
+
+class PartitionedRunnerSubmitTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cwd = os.getcwd()
+        # RuleEngine logs to a path relative to the working directory
+        os.makedirs(os.path.join(self.dir, ".cursor", "CORE", "RULE-ENGINE"))
+        os.chdir(self.dir)
+        self.runner = PartitionedRunner(workers=2, mode="match", engine_kwargs={
+            "rules_dir": os.path.join(self.dir, "rules"),
+            "tables_dir": os.path.join(self.dir, "tables"),
+            "aggregates_dir": os.path.join(self.dir, "aggregates")
+        }).start()
+
+    def tearDown(self):
+        self.runner.stop()
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def test_contexts_with_lazy_fields_are_processed(self):
+        path = os.path.join(self.dir, "watched.txt")
+        with open(path, 'w') as f:
+            f.write("content")
+        self.runner.submit({"event": {"type": "file_modified"}, "file": file_fields(path)})
+        self.runner.submit({"event": {"type": "file_modified"}, "file": {"path": "plain.txt"}})
+        self.assertTrue(self.runner.flush(timeout=30))
+        stats = self.runner.stats()
+        self.assertEqual((stats["submitted"], stats["completed"], stats["lost"]), (2, 2, 0))
+        self.assertEqual([result.error for result in self.runner.results(timeout=5)], [None, None])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import Rule
+from rule_analyzer import RuleAnalyzer
+
+def _rule(rule_id: str, conditions, priority: int = 1) -> Rule:
+    return Rule(id=rule_id, name=rule_id, pattern="", priority=priority, is_active=True, description="",
+                created_at="", updated_at="", tags=[], conditions=conditions, actions=[], metadata={})
+
+GUARD = {"field": "file.extension", "operator": "eq", "value": ".py"}
+CONTENT = {"field": "file.path", "operator": "file_contains", "value": "import os"}
+
+class MinimizeTest(unittest.TestCase):
+    def test_minimized_conditions_keep_author_order(self):
+        rules = {"r": _rule("r", {"operator": "AND", "conditions": [
+            {"field": "file.size", "operator": "lt", "value": 100},
+            {"operator": "and", "conditions": [GUARD, CONTENT]}
+        ]})}
+        minimized, _ = RuleAnalyzer().minimize(rules)
+        self.assertEqual(minimized["r"].conditions, {"operator": "and", "conditions": [
+            {"field": "file.size", "operator": "lt", "value": 100}, GUARD, CONTENT
+        ]})
+
+    def test_child_order_does_not_affect_comparison(self):
+        analyzer = RuleAnalyzer()
+        forward = {"operator": "and", "conditions": [GUARD, CONTENT]}
+        backward = {"operator": "and", "conditions": [CONTENT, GUARD]}
+        self.assertEqual(analyzer.key(analyzer.canonicalize(forward)), analyzer.key(analyzer.canonicalize(backward)))
+        report = analyzer.analyze({"a": _rule("a", forward, 2), "b": _rule("b", backward, 1)})
+        self.assertEqual(report.condition_groups, [["a", "b"]])
+        minimized, _ = analyzer.minimize({"a": _rule("a", forward, 2), "b": _rule("b", backward, 1)})
+        self.assertEqual(minimized["a"].conditions["conditions"], [GUARD, CONTENT])
+        self.assertEqual(minimized["b"].conditions["conditions"], [CONTENT, GUARD])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from action_executor import ActionExecutor
+from state_store import SqliteStateBackend, StateStore
+
+class _FailingBackend(SqliteStateBackend):
+    """Fails the next `failures` commits"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.failures = 0
+
+    def write_many(self, items):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().write_many(items)
+
+class StateStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def check_reopen(self, open_store):
+        with open_store(flush_interval=60) as store:
+            store.set("r1", "count", 3)
+            store.set("r1", "items", ["a", {"b": 1}])
+            store.set("r2", "count", 7)
+            store.set("r1", "gone", True)
+            store.delete("r1", "gone")
+            self.assertEqual(store.stats()["commits"], 0)
+        with open_store(flush_interval=60) as store:
+            self.assertEqual(store.get("r1", "count"), 3)
+            self.assertEqual(store.get("r1", "items"), ["a", {"b": 1}])
+            self.assertEqual(store.get("r2", "count"), 7)
+            self.assertIsNone(store.get("r1", "gone"))
+            self.assertEqual(store.keys("r1"), ["count", "items"])
+
+    def test_sqlite_writes_survive_close_and_reopen(self):
+        self.check_reopen(lambda **kwargs: StateStore.sqlite(self.path("state.db"), **kwargs))
+
+    def test_dbm_writes_survive_close_and_reopen(self):
+        self.check_reopen(lambda **kwargs: StateStore.dbm(self.path("state.dbm"), **kwargs))
+
+    def test_dirty_entries_are_batched_into_one_commit(self):
+        with StateStore.sqlite(self.path("state.db"), flush_interval=60, max_dirty=3) as store:
+            store.set("r", "a", 1)
+            store.update("r", "a", lambda value: value + 1)
+            store.set("r", "b", 1)
+            self.assertEqual(store.stats()["commits"], 0)
+            store.set("r", "c", 1)
+            self.assertEqual((store.stats()["commits"], store.stats()["dirty"]), (1, 0))
+            self.assertEqual(store.backend.load("r", "a"), "2")
+
+    def test_failed_flush_keeps_entries_and_newer_writes(self):
+        backend = _FailingBackend(self.path("state.db"))
+        store = StateStore(backend, flush_interval=60)
+        store.set("r", "a", 1)
+        store.set("r", "b", 1)
+        backend.failures = 1
+        with self.assertRaises(OSError):
+            store.flush()
+        self.assertEqual(store.stats()["dirty"], 2)
+        store.set("r", "a", 2)
+        self.assertEqual(store.flush(), 2)
+        store.close()
+        with StateStore.sqlite(self.path("state.db"), flush_interval=60) as store:
+            self.assertEqual((store.get("r", "a"), store.get("r", "b")), (2, 1))
+
+    def test_eviction_never_drops_unflushed_entries(self):
+        with StateStore.sqlite(self.path("state.db"), flush_interval=60, max_cached=2) as store:
+            for i in range(5):
+                store.set("r", str(i), i)
+            self.assertEqual([store.get("r", str(i)) for i in range(5)], list(range(5)))
+            store.flush()
+            store.get("r", "0")
+            self.assertLessEqual(store.stats()["cached"], 2)
+            self.assertEqual([store.get("r", str(i)) for i in range(5)], list(range(5)))
+
+    def test_counters_persist_across_events_per_rule(self):
+        actions_dir = self.path("custom_actions")
+        os.makedirs(actions_dir)
+        increment = {"type": "increment_value", "params": {"path": "state.hits"}}
+        for _ in range(2):
+            with StateStore.sqlite(self.path("state.db"), flush_interval=0) as store:
+                executor = ActionExecutor(custom_actions_dir=actions_dir, state_store=store)
+                for _ in range(3):
+                    context = {}
+                    self.assertTrue(executor.execute(increment, context, namespace="r1")["success"])
+                executor.execute(increment, {}, namespace="r2")
+                transient = {}
+                executor.execute({"type": "increment_value", "params": {"path": "hits"}}, transient, namespace="r1")
+                self.assertEqual(transient, {"hits": 1})
+        self.assertEqual(context, {"state": {"hits": 6}})
+        with StateStore.sqlite(self.path("state.db"), flush_interval=60) as store:
+            self.assertEqual((store.get("r1", "hits"), store.get("r2", "hits")), (6, 2))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import math
+import os
+import random
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_wheel import RuleScheduler, Timer, TimerWheel
+
+class _Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+class TimerWheelExpiryTest(unittest.TestCase):
+    def test_next_expiry_never_passes_a_deadline(self):
+        rng = random.Random(7)
+        wheel = TimerWheel(tick=0.1, wheel_sizes=(8, 4, 4), start=0.0)
+        for i in range(200):
+            wheel.add(Timer(f"t{i}", rng.uniform(0.05, 40.0), {}))
+        now = 0.0
+        while len(wheel):
+            expiry = wheel.next_expiry()
+            earliest = min(timer.deadline for timer in wheel.timers.values())
+            self.assertLessEqual(expiry, math.ceil(earliest / wheel.tick) * wheel.tick + 1e-9)
+            self.assertGreater(expiry, now)
+            now = expiry
+            for timer in wheel.advance(now + 1e-9):
+                self.assertLessEqual(timer.deadline, now + 1e-9)
+        self.assertIsNone(wheel.next_expiry())
+
+class RuleSchedulerTest(unittest.TestCase):
+    def test_run_sleeps_until_the_next_deadline(self):
+        clock = _Clock()
+        scheduler = RuleScheduler(lambda context: None, clock=clock, save_interval=5.0)
+        scheduler.schedule("far", delay=3 * 86400)
+        scheduler.schedule("near", delay=1.25)
+        stop = threading.Event()
+        waits = []
+
+        def wait(timeout=None):
+            waits.append(timeout)
+            if len(waits) == 2:
+                stop.set()
+            clock.now += timeout
+            return False
+
+        scheduler._wakeup.wait = wait
+        scheduler.run(stop)
+        self.assertAlmostEqual(waits[0], 1.3, places=6)
+        self.assertEqual(waits[1], 5.0)
+
+    def test_schedule_wakes_the_loop_only_for_a_sooner_timer(self):
+        clock = _Clock()
+        scheduler = RuleScheduler(lambda context: None, clock=clock)
+        scheduler._next_wake = clock.now + 2.0
+        scheduler.schedule("later", delay=10.0)
+        self.assertFalse(scheduler._wakeup.is_set())
+        scheduler.schedule("sooner", delay=1.0)
+        self.assertTrue(scheduler._wakeup.is_set())
+
+    def test_periodic_timer_that_cannot_be_rescheduled_releases_its_key(self):
+        clock = _Clock()
+        fired = []
+        scheduler = RuleScheduler(fired.append, clock=clock, tick=1.0)
+        scheduler.schedule("beat", every=0.5, key="heartbeat")
+        clock.now += 1.0
+        with scheduler._lock:
+            due = scheduler.wheel.advance(clock.now)
+        # The wall clock steps back before the timer is re-armed: the new deadline is behind the wheel
+        clock.now -= 6.0
+        scheduler._dispatch(due)
+        self.assertEqual(len(fired), 1)
+        self.assertEqual(scheduler.pending(), 0)
+        self.assertNotIn("heartbeat", scheduler._keys)
+
+if __name__ == "__main__":
+    unittest.main()
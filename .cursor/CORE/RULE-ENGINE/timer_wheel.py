@@ -0,0 +1,349 @@
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional, Sequence, Tuple
+import itertools
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+class Timer:
+    __slots__ = ("id", "deadline", "event", "interval", "key", "location")
+
+    def __init__(self, timer_id: str, deadline: float, event: Dict[str, Any],
+                 interval: Optional[float] = None, key: Optional[str] = None):
+        self.id = timer_id
+        self.deadline = deadline
+        self.event = event
+        self.interval = interval
+        self.key = key
+        # (level, slot) while in the wheel, (-1, -1) while in overflow
+        self.location: Optional[Tuple[int, int]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "deadline": self.deadline,
+            "event": self.event,
+            "interval": self.interval,
+            "key": self.key
+        }
+
+class TimerWheel:
+    """
+    Hierarchical timing wheel
+
+    Level 0 has one slot per tick; each higher level has slots as wide as the whole
+    level below. A timer is stored in the lowest level whose span covers its delay,
+    in a dict keyed by timer id, so insert and cancel are O(1). When a higher-level
+    slot comes due its timers cascade down to finer levels. Timers beyond the top
+    level's span wait in an overflow dict that is re-examined once per top-level turn.
+
+    With the defaults (0.1s tick, 256/64/64/64 slots) the wheel covers ~19 days
+    before overflow.
+    """
+
+    def __init__(self, tick: float = 0.1, wheel_sizes: Sequence[int] = (256, 64, 64, 64),
+                 start: Optional[float] = None):
+        self.tick = tick
+        self.sizes = tuple(wheel_sizes)
+        self.spans = [1]
+        for size in self.sizes[:-1]:
+            self.spans.append(self.spans[-1] * size)
+        self.levels: List[List[Dict[str, Timer]]] = [[{} for _ in range(size)] for size in self.sizes]
+        self.overflow: Dict[str, Timer] = {}
+        self.timers: Dict[str, Timer] = {}
+        self.current = int((time.time() if start is None else start) // tick)
+
+    def __len__(self) -> int:
+        return len(self.timers)
+
+    def _tick_of(self, deadline: float) -> int:
+        return int(math.ceil(deadline / self.tick))
+
+    def _place(self, timer: Timer, fired: List[Timer]) -> None:
+        target = self._tick_of(timer.deadline)
+        delta = target - self.current
+        if delta <= 0:
+            timer.location = None
+            fired.append(timer)
+            return
+        for level, (size, span) in enumerate(zip(self.sizes, self.spans)):
+            if delta < size * span:
+                slot = (target // span) % size
+                self.levels[level][slot][timer.id] = timer
+                timer.location = (level, slot)
+                return
+        self.overflow[timer.id] = timer
+        timer.location = (-1, -1)
+
+    def add(self, timer: Timer) -> List[Timer]:
+        """Insert a timer; returns it in a list if it is already due"""
+        self.cancel(timer.id)
+        fired: List[Timer] = []
+        self._place(timer, fired)
+        if not fired:
+            self.timers[timer.id] = timer
+        return fired
+
+    def cancel(self, timer_id: str) -> Optional[Timer]:
+        timer = self.timers.pop(timer_id, None)
+        if timer is None:
+            return None
+        level, slot = timer.location
+        if level == -1:
+            self.overflow.pop(timer_id, None)
+        else:
+            self.levels[level][slot].pop(timer_id, None)
+        timer.location = None
+        return timer
+
+    def next_expiry(self) -> Optional[float]:
+        """Earliest time at which advance() may have work to do (a level-0 slot firing,
+        a higher-level slot cascading or overflow being re-examined); None when empty.
+        Never later than the earliest deadline, and costs at most one pass over the slots."""
+        if not self.timers:
+            return None
+        earliest: Optional[int] = None
+        for slots, size, span in zip(self.levels, self.sizes, self.spans):
+            base = self.current // span
+            for step in range(1, size + 1):
+                if slots[(base + step) % size]:
+                    tick = (base + step) * span
+                    earliest = tick if earliest is None else min(earliest, tick)
+                    break
+        if self.overflow:
+            top_turn = self.sizes[-1] * self.spans[-1]
+            tick = (self.current // top_turn + 1) * top_turn
+            earliest = tick if earliest is None else min(earliest, tick)
+        return None if earliest is None else earliest * self.tick
+
+    def advance(self, now: float) -> List[Timer]:
+        """Move the wheel to now and return every timer that expired, in tick order"""
+        target = int(now // self.tick)
+        fired: List[Timer] = []
+        if not self.timers:
+            self.current = max(self.current, target)
+            return fired
+
+        top_turn = self.sizes[-1] * self.spans[-1]
+        while self.current < target and self.timers:
+            self.current += 1
+            if self.overflow and self.current % top_turn == 0:
+                pending = list(self.overflow.values())
+                self.overflow.clear()
+                for timer in pending:
+                    self._place(timer, fired)
+            for level in range(len(self.sizes) - 1, 0, -1):
+                span = self.spans[level]
+                if self.current % span == 0:
+                    slot = self.levels[level][(self.current // span) % self.sizes[level]]
+                    pending = list(slot.values())
+                    slot.clear()
+                    for timer in pending:
+                        self._place(timer, fired)
+            slot = self.levels[0][self.current % self.sizes[0]]
+            fired.extend(slot.values())
+            slot.clear()
+            for timer in fired:
+                self.timers.pop(timer.id, None)
+        self.current = max(self.current, target)
+        return fired
+
+class RuleScheduler:
+    """
+    Time-based and delayed rule triggers on top of a TimerWheel
+
+    A fired timer injects a synthetic event into the engine:
+    {"event": {"type": <type>, "source": "timer", "timer_id": ..., "scheduled_for": ...,
+               "fired_at": ...}, ...payload}
+
+    - schedule(..., delay=10)            fire once after a delay
+    - schedule(..., every=600)           fire periodically ("back up every 10 minutes")
+    - schedule(..., key="heartbeat:x")   keyed timers replace the previous one with the
+                                         same key, so re-arming on every heartbeat gives
+                                         "alert if no heartbeat for 60s"
+
+    Pending timers are saved to persist_path (atomically, at most every save_interval
+    seconds and on stop) and reloaded on start; timers that came due while the
+    process was down fire immediately.
+    """
+
+    def __init__(self, handler: Callable[[Dict[str, Any]], Any], tick: float = 0.1,
+                 persist_path: Optional[str] = None, save_interval: float = 5.0,
+                 clock: Callable[[], float] = time.time):
+        self.handler = handler
+        self.clock = clock
+        self.wheel = TimerWheel(tick=tick, start=clock())
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+        self.logger = logging.getLogger("RuleScheduler")
+        self._keys: Dict[str, str] = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty = False
+        self._last_save = 0.0
+        # When run() will next wake up by itself (clock time)
+        self._next_wake = 0.0
+        if persist_path:
+            self.load()
+
+    def schedule(self, event_type: str, payload: Optional[Dict[str, Any]] = None, delay: Optional[float] = None,
+                 at: Optional[float] = None, every: Optional[float] = None, key: Optional[str] = None) -> str:
+        """Schedule a synthetic event; returns the timer id"""
+        now = self.clock()
+        if at is None:
+            at = now + (delay if delay is not None else (every or 0.0))
+        if every is not None and every <= 0:
+            raise ValueError("every must be positive")
+        event = {"type": event_type, "payload": payload or {}}
+        with self._lock:
+            timer_id = f"t{int(now * 1000)}-{next(self._ids)}"
+            if key is not None:
+                previous = self._keys.pop(key, None)
+                if previous is not None:
+                    self.wheel.cancel(previous)
+                self._keys[key] = timer_id
+            fired = self.wheel.add(Timer(timer_id, at, event, every, key))
+            self._dirty = True
+            sooner = at < self._next_wake
+        if sooner:
+            self._wakeup.set()
+        self._dispatch(fired)
+        return timer_id
+
+    def cancel(self, timer_id: Optional[str] = None, key: Optional[str] = None) -> bool:
+        with self._lock:
+            if key is not None:
+                timer_id = self._keys.pop(key, None)
+            if timer_id is None:
+                return False
+            timer = self.wheel.cancel(timer_id)
+            if timer is not None and timer.key is not None and self._keys.get(timer.key) == timer_id:
+                del self._keys[timer.key]
+            self._dirty = True
+            return timer is not None
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self.wheel)
+
+    def tick(self) -> int:
+        """Advance to the current time and fire due timers; returns how many fired"""
+        with self._lock:
+            fired = self.wheel.advance(self.clock())
+        return self._dispatch(fired)
+
+    def _dispatch(self, fired: List[Timer]) -> int:
+        now = self.clock()
+        for timer in fired:
+            with self._lock:
+                if timer.key is not None and self._keys.get(timer.key) == timer.id:
+                    del self._keys[timer.key]
+                if timer.interval:
+                    next_deadline = timer.deadline + timer.interval
+                    if next_deadline <= now:
+                        next_deadline = now + timer.interval
+                    again = Timer(timer.id, next_deadline, timer.event, timer.interval, timer.key)
+                    if self.wheel.add(again):
+                        # Already behind the wheel (the clock stepped back): the wheel did not store it
+                        self.logger.error(f"Timer {timer.id} ({timer.event['type']}) could not be rescheduled "
+                                          f"for {datetime.fromtimestamp(next_deadline).isoformat()}; dropped")
+                    elif timer.key is not None:
+                        self._keys[timer.key] = timer.id
+                self._dirty = True
+
+            context = {
+                "event": {
+                    "type": timer.event["type"],
+                    "source": "timer",
+                    "timer_id": timer.id,
+                    "key": timer.key,
+                    "scheduled_for": datetime.fromtimestamp(timer.deadline).isoformat(),
+                    "fired_at": datetime.fromtimestamp(now).isoformat()
+                }
+            }
+            context.update(timer.event.get("payload", {}))
+            try:
+                self.handler(context)
+            except Exception as e:
+                self.logger.error(f"Error handling timer {timer.id} ({timer.event['type']}): {str(e)}")
+        return len(fired)
+
+    def save(self) -> None:
+        if not self.persist_path:
+            return
+        with self._lock:
+            timers = [timer.to_dict() for timer in self.wheel.timers.values()]
+            self._dirty = False
+        tmp_path = f"{self.persist_path}.tmp"
+        directory = os.path.dirname(self.persist_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({"saved_at": self.clock(), "timers": timers}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.persist_path)
+        self._last_save = time.monotonic()
+
+    def load(self) -> int:
+        """Restore timers saved by a previous process; returns how many were restored"""
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with open(self.persist_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Error loading timers from {self.persist_path}: {str(e)}")
+            return 0
+
+        due: List[Timer] = []
+        with self._lock:
+            for item in data.get("timers", []):
+                timer = Timer(item["id"], item["deadline"], item["event"], item.get("interval"), item.get("key"))
+                if timer.key is not None:
+                    self._keys[timer.key] = timer.id
+                due.extend(self.wheel.add(timer))
+        self.logger.info(f"Restored {len(data.get('timers', []))} timers from {self.persist_path}")
+        self._dispatch(due)
+        return len(data.get("timers", []))
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """Fire timers until stop (or self.stop()) is set; sleeps until the next timer
+        is due (at most save_interval), or until schedule() adds an earlier one"""
+        stop = stop or self._stop
+        while not stop.is_set() and not self._stop.is_set():
+            self._wakeup.clear()
+            self.tick()
+            if self._dirty and time.monotonic() - self._last_save >= self.save_interval:
+                self._safe_save()
+            with self._lock:
+                now = self.clock()
+                expiry = self.wheel.next_expiry()
+                delay = self.save_interval if expiry is None else min(self.save_interval, max(0.0, expiry - now))
+                self._next_wake = now + delay
+            self._wakeup.wait(delay)
+        self._safe_save()
+
+    def _safe_save(self) -> None:
+        try:
+            self.save()
+        except OSError as e:
+            self.logger.error(f"Error saving timers to {self.persist_path}: {str(e)}")
+
+    def start(self) -> threading.Thread:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="RuleScheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
@@ -1,6 +1,7 @@
 from typing import Dict, Any, Union
 import re
 from datetime import datetime
+from lazy_fields import resolve_lazy
 
 class VariableResolver:
     def __init__(self):
@@ -45,8 +46,9 @@ class VariableResolver:
         return [self.resolve(item, context) for item in template]
 
     def _get_value_from_path(self, data: Dict[str, Any], path: str) -> Any:
-        """Get a value from a nested dictionary using dot notation"""
-        current = data
+        """Get a value from a nested dictionary using dot notation, computing any
+        LazyField met along the way"""
+        current = resolve_lazy(data)
         for key in path.split('.'):
             if isinstance(current, dict):
                 if key in current:
@@ -61,4 +63,5 @@ class VariableResolver:
                     return None
             else:
                 return None
+            current = resolve_lazy(current)
         return current 
\ No newline at end of file
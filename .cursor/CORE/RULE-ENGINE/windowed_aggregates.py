@@ -0,0 +1,196 @@
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, List, Optional, Set
+import threading
+import time
+
+from condition_evaluator import ConditionEvaluator
+
+AGGREGATE_KINDS = ("count", "sum", "distinct")
+
+class SlidingWindow:
+    """
+    Bucketed ring of counters over the last `window` seconds
+
+    The window is split into `buckets` slots. Running totals are kept alongside the
+    ring, so an update or a read costs O(1) amortized: advancing the clock only clears
+    the slots that fell out of the window. Resolution is window / buckets.
+    """
+    __slots__ = ("width", "size", "head", "counts", "sums", "total_count", "total_sum",
+                 "latest", "members", "distinct_limit", "overflowed")
+
+    def __init__(self, window: float, buckets: int, track_distinct: bool = False, distinct_limit: int = 100000):
+        self.width = window / buckets
+        self.size = buckets
+        self.head: Optional[int] = None
+        self.counts = [0] * buckets
+        self.sums = [0.0] * buckets
+        self.total_count = 0
+        self.total_sum = 0.0
+        # distinct: value -> bucket of its latest occurrence, and each slot's values
+        self.latest: Optional[Dict[Hashable, int]] = {} if track_distinct else None
+        self.members: Optional[List[Set[Hashable]]] = [set() for _ in range(buckets)] if track_distinct else None
+        self.distinct_limit = distinct_limit
+        self.overflowed = False
+
+    def _advance(self, now: float) -> int:
+        bucket = int(now // self.width)
+        if self.head is None:
+            self.head = bucket
+        elif bucket > self.head:
+            for step in range(1, min(bucket - self.head, self.size) + 1):
+                self._clear((self.head + step) % self.size)
+            self.head = bucket
+        # Late events (clock going backwards) land in the current slot
+        return self.head
+
+    def _clear(self, slot: int) -> None:
+        self.total_count -= self.counts[slot]
+        self.total_sum -= self.sums[slot]
+        self.counts[slot] = 0
+        self.sums[slot] = 0.0
+        if self.members is not None:
+            for value in self.members[slot]:
+                del self.latest[value]
+            self.members[slot].clear()
+
+    def add(self, now: float, amount: float = 0.0, value: Hashable = None) -> None:
+        bucket = self._advance(now)
+        slot = bucket % self.size
+        self.counts[slot] += 1
+        self.total_count += 1
+        self.sums[slot] += amount
+        self.total_sum += amount
+        if self.latest is not None and value is not None:
+            previous = self.latest.get(value)
+            if previous is not None:
+                self.members[previous % self.size].discard(value)
+            elif len(self.latest) >= self.distinct_limit:
+                self.overflowed = True
+                return
+            self.latest[value] = bucket
+            self.members[slot].add(value)
+
+    def count(self, now: float) -> int:
+        self._advance(now)
+        return self.total_count
+
+    def sum(self, now: float) -> float:
+        self._advance(now)
+        return self.total_sum
+
+    def distinct(self, now: float) -> int:
+        self._advance(now)
+        return len(self.latest) if self.latest is not None else 0
+
+class WindowedAggregate:
+    """
+    A named count / sum / distinct-count over a sliding window, optionally per group
+
+    spec:
+    {
+        "name": "src_modifications_5m",
+        "kind": "count|sum|distinct",
+        "window": 300,                  # seconds
+        "buckets": 60,                  # optional resolution, default 60
+        "filter": {...conditions...},   # optional, which events are counted
+        "group_by": "file.directory",   # optional, one window per value of this field
+        "field": "file.size",           # required for sum and distinct
+        "max_groups": 10000             # optional, least recently updated groups are evicted
+    }
+    """
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.name: str = spec["name"]
+        self.kind: str = spec.get("kind", "count")
+        if self.kind not in AGGREGATE_KINDS:
+            raise ValueError(f"Unknown aggregate kind: {self.kind}")
+        self.window = float(spec["window"])
+        self.buckets = int(spec.get("buckets", 60))
+        if self.window <= 0 or self.buckets <= 0:
+            raise ValueError("window and buckets must be positive")
+        self.filter: Dict[str, Any] = spec.get("filter", {})
+        self.group_by: Optional[str] = spec.get("group_by")
+        self.field: Optional[str] = spec.get("field")
+        if self.kind in ("sum", "distinct") and not self.field:
+            raise ValueError(f"Aggregate {self.name} of kind {self.kind} needs a field")
+        self.max_groups = int(spec.get("max_groups", 10000))
+        self.distinct_limit = int(spec.get("distinct_limit", 100000))
+        self.groups: "OrderedDict[Hashable, SlidingWindow]" = OrderedDict()
+
+    def _window(self, group: Hashable, create: bool) -> Optional[SlidingWindow]:
+        window = self.groups.get(group)
+        if window is None and create:
+            window = SlidingWindow(self.window, self.buckets, self.kind == "distinct", self.distinct_limit)
+            self.groups[group] = window
+            if len(self.groups) > self.max_groups:
+                self.groups.popitem(last=False)
+        elif window is not None and create:
+            self.groups.move_to_end(group)
+        return window
+
+    def observe(self, context: Dict[str, Any], now: float, evaluator: ConditionEvaluator) -> Any:
+        """Count the event if it passes the filter and return its group's current value"""
+        group = evaluator._get_field_value(context, self.group_by) if self.group_by else None
+        try:
+            hash(group)
+        except TypeError:
+            group = repr(group)
+
+        if evaluator.evaluate(self.filter, context):
+            value = evaluator._get_field_value(context, self.field) if self.field else None
+            amount = value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+            try:
+                hash(value)
+            except TypeError:
+                value = repr(value)
+            self._window(group, create=True).add(now, amount=amount, value=value)
+        return self.value(group, now)
+
+    def value(self, group: Hashable, now: float) -> Any:
+        window = self._window(group, create=False)
+        if window is None:
+            return 0
+        if self.kind == "count":
+            return window.count(now)
+        if self.kind == "sum":
+            return window.sum(now)
+        return window.distinct(now)
+
+class AggregateRegistry:
+    """
+    Maintains all windowed aggregates and exposes them to rules
+
+    observe() is called once per incoming event. It updates every aggregate whose
+    filter the event passes and writes the current values (for the event's group) to
+    context["aggregates"][name], so rules use ordinary conditions such as
+    {"field": "aggregates.src_modifications_5m", "operator": "gt", "value": 50}.
+    """
+
+    def __init__(self, evaluator: Optional[ConditionEvaluator] = None, clock: Callable[[], float] = time.time):
+        self.evaluator = evaluator or ConditionEvaluator()
+        self.clock = clock
+        self.aggregates: Dict[str, WindowedAggregate] = {}
+        self._lock = threading.Lock()
+
+    def define(self, spec: Dict[str, Any]) -> WindowedAggregate:
+        aggregate = WindowedAggregate(spec)
+        with self._lock:
+            self.aggregates[aggregate.name] = aggregate
+        return aggregate
+
+    def remove(self, name: str) -> bool:
+        with self._lock:
+            return self.aggregates.pop(name, None) is not None
+
+    def observe(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.aggregates:
+            return {}
+        now = self.clock()
+        with self._lock:
+            values = {
+                name: aggregate.observe(context, now, self.evaluator)
+                for name, aggregate in self.aggregates.items()
+            }
+        context.setdefault("aggregates", {}).update(values)
+        return values